@@ -1,19 +1,38 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class SlideDTO(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     title: str
     description: str
-    image: Optional[str] = None
+    image: Optional[str] = Field(None, description="URL of the image of the slide")
+    keywords: Optional[List[str]] = Field(None, description="Keywords to search an image for, if there is no image URL")
+    image_urls: Optional[List[str]] = Field(None, alias="imageUrls", description="Candidate image URLs, tried in order before searching")
 
 
 class PresentationDTO(BaseModel):
-    slides: List[SlideDTO]
+    slides: List[SlideDTO] = Field(..., min_length=1)
 
 
 class PromptRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     prompt: str = Field(..., min_length=10, description="User prompt to generate presentation content")
+    include_images: bool = Field(True, alias="includeImages", description="Whether to include Pexels images in the slides")
+    reuse_similar: bool = Field(True, alias="reuseSimilar", description="Whether the presentation generated for a near-identical prompt may be reused")
+
+
+class BatchRequest(BaseModel):
+    items: List[PromptRequest] = Field(..., min_length=1, description="Presentations to generate, in order")
+
+
+class SlideEditRequest(BaseModel):
+    instruction: Optional[str] = Field(None, description="What to change when the slide is written again by the LLM")
+    title: Optional[str] = Field(None, description="New title; with description or keywords, the slide is edited without the LLM")
+    description: Optional[str] = Field(None, description="New content of the slide")
+    keywords: Optional[List[str]] = Field(None, description="New image keywords; the image is searched again if they change")
 
 
 class PresentationResponse(BaseModel):
@@ -22,6 +41,29 @@ class PresentationResponse(BaseModel):
     message: str = "Presentation generated successfully"
 
 
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Dict[str, float] = Field(default_factory=dict, description="Duration of each stage, in seconds")
+    slide_count: Optional[int] = None
+    file_url: Optional[str] = None
+    error: Optional[str] = None
+
+
+class WarmupResponse(BaseModel):
+    status: str
+    timings: Dict[str, float] = Field(default_factory=dict, description="Duration of each startup phase and warmup step, in seconds")
+
+
 class ErrorResponse(BaseModel):
     error: str
     details: Optional[str] = None 
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Callable, List, Optional
+
+from ..domain.entities import Job, JobStatus
+from ..domain.repository import JobStore
+from .presentation_service import PresentationService
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class JobQueue:
+    """
+    Bounded pool of background workers running presentation generations.
+
+    Jobs are queued in process and picked up by ``workers`` tasks; their state
+    is kept in a pluggable JobStore.
+    """
+
+    def __init__(
+        self,
+        service_factory: Callable[[], PresentationService],
+        job_store: JobStore,
+        workers: Optional[int] = None,
+        max_queued: Optional[int] = None
+    ):
+        self.service_factory = service_factory
+        self.job_store = job_store
+        self.workers = max(1, workers or int(os.getenv("JOB_WORKERS", "4")))
+        self.max_queued = max_queued or int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info("JobQueue started with %s workers", self.workers)
+
+    async def stop(self) -> None:
+        """Stop the worker tasks, abandoning the jobs still running."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, prompt: str, include_images: bool = True, reuse_similar: bool = True) -> Job:
+        """
+        Queue a presentation generation.
+
+        Args:
+            prompt: User prompt to generate presentation
+            include_images: Whether to include images in the presentation
+            reuse_similar: Whether the presentation of a near-identical prompt may be reused
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFullError: If too many jobs are already waiting
+        """
+        if self._queue.full():
+            raise JobQueueFullError(f"Too many queued jobs (limit: {self.max_queued})")
+        job = Job(id=uuid.uuid4().hex, prompt=prompt, include_images=include_images, reuse_similar=reuse_similar)
+        # Enregistrer le job avant de le mettre en file pour qu'un worker le trouve toujours
+        await self.job_store.add(job)
+        try:
+            self._queue.put_nowait(job.id)
+        except asyncio.QueueFull:
+            job.status = JobStatus.FAILED
+            job.error = "Job queue full"
+            await self.job_store.update(job)
+            raise JobQueueFullError(f"Too many queued jobs (limit: {self.max_queued})")
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.job_store.get(job_id)
+                if job is not None:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        job.timings["queued"] = job.started_at - job.created_at
+        await self.job_store.update(job)
+        logger.debug("Running job %s", job.id)
+
+        try:
+            result = await self.service_factory().generate(job.prompt, job.include_images, job.reuse_similar)
+            if result:
+                job.status = JobStatus.SUCCEEDED
+                job.file_path = result.file_path
+                job.slide_count = result.slide_count
+                job.timings.update(result.timings)
+            else:
+                job.status = JobStatus.FAILED
+                job.error = "Could not generate content from prompt"
+        except Exception as e:
+            logger.exception("Job %s failed: %s", job.id, e)
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+
+        job.finished_at = time.time()
+        await self.job_store.update(job)
+        logger.info("Job %s finished with status: %s", job.id, job.status.value)
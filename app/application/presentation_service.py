@@ -1,11 +1,32 @@
+import asyncio
+import logging
 import os
+import time
 import uuid
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from ..domain.entities import Presentation
+from ..domain.deadline import deadline_scope
+from ..domain.entities import FALLBACK_IMAGE, Presentation, Slide
 from ..domain.repository import AIContentGenerator, PresentationRepository
 from .use_cases import GeneratePresentationUseCase
 
+logger = logging.getLogger(__name__)
+
+
+class PresentationNotFoundError(LookupError):
+    """Raised when the presentation or slide to edit does not exist."""
+
+
+@dataclass
+class GenerationResult:
+    """Outcome of a presentation generation."""
+    
+    file_path: Optional[str] = None
+    slide_count: int = 0
+    # Durée de chaque étape, en secondes
+    timings: Dict[str, float] = field(default_factory=dict)
+
 
 class PresentationService:
     """Service for generating and managing presentations."""
@@ -13,42 +34,277 @@ class PresentationService:
     def __init__(
         self,
         content_generator: AIContentGenerator,
-        presentation_repository: PresentationRepository
+        presentation_repository: PresentationRepository,
+        streaming: Optional[bool] = None,
+        deadline_seconds: Optional[float] = None
     ):
         self.content_generator = content_generator
         self.presentation_repository = presentation_repository
+        # En mode streaming, les images des premiers slides sont traitées pendant la génération des suivants ;
+        # désactivé par défaut, car un flux interrompu donne une présentation avec les seuls slides reçus
+        if streaming is None:
+            streaming = os.getenv("DEEPSEEK_STREAMING", "false").lower() in ("1", "true", "yes")
+        self.streaming = streaming
+        # Budget de temps total d'une génération, visible de toutes les étapes (0 : aucun)
+        if deadline_seconds is None:
+            deadline_seconds = float(os.getenv("GENERATION_DEADLINE_SECONDS", "180"))
+        self.deadline_seconds = deadline_seconds
     
-    async def generate_presentation(self, prompt: str, include_images: bool = True) -> Optional[str]:
+    async def generate_presentation(self, prompt: str, include_images: bool = True, reuse_similar: bool = True) -> Optional[str]:
         """
         Generate a presentation from a user prompt and save it to a file.
         
         Args:
             prompt: User prompt to generate presentation
             include_images: Whether to include images in the presentation
+            reuse_similar: Whether the presentation of a near-identical prompt may be reused
             
         Returns:
             Path to the saved presentation file or None if generation failed
         """
+        result = await self.generate(prompt, include_images, reuse_similar)
+        return result.file_path if result else None
+    
+    async def generate(self, prompt: str, include_images: bool = True, reuse_similar: bool = True) -> Optional[GenerationResult]:
+        """
+        Generate a presentation from a user prompt, save it and report how it went.
+        
+        The whole generation runs within the deadline budget: the LLM call and
+        the image searches and downloads are cut short when it is spent, and
+        the presentation is saved with what was ready.
+        
+        Args:
+            prompt: User prompt to generate presentation
+            include_images: Whether to include images in the presentation
+            reuse_similar: Whether the presentation of a near-identical prompt may be reused
+            
+        Returns:
+            The generation result or None if generation failed
+        """
+        with deadline_scope(self.deadline_seconds):
+            return await self._generate(prompt, include_images, reuse_similar)
+    
+    async def _generate(self, prompt: str, include_images: bool, reuse_similar: bool) -> Optional[GenerationResult]:
+        started = time.perf_counter()
+        result = GenerationResult()
+        
         # Modifier le prompt basé sur le mode images (pour maintenir la compatibilité)
         modified_prompt = self._prepare_prompt(prompt, include_images)
+        # Le prompt d'origine sert à retrouver les présentations de prompts presque identiques
+        user_prompt = prompt if reuse_similar else None
+        
+        # Create a unique filename
+        filename = f"presentation_{uuid.uuid4().hex}.pptx"
         
-        # Generate presentation content - transmettre également le paramètre include_images
-        presentation = await self.content_generator.generate_presentation(modified_prompt, include_images)
+        if self.streaming:
+            # La génération et le traitement des images se chevauchent : "generation" mesure
+            # le temps jusqu'au dernier slide reçu, "save" la durée totale de l'enregistrement
+            file_path = await self.presentation_repository.save_stream(
+                self._stream_slides(modified_prompt, include_images, user_prompt, result, started),
+                filename
+            )
+            result.timings["save"] = time.perf_counter() - started
+        else:
+            # Generate presentation content - transmettre également le paramètre include_images
+            presentation = await self.content_generator.generate_presentation(modified_prompt, include_images, user_prompt)
+            result.timings["generation"] = time.perf_counter() - started
+            
+            if not presentation or not presentation.slides:
+                return None
+            
+            # If images should be disabled, clear any image URLs/keywords
+            if not include_images:
+                self._remove_image_data(presentation)
+            result.slide_count = len(presentation.slides)
+            
+            # Save the presentation
+            save_started = time.perf_counter()
+            file_path = await self.presentation_repository.save(presentation, filename)
+            result.timings["save"] = time.perf_counter() - save_started
         
-        if not presentation or not presentation.slides:
+        if not file_path:
             return None
+        result.file_path = file_path
+        result.timings["total"] = time.perf_counter() - started
+        return result
+    
+    async def render(self, presentation: Presentation) -> Optional[GenerationResult]:
+        """
+        Save a presentation whose content is already written, without the LLM.
         
-        # If images should be disabled, clear any image URLs/keywords
-        if not include_images:
-            self._remove_image_data(presentation)
+        The images of the slides are resolved as for a generated presentation:
+        from their image URL, their candidate URLs, or a search for their
+        keywords. Slides with none of them have no image.
         
-        # Create a unique filename
-        filename = f"presentation_{uuid.uuid4().hex}.pptx"
+        Args:
+            presentation: The presentation to render
+            
+        Returns:
+            The generation result or None if the presentation could not be saved
+        """
+        with deadline_scope(self.deadline_seconds):
+            started = time.perf_counter()
+            result = GenerationResult(slide_count=len(presentation.slides))
+            result.file_path = await self.presentation_repository.save(presentation, f"presentation_{uuid.uuid4().hex}.pptx")
+            result.timings["save"] = result.timings["total"] = time.perf_counter() - started
+            return result if result.file_path else None
+    
+    async def edit_slide(
+        self,
+        filename: str,
+        index: int,
+        instruction: Optional[str] = None,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        keywords: Optional[List[str]] = None
+    ) -> Optional[GenerationResult]:
+        """
+        Change one slide of a saved presentation and save it as a new file.
+        
+        If the title, description or keywords are given, they replace those of
+        the slide; otherwise the LLM writes the slide again, following the
+        instruction. Only that slide is generated, and its image searched again
+        if its keywords changed or it had the fallback image: the other slides
+        keep the images resolved for the original presentation.
+        
+        Args:
+            filename: The filename of the saved presentation
+            index: Position of the slide, from 0
+            instruction: What the LLM should change when writing the slide again
+            title: The new title of the slide
+            description: The new content of the slide
+            keywords: The new image keywords of the slide
+            
+        Returns:
+            The result for the new file, or None if the slide could not be generated
+            
+        Raises:
+            PresentationNotFoundError: If the presentation or the slide does not exist
+        """
+        with deadline_scope(self.deadline_seconds):
+            started = time.perf_counter()
+            result = GenerationResult()
+            
+            presentation = await self.presentation_repository.load(filename)
+            if presentation is None:
+                raise PresentationNotFoundError(f"Presentation {filename} does not exist or cannot be edited")
+            if not 0 <= index < len(presentation.slides):
+                raise PresentationNotFoundError(f"Presentation {filename} has no slide {index + 1}")
+            
+            # Les présentations sans images n'ont de mots-clés sur aucun slide
+            include_images = any(slide.keywords for slide in presentation.slides)
+            slide = presentation.slides[index]
+            previous = Slide.from_dict(slide.to_dict())
+            if title is not None or description is not None or keywords is not None:
+                slide.title = title if title is not None else slide.title
+                slide.description = description if description is not None else slide.description
+                slide.keywords = keywords if keywords is not None else slide.keywords
+            else:
+                slide = await self.content_generator.generate_slide(presentation, index, instruction, include_images)
+                result.timings["generation"] = time.perf_counter() - started
+                if not slide:
+                    return None
+                if not include_images:
+                    slide.image = ""
+                    slide.keywords = []
+                presentation.slides[index] = slide
+            
+            # Garder l'image déjà trouvée pour les mêmes mots-clés, mais chercher à nouveau à la place de l'image de secours
+            if slide.keywords == previous.keywords and previous.image != FALLBACK_IMAGE:
+                slide.image = previous.image
+                slide.image_candidates = previous.image_candidates
+            else:
+                slide.image = ""
+                slide.image_candidates = None
+            result.slide_count = len(presentation.slides)
+            
+            save_started = time.perf_counter()
+            result.file_path = await self.presentation_repository.save(presentation, f"presentation_{uuid.uuid4().hex}.pptx")
+            result.timings["save"] = time.perf_counter() - save_started
+            result.timings["total"] = time.perf_counter() - started
+            return result if result.file_path else None
+    
+    async def generate_many(
+        self,
+        requests: List[Tuple[str, bool, bool]],
+        concurrency: int
+    ) -> AsyncIterator[Tuple[int, Optional[GenerationResult], Optional[str]]]:
+        """
+        Generate several presentations concurrently, yielding each one as soon as it is done.
+        
+        At most ``concurrency`` presentations are generated at the same time, so
+        the LLM latency of one prompt overlaps with the others. The connection
+        pools and caches are shared by all of them.
+        
+        Args:
+            requests: The (prompt, include_images, reuse_similar) of each presentation
+            concurrency: Maximum number of presentations generated at the same time
+            
+        Yields:
+            Tuples of (request index, result, error), in completion order;
+            result is None and error is set when a generation failed
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(index: int, prompt: str, include_images: bool, reuse_similar: bool) -> Tuple[int, Optional[GenerationResult], Optional[str]]:
+            async with semaphore:
+                try:
+                    result = await self.generate(prompt, include_images, reuse_similar)
+                except Exception as e:
+                    logger.warning("Presentation %s of the batch failed: %s", index, e)
+                    return index, None, str(e)
+            if not result:
+                return index, None, "Could not generate content from prompt"
+            return index, result, None
         
-        # Save the presentation
-        file_path = await self.presentation_repository.save(presentation, filename)
+        tasks = [asyncio.ensure_future(run(index, *request)) for index, request in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Le client peut se déconnecter avant la fin du lot
+            for task in tasks:
+                task.cancel()
+    
+    async def _stream_slides(
+        self,
+        prompt: str,
+        include_images: bool,
+        user_prompt: Optional[str],
+        result: GenerationResult,
+        started: float
+    ) -> AsyncIterator[Slide]:
+        """
+        Stream the generated slides, clearing image data if images are disabled.
+        
+        If generation fails part-way, the slides received so far are kept.
         
-        return file_path
+        Args:
+            prompt: The prepared prompt
+            include_images: Whether to include images in the presentation
+            user_prompt: The prompt as written by the user, or None to not reuse similar prompts
+            result: The generation result, updated with the slide count and timings
+            started: perf_counter value at the start of the generation
+            
+        Yields:
+            The slides, in order
+        """
+        try:
+            async for slide in self.content_generator.stream_slides(prompt, include_images, user_prompt):
+                if not include_images:
+                    slide.image = ""
+                    slide.keywords = []
+                if not result.slide_count:
+                    result.timings["first_slide"] = time.perf_counter() - started
+                result.slide_count += 1
+                yield slide
+        except Exception as e:
+            if not result.slide_count:
+                logger.warning("Presentation generation failed: %s", e)
+                return
+            logger.warning("Presentation generation stopped after %s slides, keeping them: %s", result.slide_count, e)
+        finally:
+            result.timings["generation"] = time.perf_counter() - started
     
     def _prepare_prompt(self, prompt: str, include_images: bool) -> str:
         """
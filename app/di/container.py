@@ -1,21 +1,253 @@
-from typing import Callable
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
 
-from fastapi import Depends
+import httpx
+from fastapi import Depends, Request
 
+from ..application.job_queue import JobQueue
 from ..application.presentation_service import PresentationService
-from ..domain.repository import AIContentGenerator, PresentationRepository
+from ..domain.repository import AIContentGenerator, JobStore, PresentationRepository
+from ..infrastructure.cached_content_generator import CachedContentGenerator
+from ..infrastructure.deck_cache import DeckCache
 from ..infrastructure.deepseek_client import DeepseekClient
+from ..infrastructure.executor import RenderExecutor, run_blocking
+from ..infrastructure.http_client import create_http_client
+from ..infrastructure.image_cache import ImageCache
+from ..infrastructure.image_index import ImageIndex
+from ..infrastructure.job_store import InMemoryJobStore
+from ..infrastructure.metrics import STARTUP_DURATION
+from ..infrastructure.pexels_client import PexelsClient
 from ..infrastructure.pptx_generator import PPTXGenerator
+from ..infrastructure.presentation_storage import PresentationStorage
+from ..infrastructure.prompt_index import PromptIndex
+from ..infrastructure.search_cache import SearchCache
+from ..infrastructure.template_registry import TemplateRegistry
 
+logger = logging.getLogger(__name__)
 
-def get_content_generator() -> AIContentGenerator:
+
+class Container:
+    """
+    Application-scoped services.
+    
+    The services and their HTTP connection pools are created once when the
+    application starts and shared by every request, then closed on shutdown.
+    
+    Startup only creates the objects, so that the server binds its port fast.
+    The expensive preparation (template parsing, render workers, upstream
+    connections, cache databases) happens on first use, or in the warmup: at
+    startup before serving (WARMUP=blocking), in the background right after
+    startup (WARMUP=background), or when /warmup is called.
+    """
+    
+    WARMUP_MODES = ("off", "blocking", "background")
+    
+    def __init__(self, import_seconds: Optional[float] = None):
+        self.deepseek_http_client: Optional[httpx.AsyncClient] = None
+        self.pexels_http_client: Optional[httpx.AsyncClient] = None
+        self.image_http_client: Optional[httpx.AsyncClient] = None
+        self.image_cache: Optional[ImageCache] = None
+        self.search_cache: Optional[SearchCache] = None
+        self.image_index: Optional[ImageIndex] = None
+        self.deck_cache: Optional[DeckCache] = None
+        self.prompt_index: Optional[PromptIndex] = None
+        self.pexels_client: Optional[PexelsClient] = None
+        self.render_executor: Optional[RenderExecutor] = None
+        self.template_registry: Optional[TemplateRegistry] = None
+        self.presentation_storage: Optional[PresentationStorage] = None
+        self.pptx_generator: Optional[PPTXGenerator] = None
+        self.job_store: Optional[JobStore] = None
+        self.job_queue: Optional[JobQueue] = None
+        self._deepseek_client: Optional[DeepseekClient] = None
+        self._content_generator: Optional[AIContentGenerator] = None
+        
+        self.warmup_mode = os.getenv("WARMUP", "off").lower()
+        if self.warmup_mode not in self.WARMUP_MODES:
+            raise ValueError(f"Invalid WARMUP '{self.warmup_mode}': expected 'off', 'blocking' or 'background'")
+        # Durée de chaque phase du démarrage, en secondes
+        self.timings: Dict[str, float] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        if import_seconds is not None:
+            self._record_timing("import", import_seconds)
+    
+    async def startup(self) -> None:
+        """Create the connection pools and the services, and start the warmup if enabled."""
+        started = time.perf_counter()
+        # Un pool de connexions par hôte amont
+        self.deepseek_http_client = create_http_client(timeout=120.0)
+        self.pexels_http_client = create_http_client(timeout=15.0)
+        self.image_http_client = create_http_client(timeout=30.0)
+        
+        self.image_cache = ImageCache()
+        self.search_cache = SearchCache()
+        self.deck_cache = DeckCache()
+        self.prompt_index = PromptIndex()
+        self.image_index = ImageIndex()
+        self.pexels_client = PexelsClient(
+            http_client=self.pexels_http_client,
+            search_cache=self.search_cache,
+            image_index=self.image_index
+        )
+        self.render_executor = RenderExecutor()
+        self.template_registry = TemplateRegistry()
+        self.presentation_storage = PresentationStorage()
+        await self.presentation_storage.start()
+        self.pptx_generator = PPTXGenerator(
+            pexels_client=self.pexels_client,
+            http_client=self.image_http_client,
+            image_cache=self.image_cache,
+            render_executor=self.render_executor,
+            template_registry=self.template_registry,
+            storage=self.presentation_storage
+        )
+        
+        self.job_store = InMemoryJobStore()
+        self.job_queue = JobQueue(lambda: self.presentation_service, self.job_store)
+        await self.job_queue.start()
+        self._record_timing("startup", time.perf_counter() - started)
+        logger.info(
+            "Application services initialized in %.3fs (import: %.3fs)",
+            self.timings["startup"], self.timings.get("import", 0.0)
+        )
+        
+        if self.warmup_mode == "blocking":
+            await self.warmup()
+        elif self.warmup_mode == "background":
+            self._warmup_task = asyncio.create_task(self._warmup())
+    
+    @property
+    def warmup_status(self) -> str:
+        """"not_started", "running" or "done"."""
+        if self._warmup_task is None:
+            return "not_started"
+        return "done" if self._warmup_task.done() else "running"
+    
+    async def warmup(self) -> Dict[str, float]:
+        """
+        Prepare everything the first requests would otherwise wait for.
+        
+        The warmup runs once: later or concurrent calls wait for the same run.
+        
+        Returns:
+            The duration of each startup phase and warmup step, in seconds
+        """
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._warmup())
+        await asyncio.shield(self._warmup_task)
+        return dict(self.timings)
+    
+    async def _warmup(self) -> None:
+        # Importé ici : c'est justement le module lourd que le démarrage évite de charger
+        from ..infrastructure.pptx_renderer import preload
+        
+        steps = (
+            ("templates", lambda: run_blocking(self.template_registry.load)),
+            ("render_workers", lambda: self.render_executor.warmup(preload)),
+            ("http_pools", self._open_http_pools),
+            ("caches", lambda: asyncio.gather(
+                run_blocking(self.search_cache.warmup),
+                run_blocking(self.image_index.warmup),
+                run_blocking(self.deck_cache.warmup),
+                run_blocking(self.prompt_index.warmup)
+            )),
+        )
+        started = time.perf_counter()
+        for name, step in steps:
+            step_started = time.perf_counter()
+            try:
+                await step()
+            except Exception as e:
+                logger.warning("Warmup step %s failed: %s", name, e)
+            self._record_timing(f"warmup_{name}", time.perf_counter() - step_started)
+        self._record_timing("warmup", time.perf_counter() - started)
+        logger.info(
+            "Warmup done in %.3fs (%s)",
+            self.timings["warmup"],
+            ", ".join(f"{name}: {self.timings[f'warmup_{name}']:.3f}s" for name, _ in steps)
+        )
+    
+    async def _open_http_pools(self) -> None:
+        """Open a keep-alive connection to each upstream host (the response does not matter)."""
+        async def connect(client: httpx.AsyncClient, url: Optional[str]) -> None:
+            if not url:
+                return
+            try:
+                await client.head(url, timeout=5.0)
+            except httpx.HTTPError as e:
+                logger.warning("Could not open a connection to %s: %s", url, e)
+        
+        await asyncio.gather(
+            connect(self.deepseek_http_client, os.getenv("DEEPSEEK_API_URL")),
+            connect(self.pexels_http_client, self.pexels_client.api_url),
+            connect(self.image_http_client, os.getenv("WARMUP_IMAGE_HOST_URL", "https://images.pexels.com/"))
+        )
+    
+    def _record_timing(self, phase: str, seconds: float) -> None:
+        self.timings[phase] = seconds
+        STARTUP_DURATION.set(seconds, phase=phase)
+    
+    async def shutdown(self) -> None:
+        """Stop the background workers and close the connection pools."""
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+            await asyncio.gather(self._warmup_task, return_exceptions=True)
+        if self.job_queue is not None:
+            await self.job_queue.stop()
+        if self.presentation_storage is not None:
+            await self.presentation_storage.stop()
+        for client in (self.deepseek_http_client, self.pexels_http_client, self.image_http_client):
+            if client is not None:
+                await client.aclose()
+        if self.render_executor is not None:
+            # Attendre les rendus en cours sans bloquer la boucle d'événements
+            await run_blocking(self.render_executor.shutdown)
+        logger.info("Application services closed")
+    
+    @property
+    def deepseek_client(self) -> DeepseekClient:
+        """
+        The Deepseek client, created on first use.
+        
+        Missing credentials are reported when a presentation is requested
+        rather than preventing the application from starting.
+        """
+        if self._deepseek_client is None:
+            self._deepseek_client = DeepseekClient(http_client=self.deepseek_http_client)
+        return self._deepseek_client
+    
+    @property
+    def content_generator(self) -> AIContentGenerator:
+        """The content generator: the Deepseek client behind the deck cache."""
+        if self._content_generator is None:
+            self._content_generator = CachedContentGenerator(self.deepseek_client, self.deck_cache, self.prompt_index)
+        return self._content_generator
+
+
+    @property
+    def presentation_service(self) -> PresentationService:
+        """A PresentationService using the application-scoped services."""
+        return PresentationService(
+            content_generator=self.content_generator,
+            presentation_repository=self.pptx_generator
+        )
+
+
+def get_container(request: Request) -> Container:
+    """Get the application container."""
+    return request.app.state.container
+
+
+def get_content_generator(container: Container = Depends(get_container)) -> AIContentGenerator:
     """Get the AIContentGenerator implementation."""
-    return DeepseekClient()
+    return container.content_generator
 
 
-def get_presentation_repository() -> PresentationRepository:
+def get_presentation_repository(container: Container = Depends(get_container)) -> PresentationRepository:
     """Get the PresentationRepository implementation."""
-    return PPTXGenerator()
+    return container.pptx_generator
 
 
 def get_presentation_service(
@@ -27,3 +259,13 @@ def get_presentation_service(
         content_generator=content_generator,
         presentation_repository=presentation_repository
     )
+
+
+def get_job_queue(container: Container = Depends(get_container)) -> JobQueue:
+    """Get the background job queue."""
+    return container.job_queue
+
+
+def get_presentation_storage(container: Container = Depends(get_container)) -> PresentationStorage:
+    """Get the storage of the generated presentations."""
+    return container.presentation_storage
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Échéance (time.monotonic) de la génération en cours, visible de toutes les étapes
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when the time budget of a generation is spent."""
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Give the current task, and the tasks it starts, a total time budget.
+
+    An enclosing deadline that is sooner is kept. A budget of None or 0 adds
+    no deadline.
+
+    Args:
+        seconds: The time budget, in seconds
+    """
+    deadline = _deadline.get()
+    if seconds:
+        ends_at = time.monotonic() + seconds
+        deadline = ends_at if deadline is None else min(deadline, ends_at)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Time left before the deadline of the current generation.
+
+    Args:
+        cap: Upper bound of the result, e.g. the timeout of a single call
+
+    Returns:
+        The seconds left (0 once the deadline has passed) capped to ``cap``,
+        or ``cap`` if there is no deadline
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return cap
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if cap is None else min(cap, remaining)
+
+
+def check_deadline(stage: str) -> None:
+    """
+    Raise if the deadline of the current generation has passed.
+
+    Args:
+        stage: What was about to run, for the error message
+
+    Raises:
+        DeadlineExceededError: If there is no time left
+    """
+    if remaining_time() == 0:
+        raise DeadlineExceededError(f"Deadline exceeded before {stage}")
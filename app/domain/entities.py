@@ -1,6 +1,11 @@
-from typing import List, Optional
+import time
+from enum import Enum
+from typing import Dict, List, Optional
 from dataclasses import dataclass, field
 
+# Image locale des slides pour lesquels aucune image n'a pu être obtenue
+FALLBACK_IMAGE = "/static/images/fallback.jpg"
+
 
 @dataclass
 class Slide:
@@ -10,6 +15,8 @@ class Slide:
     description: str
     image: Optional[str] = None
     keywords: Optional[List[str]] = None
+    # Images trouvées pour les mots-clés (ou fournies avec le slide), de la plus pertinente à la moins pertinente
+    image_candidates: Optional[List[str]] = None
 
     def to_dict(self) -> dict:
         """Convert to dictionary representation."""
@@ -17,15 +24,29 @@ class Slide:
             "title": self.title,
             "description": self.description,
             "image": self.image,
-            "keywords": self.keywords
+            "keywords": self.keywords,
+            "image_candidates": self.image_candidates
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Slide':
+        """Create a slide from its dictionary representation."""
+        return cls(
+            title=data["title"],
+            description=data["description"],
+            image=data.get("image"),
+            keywords=data.get("keywords"),
+            image_candidates=data.get("image_candidates")
+        )
+
 
 @dataclass
 class Presentation:
     """A presentation containing multiple slides."""
     
     slides: List[Slide] = field(default_factory=list)
+    # Faux si des slides manquent à la génération (réponse tronquée, objets invalides...) ; non sérialisé
+    complete: bool = True
     
     @classmethod
     def create_empty(cls) -> 'Presentation':
@@ -40,4 +61,41 @@ class Presentation:
         """Convert to dictionary representation."""
         return {
             "slides": [slide.to_dict() for slide in self.slides]
-        } 
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Presentation':
+        """Create a presentation from its dictionary representation."""
+        return cls(slides=[Slide.from_dict(slide) for slide in data.get("slides", [])])
+
+
+class JobStatus(str, Enum):
+    """Lifecycle state of a generation job."""
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A presentation generation running in the background."""
+    
+    id: str
+    prompt: str
+    include_images: bool = True
+    reuse_similar: bool = True
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    slide_count: Optional[int] = None
+    file_path: Optional[str] = None
+    error: Optional[str] = None
+    
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has succeeded or failed."""
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Optional
-from .entities import Presentation
+from typing import AsyncIterator, Optional
+from .entities import Job, Presentation, Slide
 
 
 class PresentationRepository(ABC):
@@ -10,19 +10,139 @@ class PresentationRepository(ABC):
         Save the presentation to a file and return the file path.
         """
         pass
+    
+    async def save_stream(self, slides: AsyncIterator[Slide], filename: str) -> Optional[str]:
+        """
+        Save a presentation whose slides are still being generated.
+        
+        The default implementation waits for every slide and then calls save;
+        implementations can override it to start working on each slide as
+        soon as it arrives.
+        
+        Args:
+            slides: Async iterator over the slides, in order
+            filename: The filename to save as
+            
+        Returns:
+            The file path, or None if the iterator yielded no slide
+        """
+        presentation = Presentation.create_empty()
+        async for slide in slides:
+            presentation.add_slide(slide)
+        if not presentation.slides:
+            return None
+        return await self.save(presentation, filename)
+    
+    async def load(self, filename: str) -> Optional[Presentation]:
+        """
+        Get the structured content of a saved presentation, to edit it.
+        
+        The slides hold the images resolved when the presentation was saved,
+        so saving it again reuses them instead of searching again. The default
+        implementation keeps nothing and returns None.
+        
+        Args:
+            filename: The filename the presentation was saved as
+            
+        Returns:
+            The presentation, or None if it is not available
+        """
+        return None
 
 
 class AIContentGenerator(ABC):
     @abstractmethod
-    async def generate_presentation(self, prompt: str, include_images: bool = True) -> Optional[Presentation]:
+    async def generate_presentation(
+        self,
+        prompt: str,
+        include_images: bool = True,
+        user_prompt: Optional[str] = None
+    ) -> Optional[Presentation]:
         """
         Generate a presentation from a user prompt.
         
         Args:
             prompt: The user prompt
             include_images: Whether to include images in the presentation
+            user_prompt: The prompt as written by the user, before the
+                instructions added to it; when given, a presentation generated
+                for a near-identical prompt may be reused
             
         Returns:
             A Presentation object or None if generation failed
         """
-        pass 
+        pass
+    
+    async def stream_slides(
+        self,
+        prompt: str,
+        include_images: bool = True,
+        user_prompt: Optional[str] = None
+    ) -> AsyncIterator[Slide]:
+        """
+        Generate a presentation from a user prompt, yielding each slide as soon as it is ready.
+        
+        The default implementation waits for generate_presentation and then
+        yields its slides; streaming implementations override it.
+        
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+            user_prompt: The prompt as written by the user, see generate_presentation
+            
+        Yields:
+            The slides, in order
+        """
+        presentation = await self.generate_presentation(prompt, include_images, user_prompt)
+        if presentation:
+            for slide in presentation.slides:
+                yield slide
+
+
+    async def generate_slide(
+        self,
+        presentation: Presentation,
+        index: int,
+        instruction: Optional[str] = None,
+        include_images: bool = True
+    ) -> Optional[Slide]:
+        """
+        Write a new version of one slide of a presentation.
+        
+        The default implementation cannot and returns None.
+        
+        Args:
+            presentation: The presentation, for context
+            index: Position of the slide to write again
+            instruction: What the user wants changed, if anything
+            include_images: Whether to include images in the presentation
+            
+        Returns:
+            The new slide, or None if generation failed
+        """
+        return None
+
+
+class JobStore(ABC):
+    """Storage backend for generation jobs."""
+    
+    @abstractmethod
+    async def add(self, job: Job) -> None:
+        """
+        Store a new job.
+        """
+        pass
+    
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        """
+        Get a job by id, or None if it does not exist.
+        """
+        pass
+    
+    @abstractmethod
+    async def update(self, job: Job) -> None:
+        """
+        Persist the changes made to a job.
+        """
+        pass
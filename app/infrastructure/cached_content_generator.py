@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+from typing import AsyncIterator, Optional
+
+from ..domain.entities import Presentation, Slide
+from ..domain.repository import AIContentGenerator
+from .deck_cache import DeckCache
+from .deepseek_client import DeepseekClient
+from .executor import run_blocking
+from .metrics import record_cache_lookup
+from .prompt_index import PromptIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CachedContentGenerator(AIContentGenerator):
+    """
+    AIContentGenerator that serves repeated prompts from a DeckCache.
+
+    The cache key covers everything that determines the LLM output: the
+    prompt, the image mode, the model name, the system message and the
+    generation mode, so that a model or prompt change never serves stale decks.
+
+    With a PromptIndex, a request whose user prompt is near-identical to the
+    prompt of a cached presentation (same request, worded slightly
+    differently) reuses that presentation too.
+
+    Presentations with missing slides are not cached, so that a truncated or
+    partly failed generation is not served again.
+    """
+
+    def __init__(self, generator: DeepseekClient, deck_cache: DeckCache, prompt_index: Optional[PromptIndex] = None):
+        self.generator = generator
+        self.deck_cache = deck_cache
+        self.prompt_index = prompt_index
+
+    async def generate_presentation(
+        self,
+        prompt: str,
+        include_images: bool = True,
+        user_prompt: Optional[str] = None
+    ) -> Optional[Presentation]:
+        """
+        Generate a presentation, reusing the cached result of an identical or similar request.
+
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+            user_prompt: The prompt as written by the user, to reuse the
+                presentation of a near-identical prompt and index this one;
+                None to only reuse the result of an identical request
+
+        Returns:
+            A Presentation object or None if generation failed
+        """
+        cache_key = self.cache_key(prompt, include_images)
+        cached = await self._get_cached(cache_key, include_images, user_prompt)
+        if cached is not None:
+            logger.debug("Deck cache hit for prompt: '%s...'", prompt[:50])
+            return Presentation.from_dict(cached)
+
+        presentation = await self.generator.generate_presentation(prompt, include_images)
+        if presentation and presentation.slides:
+            if presentation.complete:
+                await self._put(cache_key, presentation, include_images, user_prompt)
+            else:
+                logger.info("Not caching incomplete presentation for prompt: '%s...'", prompt[:50])
+        return presentation
+
+    async def stream_slides(
+        self,
+        prompt: str,
+        include_images: bool = True,
+        user_prompt: Optional[str] = None
+    ) -> AsyncIterator[Slide]:
+        """
+        Stream the slides of a presentation, reusing the cached result of an identical or similar request.
+
+        On a cache miss the slides are streamed from the wrapped generator and
+        the presentation is cached once the stream has completed; the stream
+        raises instead if slides are missing, and nothing is cached.
+
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+            user_prompt: The prompt as written by the user, see generate_presentation
+
+        Yields:
+            The slides, in order
+        """
+        cache_key = self.cache_key(prompt, include_images)
+        cached = await self._get_cached(cache_key, include_images, user_prompt)
+        if cached is not None:
+            logger.debug("Deck cache hit for prompt: '%s...'", prompt[:50])
+            for slide in Presentation.from_dict(cached).slides:
+                yield slide
+            return
+
+        presentation = Presentation.create_empty()
+        async for slide in self.generator.stream_slides(prompt, include_images):
+            presentation.add_slide(Slide.from_dict(slide.to_dict()))
+            yield slide
+        if presentation.slides:
+            await self._put(cache_key, presentation, include_images, user_prompt)
+
+    async def generate_slide(
+        self,
+        presentation: Presentation,
+        index: int,
+        instruction: Optional[str] = None,
+        include_images: bool = True
+    ) -> Optional[Slide]:
+        """
+        Write a new version of one slide. Not cached: asking again should give another version.
+        """
+        return await self.generator.generate_slide(presentation, index, instruction, include_images)
+
+    async def _get_cached(self, cache_key: str, include_images: bool, user_prompt: Optional[str]) -> Optional[dict]:
+        try:
+            cached = await run_blocking(self.deck_cache.get, cache_key)
+        except Exception as e:
+            logger.warning("Deck cache lookup failed: %s", e)
+            cached = None
+        record_cache_lookup("decks", cached is not None)
+        if cached is not None or not user_prompt or not self.prompt_index or not self.prompt_index.enabled:
+            return cached
+
+        # Pas de résultat pour cette requête exacte : chercher un prompt presque identique
+        try:
+            similar = await run_blocking(self.prompt_index.find, user_prompt, self.scope(include_images))
+            if similar:
+                cached = await run_blocking(self.deck_cache.get, similar[0])
+        except Exception as e:
+            logger.warning("Similar prompt lookup failed: %s", e)
+            cached = None
+        record_cache_lookup("similar_decks", cached is not None)
+        if cached is not None:
+            logger.info("Reusing the presentation of a similar prompt (similarity: %.2f)", similar[1])
+        return cached
+
+    async def _put(self, cache_key: str, presentation: Presentation, include_images: bool, user_prompt: Optional[str]) -> None:
+        await run_blocking(self.deck_cache.put, cache_key, presentation.to_dict())
+        if user_prompt and self.prompt_index and self.prompt_index.enabled:
+            await run_blocking(self.prompt_index.add, user_prompt, self.scope(include_images), cache_key)
+
+    def cache_key(self, prompt: str, include_images: bool) -> str:
+        """
+        Build the cache key of a generation request.
+
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+
+        Returns:
+            The cache key
+        """
+        key_data = json.dumps([prompt] + self._key_context(include_images))
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    def scope(self, include_images: bool) -> str:
+        """
+        Identify everything but the prompt that determines the LLM output: only
+        prompts of the same scope are compared by the prompt index.
+        """
+        return hashlib.sha256(json.dumps(self._key_context(include_images)).encode("utf-8")).hexdigest()
+
+    def _key_context(self, include_images: bool) -> list:
+        system_message = self.generator.get_system_message(include_images)
+        key_parts = [
+            include_images,
+            self.generator.model,
+            hashlib.sha256(system_message.encode("utf-8")).hexdigest()
+        ]
+        # Le mode par défaut n'entre pas dans la clé, pour garder les entrées existantes
+        if self.generator.mode != "single":
+            key_parts.append(self.generator.mode)
+        return key_parts
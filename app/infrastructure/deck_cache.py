@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional
+
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+class DeckCache(SQLiteStore):
+    """
+    Persistent cache of generated presentations, shared by every worker process.
+
+    Entries hold the presentation as JSON (``Presentation.to_dict``). They
+    expire after ``ttl_seconds``, and once the cache holds more than
+    ``max_entries`` the least recently used ones are evicted.
+    """
+
+    # Nombre d'écritures entre deux évictions
+    EVICT_EVERY = 20
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS decks ("
+        "cache_key TEXT PRIMARY KEY, "
+        "presentation TEXT NOT NULL, "
+        "expires_at REAL NOT NULL, "
+        "last_access REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS decks_last_access ON decks (last_access)",
+    )
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("DECK_CACHE_TTL_HOURS", "24")) * 3600
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("DECK_CACHE_MAX_ENTRIES", "1000"))
+        self._writes = 0
+        super().__init__(db_path or os.getenv("DECK_CACHE_PATH", "data/deck_cache.sqlite3"))
+
+        logger.info("DeckCache initialized at %s", self.db_path)
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        """
+        Look up a cached presentation.
+
+        Args:
+            cache_key: The cache key
+
+        Returns:
+            The presentation dictionary, or None on a cache miss
+        """
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT presentation FROM decks WHERE cache_key = ? AND expires_at > ?",
+                (cache_key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE decks SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+        return json.loads(row[0])
+
+    def put(self, cache_key: str, presentation: dict) -> None:
+        """
+        Store a presentation.
+
+        Args:
+            cache_key: The cache key
+            presentation: The presentation dictionary
+        """
+        now = time.time()
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO decks (cache_key, presentation, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (cache_key, json.dumps(presentation), now + self.ttl_seconds, now)
+                )
+                self._writes += 1
+                if self._writes % self.EVICT_EVERY == 0:
+                    connection.execute("DELETE FROM decks WHERE expires_at <= ?", (now,))
+                    connection.execute(
+                        "DELETE FROM decks WHERE cache_key IN ("
+                        "SELECT cache_key FROM decks ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            logger.warning("Could not write presentation to cache: %s", e)
@@ -1,171 +1,781 @@
+import asyncio
 import json
+import logging
 import os
-from typing import Dict, List, Optional, Any
+import random
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple, TypeVar
 import httpx
 from dotenv import load_dotenv
 
+from ..domain.deadline import DeadlineExceededError, remaining_time
 from ..domain.entities import Presentation, Slide
 from ..domain.repository import AIContentGenerator
+from .hedging import LatencyWindow, hedged
+from .http_client import create_http_client
+from .metrics import observe_stage, record_upstream_error, span
+from .slide_stream_parser import IncrementalSlideParser, extract_json_array, extract_slides, is_slide_object
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+T = TypeVar("T")
+
 
 class DeepseekClient(AIContentGenerator):
-    def __init__(self):
+    GENERATION_MODES = ("single", "outline")
+    
+    OUTLINE_SYSTEM_MESSAGE = """
+            You are a professional presentation designer. Plan a structured PowerPoint presentation based on the user's prompt.
+            Your output must be a valid JSON array of sections. Each section must have:
+            1. "title": the title of the section
+            2. "slides": an array with the title of each slide of the section
+            
+            Plan as many slides as the topic needs, or the number of slides the user asks for.
+            Only write titles: the content of the slides will be written later, section by section.
+            
+            Format your response ONLY as a valid JSON array of objects. Do not include any explanations or additional text.
+            Example format:
+            [
+                {
+                    "title": "Renewable Energy Today",
+                    "slides": ["Introduction to Renewable Energy", "Global Energy Mix", "Cost Trends"]
+                },
+                {
+                    "title": "Solar Power",
+                    "slides": ["How Photovoltaic Cells Work", "Benefits of Solar Power"]
+                }
+            ]
+            """
+    
+    CONTINUATION_MESSAGE = (
+        "Your answer was cut off. Continue the presentation: output ONLY a valid JSON array with the "
+        "remaining slides, in the same format, without repeating the slides above."
+    )
+    
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        hedge_percentile: Optional[float] = None,
+        mode: Optional[str] = None
+    ):
         self.api_key = os.getenv("DEEPSEEK_API_KEY")
         self.api_url = os.getenv("DEEPSEEK_API_URL")
+        self.model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
+        # Durée maximale d'une tentative ; l'échéance de la génération peut la réduire
+        self.timeout = timeout or float(os.getenv("DEEPSEEK_TIMEOUT_SECONDS", "120"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("DEEPSEEK_MAX_RETRIES", "2"))
+        # Requête dupliquée quand la première dépasse ce percentile des latences récentes (0 : désactivé)
+        self.hedge_percentile = hedge_percentile if hedge_percentile is not None else float(os.getenv("DEEPSEEK_HEDGE_PERCENTILE", "0"))
+        self.hedge_min_samples = int(os.getenv("DEEPSEEK_HEDGE_MIN_SAMPLES", "20"))
+        # Requêtes de suite autorisées quand la réponse est tronquée par max_tokens (0 : aucune)
+        self.max_continuations = int(os.getenv("DEEPSEEK_MAX_CONTINUATIONS", "1"))
+        # "single" : une seule réponse ; "outline" : un plan, puis les sections rédigées en parallèle
+        self.mode = (mode or os.getenv("DEEPSEEK_GENERATION_MODE", "single")).lower()
+        if self.mode not in self.GENERATION_MODES:
+            raise ValueError(f"Invalid DEEPSEEK_GENERATION_MODE '{self.mode}': expected 'single' or 'outline'")
+        self.expansion_concurrency = max(1, int(os.getenv("DEEPSEEK_EXPANSION_CONCURRENCY", "4")))
+        # Latences des appels réussis : réponse complète, et ouverture du flux en mode streaming
+        self._completion_latency = LatencyWindow()
+        self._stream_latency = LatencyWindow()
         
         if not self.api_key or not self.api_url:
             raise ValueError("Missing Deepseek API credentials. Please set DEEPSEEK_API_KEY and DEEPSEEK_API_URL environment variables.")
         
-        print("🚀 DeepseekClient initialized successfully")
+        # Client HTTP partagé (pool de connexions keep-alive) ; créé ici si non fourni
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client(timeout=self.timeout)
+        
+        logger.info("DeepseekClient initialized successfully")
+
+    async def aclose(self) -> None:
+        """Close the HTTP client if it is owned by this instance."""
+        if self._owns_http_client:
+            await self.http_client.aclose()
 
-    async def generate_presentation(self, prompt: str, include_images: bool = True) -> Optional[Presentation]:
+    def get_system_message(self, include_images: bool) -> str:
+        """
+        Get the system message sent to Deepseek.
+        
+        Args:
+            include_images: Whether slides should include image keywords
+            
+        Returns:
+            The system message
+        """
+        # Message système pour la génération avec ou sans images
+        if include_images:
+            return """
+            You are a professional presentation designer. Create a structured PowerPoint presentation based on the user's prompt.
+            Your output must be a valid JSON array of slides. Each slide must have:
+            1. "title": a concise title for the slide
+            2. "description": detailed content for the slide
+            3. "keywords": an array of 3-5 specific keywords that best describe the visual content needed for this slide
+            4. "image": leave this field blank - it will be filled in later with an image URL
+
+            For the keywords:
+            - Choose specific and descriptive terms that clearly represent what should be shown in the image
+            - Include concrete nouns and adjectives that can be visually represented
+            - Avoid abstract concepts that cannot be directly visualized
+            - Focus on the key visual elements that would enhance the slide content
+            - Be precise rather than general (e.g. "office workers collaborating" instead of just "business")
+
+            Format your response ONLY as a valid JSON array of objects. Do not include any explanations or additional text.
+            Example format:
+            [
+                {
+                    "title": "Introduction to Renewable Energy",
+                    "description": "Renewable energy sources include solar, wind, hydroelectric, and geothermal power. These sustainable alternatives are essential for reducing carbon emissions.",
+                    "keywords": ["solar panels", "wind turbines", "renewable energy technology", "green power", "sustainable energy"]
+                },
+                {
+                    "title": "Benefits of Solar Power",
+                    "description": "Solar energy provides clean, renewable power with minimal environmental impact. Modern photovoltaic cells are increasingly efficient and affordable.",
+                    "keywords": ["solar panel installation", "rooftop solar array", "sunlight energy conversion", "modern solar technology", "photovoltaic cells"]
+                }
+            ]
+            """
+        else:
+            return """
+            You are a professional presentation designer. Create a structured PowerPoint presentation based on the user's prompt.
+            Your output must be a valid JSON array of slides. Each slide must have:
+            1. "title": a concise title for the slide
+            2. "description": detailed content for the slide
+
+            Focus solely on creating high-quality textual content. Do not include keywords or image-related information.
+
+            Format your response ONLY as a valid JSON array of objects. Do not include any explanations or additional text.
+            Example format:
+            [
+                {
+                    "title": "Introduction to Renewable Energy",
+                    "description": "Renewable energy sources include solar, wind, hydroelectric, and geothermal power. These sustainable alternatives are essential for reducing carbon emissions."
+                },
+                {
+                    "title": "Benefits of Solar Power",
+                    "description": "Solar energy provides clean, renewable power with minimal environmental impact. Modern photovoltaic cells are increasingly efficient and affordable."
+                }
+            ]
+            """
+
+    async def generate_presentation(
+        self,
+        prompt: str,
+        include_images: bool = True,
+        user_prompt: Optional[str] = None
+    ) -> Optional[Presentation]:
         """
         Generate a presentation using the Deepseek API.
         
+        The slides are extracted tolerantly from the completion (code fences,
+        surrounding text, truncated output). If the completion was cut off by
+        the token limit, the missing slides are requested in a continuation
+        instead of generating the whole presentation again.
+        
+        In "outline" mode, an outline of the sections is requested first, then
+        the slides of each section are written by concurrent requests and
+        merged in order.
+        
+        The presentation is marked as incomplete if slides are missing from
+        it: a section left out, an array still cut off after the last
+        continuation, or objects that could not be parsed.
+        
         Args:
             prompt: The user prompt
             include_images: Whether to include images in the presentation
+            user_prompt: Not used: every call generates a new presentation
             
         Returns:
             A Presentation object or None if generation failed
         """
         try:
-            print(f"🔍 Starting presentation generation for prompt: '{prompt[:50]}...'")
+            logger.debug("Starting presentation generation for prompt: '%s...'", prompt[:50])
             
             # Utiliser le paramètre include_images passé à la fonction
-            print(f"🔄 Image generation mode: {'enabled' if include_images else 'disabled'}")
+            logger.debug("Image generation mode: %s", 'enabled' if include_images else 'disabled')
+            
+            logger.debug("Preparing API request to Deepseek")
+            outline = await self._request_outline(prompt) if self.mode == "outline" else []
+            if outline:
+                slides_data = []
+                complete = True
+                async for section_slides, section_complete in self._expand_outline(prompt, include_images, outline):
+                    slides_data.extend(section_slides)
+                    complete = complete and section_complete
+            else:
+                slides_data, complete = await self._complete_slides(self._build_payload(prompt, include_images))
+            
+            if not slides_data:
+                raise ValueError("No slide found in the Deepseek response")
+            
+            # Create a Presentation object
+            presentation = Presentation.create_empty()
+            presentation.complete = complete
+            
+            logger.debug("Creating slides objects from API response")
+            for i, slide_data in enumerate(slides_data):
+                presentation.add_slide(self._build_slide(slide_data, i, include_images))
             
-            # Message système pour la génération avec ou sans images
             if include_images:
-                system_message = """
-                You are a professional presentation designer. Create a structured PowerPoint presentation based on the user's prompt.
-                Your output must be a valid JSON array of slides. Each slide must have:
-                1. "title": a concise title for the slide
-                2. "description": detailed content for the slide
-                3. "keywords": an array of 3-5 specific keywords that best describe the visual content needed for this slide
-                4. "image": leave this field blank - it will be filled in later with an image URL
-
-                For the keywords:
-                - Choose specific and descriptive terms that clearly represent what should be shown in the image
-                - Include concrete nouns and adjectives that can be visually represented
-                - Avoid abstract concepts that cannot be directly visualized
-                - Focus on the key visual elements that would enhance the slide content
-                - Be precise rather than general (e.g. "office workers collaborating" instead of just "business")
-
-                Format your response ONLY as a valid JSON array of objects. Do not include any explanations or additional text.
-                Example format:
-                [
-                    {
-                        "title": "Introduction to Renewable Energy",
-                        "description": "Renewable energy sources include solar, wind, hydroelectric, and geothermal power. These sustainable alternatives are essential for reducing carbon emissions.",
-                        "keywords": ["solar panels", "wind turbines", "renewable energy technology", "green power", "sustainable energy"]
-                    },
-                    {
-                        "title": "Benefits of Solar Power",
-                        "description": "Solar energy provides clean, renewable power with minimal environmental impact. Modern photovoltaic cells are increasingly efficient and affordable.",
-                        "keywords": ["solar panel installation", "rooftop solar array", "sunlight energy conversion", "modern solar technology", "photovoltaic cells"]
-                    }
-                ]
-                """
+                logger.info("Presentation generation complete - %s slides created with image support", len(presentation.slides))
             else:
-                system_message = """
-                You are a professional presentation designer. Create a structured PowerPoint presentation based on the user's prompt.
-                Your output must be a valid JSON array of slides. Each slide must have:
-                1. "title": a concise title for the slide
-                2. "description": detailed content for the slide
-
-                Focus solely on creating high-quality textual content. Do not include keywords or image-related information.
-
-                Format your response ONLY as a valid JSON array of objects. Do not include any explanations or additional text.
-                Example format:
-                [
-                    {
-                        "title": "Introduction to Renewable Energy",
-                        "description": "Renewable energy sources include solar, wind, hydroelectric, and geothermal power. These sustainable alternatives are essential for reducing carbon emissions."
-                    },
-                    {
-                        "title": "Benefits of Solar Power",
-                        "description": "Solar energy provides clean, renewable power with minimal environmental impact. Modern photovoltaic cells are increasingly efficient and affordable."
-                    }
-                ]
-                """
-            
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ]
+                logger.info("Presentation generation complete - %s slides created without images", len(presentation.slides))
+            return presentation
             
-            print("🔄 Preparing API request to Deepseek")
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                }
-                payload = {
-                    "model": "deepseek-chat",
-                    "messages": messages,
-                    "temperature": 0.7,
-                    "max_tokens": 2000
-                }
+        except Exception as e:
+            logger.exception("Error generating presentation: %s", e)
+            return None
+    
+    async def stream_slides(
+        self,
+        prompt: str,
+        include_images: bool = True,
+        user_prompt: Optional[str] = None
+    ) -> AsyncIterator[Slide]:
+        """
+        Generate a presentation using a streamed Deepseek completion.
+        
+        The server-sent events are fed to an incremental JSON parser, and each
+        slide is yielded as soon as its object is closed, while the model is
+        still writing the following ones. If the completion is cut off by the
+        token limit, the missing slides are streamed from a continuation. If
+        no slide is recognized while streaming, the whole completion is parsed
+        as in generate_presentation.
+        
+        In "outline" mode, the slides of each section are yielded as soon as
+        that section and the ones before it have been written.
+        
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+            user_prompt: Not used: every call generates a new presentation
+            
+        Yields:
+            The slides, in order
+            
+        Raises:
+            Exception: If the request fails or slides are missing from the
+                presentation: the stream ended before the JSON array was
+                complete, objects could not be parsed or an outline section
+                was left out (slides already yielded remain valid)
+        """
+        logger.debug("Starting streamed presentation generation for prompt: '%s...'", prompt[:50])
+        outline = await self._request_outline(prompt) if self.mode == "outline" else []
+        if outline:
+            slide_count = 0
+            incomplete_sections = 0
+            async for section_slides, section_complete in self._expand_outline(prompt, include_images, outline):
+                for slide_data in section_slides:
+                    yield self._build_slide(slide_data, slide_count, include_images)
+                    slide_count += 1
+                incomplete_sections += not section_complete
+            if not slide_count:
+                raise ValueError("No slide found in the Deepseek responses")
+            if incomplete_sections:
+                raise ValueError(f"{incomplete_sections} sections of the outline are missing slides ({slide_count} slides received)")
+            logger.info("Outlined presentation generation complete - %s slides created", slide_count)
+            return
+        
+        payload = self._build_payload(prompt, include_images)
+        payload["stream"] = True
+        slides_data: List[Dict[str, Any]] = []
+        continuations = 0
+        dropped = 0
+        
+        try:
+            while True:
+                state: Dict[str, Any] = {}
+                async for slide_data in self._stream_objects(payload, state):
+                    if not is_slide_object(slide_data):
+                        logger.warning("Skipping streamed object that is not a slide")
+                        dropped += 1
+                        continue
+                    yield self._build_slide(slide_data, len(slides_data), include_images)
+                    slides_data.append(slide_data)
                 
-                print("🛠️ Sending request to Deepseek API")
-                response = await client.post(
-                    self.api_url,
-                    headers=headers,
-                    json=payload
-                )
+                if not slides_data:
+                    # Aucun slide reconnu pendant le flux : analyser la réponse complète, comme sans streaming
+                    with span("json_parse"):
+                        salvaged, complete = extract_slides(state["content"])
+                    for slide_data in salvaged:
+                        yield self._build_slide(slide_data, len(slides_data), include_images)
+                        slides_data.append(slide_data)
+                    state["finished"] = state["finished"] or complete
+                dropped += state["malformed"]
                 
+                if state["finished"] or not self._should_continue(state["finish_reason"], slides_data, continuations):
+                    break
+                continuations += 1
+                payload = self._build_continuation_payload(payload, slides_data)
+        except Exception as e:
+            logger.warning("Error streaming presentation after %s slides: %s", len(slides_data), e)
+            raise
+        
+        if not state["finished"]:
+            raise ValueError(f"Deepseek stream ended before the end of the slide array ({len(slides_data)} slides received)")
+        if dropped:
+            raise ValueError(f"{dropped} objects of the Deepseek stream are not valid slides ({len(slides_data)} slides received)")
+        logger.info("Streamed presentation generation complete - %s slides created", len(slides_data))
+    
+    async def generate_slide(
+        self,
+        presentation: Presentation,
+        index: int,
+        instruction: Optional[str] = None,
+        include_images: bool = True
+    ) -> Optional[Slide]:
+        """
+        Write a new version of one slide with a single Deepseek completion.
+        
+        The model gets the titles of the other slides for context, and the
+        current content of the slide with the user's instruction.
+        
+        Args:
+            presentation: The presentation, for context
+            index: Position of the slide to write again
+            instruction: What the user wants changed, if anything
+            include_images: Whether to include images in the presentation
+            
+        Returns:
+            The new slide, or None if generation failed
+        """
+        try:
+            slides_data, _ = await self._complete_slides(self._build_slide_payload(presentation, index, instruction, include_images))
+            if not slides_data:
+                raise ValueError("No slide found in the Deepseek response")
+            logger.info("Slide %s regenerated", index + 1)
+            return self._build_slide(slides_data[0], index, include_images)
+        except Exception as e:
+            logger.exception("Error regenerating slide: %s", e)
+            return None
+    
+    async def _complete_slides(self, payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Get the slide objects of a completion, requesting continuations if it is cut off.
+        
+        Args:
+            payload: The request payload
+            
+        Returns:
+            Tuple of (the slide objects, possibly empty, whether the last
+            completion closed the array and every object in it was a slide)
+        """
+        slides_data: List[Dict[str, Any]] = []
+        continuations = 0
+        
+        while True:
+            logger.debug("Sending request to Deepseek API")
+            content, finish_reason = await self._complete(payload)
+            logger.debug("Received response from Deepseek API")
+            
+            # Parse the JSON content to get slides
+            logger.debug("Parsing JSON response from Deepseek")
+            with span("json_parse"):
+                new_slides, complete = extract_slides(content)
+            slides_data.extend(new_slides)
+            logger.debug("Parsed %s slides (complete: %s, finish reason: %s)", len(new_slides), complete, finish_reason)
+            
+            if complete or not self._should_continue(finish_reason, slides_data, continuations):
+                break
+            continuations += 1
+            payload = self._build_continuation_payload(payload, slides_data)
+        
+        if not slides_data:
+            logger.warning("Raw content received: %s...", content[:200])
+        return slides_data, complete
+    
+    async def _request_outline(self, prompt: str) -> List[Dict[str, Any]]:
+        """
+        Get the outline of a presentation: its sections and their slide titles.
+        
+        Args:
+            prompt: The user prompt
+            
+        Returns:
+            The sections, as {"title": str, "slides": [str]} objects, or an
+            empty list if the outline cannot be parsed
+        """
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.OUTLINE_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+        content, _ = await self._complete(payload)
+        with span("json_parse"):
+            sections, _ = extract_json_array(content)
+        
+        outline = []
+        for section in sections:
+            if not isinstance(section, dict) or not isinstance(section.get("slides"), list):
+                continue
+            titles = [title for title in section["slides"] if isinstance(title, str) and title.strip()]
+            if titles:
+                outline.append({"title": str(section.get("title", "")), "slides": titles})
+        
+        if not outline:
+            logger.warning("Could not parse the presentation outline, falling back to a single completion: %s...", content[:200])
+        else:
+            logger.debug("Outline: %s sections, %s slides", len(outline), sum(len(section["slides"]) for section in outline))
+        return outline
+    
+    async def _expand_outline(
+        self,
+        prompt: str,
+        include_images: bool,
+        outline: List[Dict[str, Any]]
+    ) -> AsyncIterator[Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Write the slides of every section of an outline concurrently.
+        
+        At most ``expansion_concurrency`` sections are written at the same
+        time. A section whose request fails is left out.
+        
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+            outline: The sections, as returned by _request_outline
+            
+        Yields:
+            The slide objects of each section and whether the section is
+            complete, in the order of the outline
+        """
+        semaphore = asyncio.Semaphore(self.expansion_concurrency)
+        
+        async def expand(section: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+            async with semaphore:
+                payload = self._build_expansion_payload(prompt, include_images, outline, section)
+                try:
+                    return await self._complete_slides(payload)
+                except Exception as e:
+                    logger.warning("Could not write the section '%s', leaving it out: %s", section["title"], e)
+                    return [], False
+        
+        tasks = [asyncio.ensure_future(expand(section)) for section in outline]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _complete(self, payload: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """
+        Get a whole chat completion.
+        
+        Args:
+            payload: The request payload
+            
+        Returns:
+            Tuple of (content, finish reason)
+        """
+        async def post(timeout: float) -> httpx.Response:
+            response = await self.http_client.post(
+                self.api_url,
+                headers=self._build_headers(),
+                json=payload,
+                timeout=timeout
+            )
+            response.raise_for_status()
+            return response
+        
+        with span("llm_call"):
+            response = await self._call(post, self._completion_latency)
+        
+        # Extract the content from the response
+        choice = response.json()["choices"][0]
+        return choice["message"]["content"], choice.get("finish_reason")
+    
+    async def _stream_objects(self, payload: Dict[str, Any], state: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat completion, yielding each object of its JSON array as soon as it is closed.
+        
+        Args:
+            payload: The request payload (with "stream": true)
+            state: Filled once the stream has ended, with "finished" (whether
+                the array was closed), "finish_reason", "malformed" (the
+                number of objects that could not be parsed) and "content"
+                (the whole streamed text)
+            
+        Yields:
+            The parsed objects, in order
+        """
+        parser = IncrementalSlideParser()
+        state.update(finished=False, finish_reason=None, content="")
+        chunks: List[str] = []
+        # Le parsing est incrémental : son temps est cumulé sur toute la réponse
+        parse_time = 0.0
+        
+        async def open_stream(timeout: float) -> httpx.Response:
+            request = self.http_client.build_request(
+                "POST", self.api_url, headers=self._build_headers(), json=payload, timeout=timeout
+            )
+            response = await self.http_client.send(request, stream=True)
+            try:
                 response.raise_for_status()
-                print("✅ Received response from Deepseek API")
-                response_data = response.json()
-                
-                # Extract the content from the response
-                content = response_data["choices"][0]["message"]["content"]
-                
-                # Parse the JSON content to get slides
-                print("🔄 Parsing JSON response from Deepseek")
+            except httpx.HTTPStatusError:
+                await response.aclose()
+                raise
+            return response
+        
+        try:
+            with span("llm_call"):
+                # Seule l'ouverture du flux est réessayée : une fois des slides reçus, ils sont conservés
+                response = await self._call(open_stream, self._stream_latency, discard=lambda r: r.aclose())
                 try:
-                    slides_data = json.loads(content)
-                    print(f"✅ Successfully parsed JSON with {len(slides_data)} slides")
-                except json.JSONDecodeError as e:
-                    print(f"⚠️ JSON parsing error: {str(e)}")
-                    print(f"⚠️ Raw content received: {content[:200]}...")
+                    logger.debug("Deepseek stream opened")
+                    async for line in response.aiter_lines():
+                        if remaining_time() == 0:
+                            raise DeadlineExceededError("Deadline exceeded while streaming the presentation")
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        
+                        parse_started = time.perf_counter()
+                        chunk = json.loads(data)
+                        choice = (chunk.get("choices") or [{}])[0]
+                        content = (choice.get("delta") or {}).get("content")
+                        if content:
+                            chunks.append(content)
+                        objects = parser.feed(content) if content else []
+                        state["finish_reason"] = choice.get("finish_reason") or state["finish_reason"]
+                        parse_time += time.perf_counter() - parse_started
+                        
+                        for parsed in objects:
+                            yield parsed
+                        if parser.finished:
+                            break
+                except httpx.HTTPError as e:
+                    record_upstream_error("deepseek", e)
                     raise
-                
-                # Create a Presentation object
-                presentation = Presentation.create_empty()
-                
-                print("🛠️ Creating slides objects from API response")
-                for i, slide_data in enumerate(slides_data):
-                    # Log each slide being created with its keywords
-                    title = slide_data["title"]
-                    
-                    # Gérer les keywords en fonction du mode (avec ou sans images)
-                    keywords = slide_data.get("keywords", [])
-                    if include_images:
-                        keywords_str = ", ".join(keywords) if keywords else "No keywords provided"
-                        print(f"🔷 Slide {i+1}: '{title}' with keywords: {keywords_str}")
-                    else:
-                        print(f"🔷 Slide {i+1}: '{title}' (no images mode)")
-                    
-                    slide = Slide(
-                        title=slide_data["title"],
-                        description=slide_data["description"],
-                        image=slide_data.get("image", ""),  # This will likely be empty and filled later
-                        keywords=keywords  # Get keywords for image search
-                    )
-                    presentation.add_slide(slide)
-                
-                if include_images:
-                    print(f"✅ Presentation generation complete - {len(presentation.slides)} slides created with image support")
-                else:
-                    print(f"✅ Presentation generation complete - {len(presentation.slides)} slides created without images")
-                return presentation
-                
-        except Exception as e:
-            print(f"⚠️ Error generating presentation: {str(e)}")
-            import traceback
-            print(f"⚠️ Traceback: {traceback.format_exc()}")
-            return None 
+                finally:
+                    await response.aclose()
+        finally:
+            state["finished"] = parser.finished
+            state["malformed"] = parser.malformed
+            state["content"] = "".join(chunks)
+            observe_stage("json_parse", parse_time)
+    
+    def _should_continue(self, finish_reason: Optional[str], slides_data: List[Dict[str, Any]], continuations: int) -> bool:
+        """Whether to ask for the rest of a completion that was cut off by the token limit."""
+        if finish_reason != "length" or not slides_data:
+            return False
+        if continuations >= self.max_continuations:
+            logger.warning("Deepseek output truncated after %s slides, no continuation left", len(slides_data))
+            return False
+        logger.info(
+            "Deepseek output truncated after %s slides, requesting the rest (continuation %s/%s)",
+            len(slides_data), continuations + 1, self.max_continuations
+        )
+        return True
+    
+    def _build_continuation_payload(self, payload: Dict[str, Any], slides_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the request for the slides missing from a truncated completion.
+        
+        The slides received so far are sent back as the assistant's answer, so
+        the model only writes the remaining ones.
+        
+        Args:
+            payload: The request whose completion was cut off
+            slides_data: Every slide object received so far
+            
+        Returns:
+            The continuation request payload
+        """
+        messages = payload["messages"][:2] + [
+            {"role": "assistant", "content": json.dumps(slides_data, ensure_ascii=False)},
+            {"role": "user", "content": self.CONTINUATION_MESSAGE}
+        ]
+        return dict(payload, messages=messages)
+    
+    async def _call(
+        self,
+        send: Callable[[float], Awaitable[T]],
+        latency: LatencyWindow,
+        discard: Optional[Callable[[T], Awaitable[None]]] = None
+    ) -> T:
+        """
+        Send a request to Deepseek within the deadline of the generation.
+        
+        Transport errors, 429 and 5xx responses are retried with jittered
+        exponential backoff. When hedging is enabled, a duplicate request is
+        sent if the first one takes longer than the configured percentile of
+        the recent latencies.
+        
+        Args:
+            send: Sends the request, with the given timeout in seconds
+            latency: Window of the latencies of this kind of request
+            discard: Releases the result of a hedged request that lost
+            
+        Returns:
+            The result of send
+            
+        Raises:
+            DeadlineExceededError: If the deadline passes before a request could be sent
+            httpx.HTTPError: If the request failed and cannot be retried
+        """
+        async def attempt(timeout: float) -> T:
+            started = time.perf_counter()
+            try:
+                result = await send(timeout)
+            except httpx.HTTPError as e:
+                record_upstream_error("deepseek", e)
+                raise
+            latency.record(time.perf_counter() - started)
+            return result
+        
+        retries = 0
+        while True:
+            timeout = remaining_time(self.timeout)
+            if timeout == 0:
+                raise DeadlineExceededError("Deadline exceeded before the Deepseek request")
+            hedge_after = latency.percentile(self.hedge_percentile, self.hedge_min_samples) if self.hedge_percentile else None
+            if hedge_after is not None and hedge_after >= timeout:
+                hedge_after = None
+            
+            try:
+                return await hedged(lambda: attempt(timeout), hedge_after, "deepseek", discard)
+            except httpx.HTTPError as e:
+                if not self._is_transient(e) or retries >= self.max_retries:
+                    raise
+                retries += 1
+                # Backoff exponentiel avec jitter complet, dans la limite de l'échéance
+                delay = random.uniform(0, min(8.0, 0.5 * 2 ** retries))
+                budget = remaining_time()
+                if budget is not None and delay >= budget:
+                    raise
+                logger.warning("Deepseek request failed (%s), retry %s/%s in %.2fs", e, retries, self.max_retries, delay)
+                await asyncio.sleep(delay)
+    
+    def _is_transient(self, error: httpx.HTTPError) -> bool:
+        """Whether a failed request is worth sending again."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code == 429 or error.response.status_code >= 500
+        return isinstance(error, httpx.TransportError)
+    
+    def _build_headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+    
+    def _build_payload(self, prompt: str, include_images: bool) -> Dict[str, Any]:
+        """
+        Build the chat completion request body.
+        
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+            
+        Returns:
+            The request payload
+        """
+        messages = [
+            {"role": "system", "content": self.get_system_message(include_images)},
+            {"role": "user", "content": prompt}
+        ]
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 2000
+        }
+    
+    def _build_expansion_payload(
+        self,
+        prompt: str,
+        include_images: bool,
+        outline: List[Dict[str, Any]],
+        section: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Build the request that writes the slides of one section of an outline.
+        
+        Args:
+            prompt: The user prompt
+            include_images: Whether to include images in the presentation
+            outline: Every section of the presentation, for context
+            section: The section to write
+            
+        Returns:
+            The request payload
+        """
+        plan = "\n".join(f"- {other['title']}: {', '.join(other['slides'])}" for other in outline)
+        slide_list = "\n".join(f"{i + 1}. {title}" for i, title in enumerate(section["slides"]))
+        payload = self._build_payload(prompt, include_images)
+        payload["messages"][1]["content"] = (
+            f"{prompt}\n\n"
+            f"The presentation is organized in these sections:\n{plan}\n\n"
+            f"Write only the slides of the section \"{section['title']}\", with these titles, in this order:\n{slide_list}"
+        )
+        return payload
+    
+    def _build_slide_payload(
+        self,
+        presentation: Presentation,
+        index: int,
+        instruction: Optional[str],
+        include_images: bool
+    ) -> Dict[str, Any]:
+        """
+        Build the request that writes one slide of an existing presentation again.
+        
+        Args:
+            presentation: The presentation, for context
+            index: Position of the slide to write again
+            instruction: What the user wants changed, if anything
+            include_images: Whether to include images in the presentation
+            
+        Returns:
+            The request payload
+        """
+        slide = presentation.slides[index]
+        slide_list = "\n".join(f"{i + 1}. {other.title}" for i, other in enumerate(presentation.slides))
+        payload = self._build_payload("", include_images)
+        payload["messages"][1]["content"] = (
+            f"The presentation has these slides:\n{slide_list}\n\n"
+            f"Write slide {index + 1} again. Its current content is:\n"
+            f"{json.dumps({'title': slide.title, 'description': slide.description}, ensure_ascii=False)}\n\n"
+            f"{instruction or 'Improve it, keeping the same topic.'}\n"
+            f"Output a JSON array with only this slide."
+        )
+        return payload
+    
+    def _build_slide(self, slide_data: Dict[str, Any], index: int, include_images: bool) -> Slide:
+        """
+        Create a Slide from a parsed slide object.
+        
+        Args:
+            slide_data: The slide object returned by the model
+            index: Position of the slide in the presentation
+            include_images: Whether images are enabled
+            
+        Returns:
+            The Slide
+        """
+        # Log each slide being created with its keywords
+        title = slide_data["title"]
+        
+        # Gérer les keywords en fonction du mode (avec ou sans images)
+        keywords = slide_data.get("keywords", [])
+        if include_images:
+            keywords_str = ", ".join(keywords) if keywords else "No keywords provided"
+            logger.debug("Slide %s: '%s' with keywords: %s", index + 1, title, keywords_str)
+        else:
+            logger.debug("Slide %s: '%s' (no images mode)", index + 1, title)
+        
+        return Slide(
+            title=slide_data["title"],
+            description=slide_data["description"],
+            image=slide_data.get("image", ""),  # This will likely be empty and filled later
+            keywords=keywords  # Get keywords for image search
+        )
@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking function (file or database I/O) in the default thread pool.
+
+    Args:
+        func: The blocking function to call
+        *args: Positional arguments for the function
+        **kwargs: Keyword arguments for the function
+
+    Returns:
+        The function result
+    """
+    loop = asyncio.get_running_loop()
+    # Copier le contexte pour garder l'identifiant de requête dans les logs
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs))
+
+
+class RenderExecutor:
+    """
+    Executor for CPU-bound rendering work.
+
+    Depending on ``kind`` (``RENDER_EXECUTOR``), the work runs in a thread
+    pool, which keeps the event loop responsive, or in a process pool, which
+    also spreads the rendering of several decks across CPU cores. Functions
+    and arguments must be picklable in process mode.
+    """
+
+    def __init__(self, kind: Optional[str] = None, workers: Optional[int] = None):
+        self.kind = (kind or os.getenv("RENDER_EXECUTOR", "thread")).lower()
+        self.workers = workers or int(os.getenv("RENDER_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+        if self.kind == "process":
+            self._executor: Executor = ProcessPoolExecutor(max_workers=self.workers)
+        elif self.kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        else:
+            raise ValueError(f"Invalid RENDER_EXECUTOR '{self.kind}': expected 'thread' or 'process'")
+        logger.info("RenderExecutor initialized (%s, %s workers)", self.kind, self.workers)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run a function in the executor.
+
+        Args:
+            func: The function to call
+            *args: Positional arguments for the function
+
+        Returns:
+            The function result
+        """
+        loop = asyncio.get_running_loop()
+        if self.kind == "thread":
+            return await loop.run_in_executor(self._executor, contextvars.copy_context().run, func, *args)
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def warmup(self, func: Callable[[], Any]) -> None:
+        """
+        Start the workers ahead of the first render.
+
+        Args:
+            func: Function run once per worker, e.g. to import the rendering
+                modules in each worker process
+        """
+        await asyncio.gather(*(self.run(func) for _ in range(self.workers)))
+
+    def shutdown(self) -> None:
+        """Shut the executor down, waiting for the running work."""
+        self._executor.shutdown(wait=True)
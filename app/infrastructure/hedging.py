@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, TypeVar
+
+from .metrics import HEDGED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyWindow:
+    """Durations of the latest successful calls to an upstream."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Nearest-rank percentile of the recorded durations.
+
+        Args:
+            q: The percentile, between 0 and 100
+            min_samples: Number of samples below which there is no estimate
+
+        Returns:
+            The duration in seconds, or None if there are too few samples
+        """
+        if not self._samples or len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+
+async def hedged(
+    call: Callable[[], Awaitable[T]],
+    hedge_after: Optional[float],
+    upstream: str,
+    discard: Optional[Callable[[T], Awaitable[None]]] = None
+) -> T:
+    """
+    Run a call, and a duplicate of it if the first one is slow.
+
+    If the call has not completed after ``hedge_after`` seconds, the same
+    call is started again and the first one to succeed wins; the other one is
+    cancelled. An error of one of them is only raised if the other one fails
+    too, so a hedge also covers a failing first call.
+
+    Args:
+        call: Starts the call; invoked once per request sent
+        hedge_after: Delay before the duplicate request, or None to send only one
+        upstream: Name of the service, for the metrics
+        discard: Releases the result of a request that completed but lost
+            (e.g. closes a streamed response)
+
+    Returns:
+        The result of the first request that succeeded
+
+    Raises:
+        Exception: The error of the first request, if they all failed
+    """
+    if hedge_after is None:
+        return await call()
+
+    tasks: List[asyncio.Future] = [asyncio.ensure_future(call())]
+    winner: Optional[asyncio.Future] = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            logger.debug("No response from %s after %.2fs, sending a hedged request", upstream, hedge_after)
+            tasks.append(asyncio.ensure_future(call()))
+
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in tasks if task in done and task.exception() is None), None)
+
+        if winner is None:
+            raise tasks[0].exception()
+        if len(tasks) > 1:
+            HEDGED_REQUESTS.inc(upstream=upstream, winner="primary" if winner is tasks[0] else "hedge")
+        return winner.result()
+    finally:
+        losers = [task for task in tasks if task is not winner]
+        for task in losers:
+            task.cancel()
+        results = await asyncio.gather(*losers, return_exceptions=True)
+        if discard is not None:
+            # Requêtes terminées en même temps que la gagnante : libérer leur résultat
+            for result in results:
+                if not isinstance(result, BaseException):
+                    await discard(result)
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+from typing import Optional
+
+import httpx
+
+
+def http2_available() -> bool:
+    """Return True if the optional ``h2`` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(
+    timeout: float,
+    base_url: str = "",
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+) -> httpx.AsyncClient:
+    """
+    Create a pooled, keep-alive HTTP client for a single upstream host.
+
+    The client is meant to live as long as the application and to be shared by
+    every request, so that connections (and their TLS sessions) are reused.
+    HTTP/2 is enabled when the ``h2`` package is installed and not disabled
+    through the ``HTTP2_ENABLED`` environment variable.
+
+    Args:
+        timeout: Default timeout in seconds for the requests
+        base_url: Optional base URL of the upstream host
+        max_connections: Maximum number of concurrent connections in the pool
+        max_keepalive_connections: Maximum number of idle connections kept alive
+        keepalive_expiry: Seconds an idle connection is kept before being closed
+
+    Returns:
+        A configured httpx.AsyncClient
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections or int(os.getenv("HTTP_MAX_CONNECTIONS", "50")),
+        max_keepalive_connections=max_keepalive_connections or int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=keepalive_expiry or float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    http2 = http2_available() and os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        limits=limits,
+        http2=http2,
+    )
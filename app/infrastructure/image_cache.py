@@ -0,0 +1,216 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """
+    Two-tier cache of downloaded images, looked up by URL.
+
+    Image bytes are content-addressed: each distinct image is stored once under
+    the SHA-256 of its bytes, and URLs map to that hash. The first tier is an
+    in-process LRU bounded by a byte budget. The second tier lives on disk and
+    is shared by every worker process: files are written atomically (temporary
+    file + rename), reads refresh the file modification time, and a sweep
+    removes expired entries and then the least recently used ones until the
+    directory fits in its size cap.
+    """
+
+    # Nombre d'écritures entre deux nettoyages du cache disque
+    SWEEP_EVERY = 50
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        memory_budget_bytes: Optional[int] = None,
+        disk_budget_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.cache_dir = cache_dir or os.getenv("IMAGE_CACHE_DIR", "static/cache/images")
+        self.memory_budget_bytes = memory_budget_bytes if memory_budget_bytes is not None else int(float(os.getenv("IMAGE_CACHE_MEMORY_MB", "64")) * 1024 * 1024)
+        self.disk_budget_bytes = disk_budget_bytes if disk_budget_bytes is not None else int(float(os.getenv("IMAGE_CACHE_DISK_MB", "512")) * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("IMAGE_CACHE_TTL_HOURS", "168")) * 3600
+
+        self._blob_dir = os.path.join(self.cache_dir, "blobs")
+        self._url_dir = os.path.join(self.cache_dir, "urls")
+        os.makedirs(self._blob_dir, exist_ok=True)
+        os.makedirs(self._url_dir, exist_ok=True)
+
+        # Tier mémoire : hash du contenu -> (données, extension), et URL -> hash du contenu
+        self._lock = threading.Lock()
+        self._blobs: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._urls: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._writes = 0
+
+        logger.info("ImageCache initialized in %s (memory: %s bytes, disk: %s bytes)", self.cache_dir, self.memory_budget_bytes, self.disk_budget_bytes)
+
+    def get(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Look up the image downloaded from a URL.
+
+        Args:
+            url: URL of the image
+
+        Returns:
+            Tuple of (image_data, image_extension) or None on a cache miss
+        """
+        with self._lock:
+            content_hash = self._urls.get(url)
+            if content_hash and content_hash in self._blobs:
+                self._urls.move_to_end(url)
+                self._blobs.move_to_end(content_hash)
+                return self._blobs[content_hash]
+
+        entry = self._read_disk(url)
+        if entry is None:
+            return None
+        content_hash, image_data, image_ext = entry
+        self._remember(url, content_hash, image_data, image_ext)
+        return image_data, image_ext
+
+    def put(self, url: str, image_data: bytes, image_ext: str) -> str:
+        """
+        Store the image downloaded from a URL in both tiers.
+
+        Args:
+            url: URL of the image
+            image_data: Binary image data
+            image_ext: Image file extension
+
+        Returns:
+            The content hash of the image
+        """
+        content_hash = hashlib.sha256(image_data).hexdigest()
+        self._remember(url, content_hash, image_data, image_ext)
+
+        try:
+            blob_path = self._blob_path(content_hash, image_ext)
+            if os.path.exists(blob_path):
+                os.utime(blob_path)
+            else:
+                self._atomic_write(blob_path, image_data)
+            self._atomic_write(self._url_path(url), f"{content_hash}.{image_ext}".encode("ascii"))
+        except OSError as e:
+            logger.warning("Could not write image to disk cache: %s", e)
+
+        with self._lock:
+            self._writes += 1
+            should_sweep = self._writes % self.SWEEP_EVERY == 0
+        if should_sweep:
+            self.sweep()
+        return content_hash
+
+    def sweep(self) -> None:
+        """Remove expired disk entries, then the least recently used ones above the size cap."""
+        now = time.time()
+        blobs = []
+        total = 0
+        for root, _, files in os.walk(self._blob_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.ttl_seconds:
+                    self._remove(path)
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        if total > self.disk_budget_bytes:
+            # Supprimer les plus anciens jusqu'à repasser sous 90% du budget
+            for _, size, path in sorted(blobs):
+                if total <= self.disk_budget_bytes * 0.9:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+
+        # Les entrées d'URL expirées sont supprimées ; celles dont l'image a été évincée donnent un miss
+        for name in os.listdir(self._url_dir):
+            path = os.path.join(self._url_dir, name)
+            try:
+                if now - os.stat(path).st_mtime > self.ttl_seconds:
+                    self._remove(path)
+            except FileNotFoundError:
+                continue
+
+        logger.info("Image cache sweep done (%s bytes on disk, %s images evicted)", total, removed)
+
+    def _remember(self, url: str, content_hash: str, image_data: bytes, image_ext: str) -> None:
+        """Insert an image in the memory tier and evict the least recently used ones."""
+        if len(image_data) > self.memory_budget_bytes:
+            return
+        with self._lock:
+            if content_hash not in self._blobs:
+                self._blobs[content_hash] = (image_data, image_ext)
+                self._memory_bytes += len(image_data)
+            self._blobs.move_to_end(content_hash)
+            self._urls[url] = content_hash
+            self._urls.move_to_end(url)
+
+            while self._memory_bytes > self.memory_budget_bytes and self._blobs:
+                _, (evicted, _) = self._blobs.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+            # Les URL sans image en mémoire sont retrouvées via le disque
+            while len(self._urls) > max(len(self._blobs) * 4, 1024):
+                self._urls.popitem(last=False)
+
+    def _read_disk(self, url: str) -> Optional[Tuple[str, bytes, str]]:
+        """Read an image from the disk tier, refreshing its LRU timestamp."""
+        url_path = self._url_path(url)
+        try:
+            with open(url_path, "rb") as url_file:
+                blob_name = url_file.read().decode("ascii").strip()
+            content_hash, image_ext = blob_name.split(".", 1)
+            blob_path = self._blob_path(content_hash, image_ext)
+            with open(blob_path, "rb") as blob_file:
+                image_data = blob_file.read()
+            os.utime(blob_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Invalid image cache entry for %s: %s", url, e)
+            self._remove(url_path)
+            return None
+
+        # Un autre worker a pu écrire un fichier tronqué avant un crash : vérifier le hash
+        if hashlib.sha256(image_data).hexdigest() != content_hash:
+            self._remove(blob_path)
+            return None
+        return content_hash, image_data, image_ext
+
+    def _blob_path(self, content_hash: str, image_ext: str) -> str:
+        return os.path.join(self._blob_dir, content_hash[:2], f"{content_hash}.{image_ext}")
+
+    def _url_path(self, url: str) -> str:
+        return os.path.join(self._url_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def _atomic_write(self, path: str, data: bytes) -> None:
+        """Write a file so that concurrent readers never see a partial file."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,166 @@
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+class ImageIndex(SQLiteStore):
+    """
+    Persistent inverted index from keyword tokens to the images found by past searches.
+
+    Each image returned by a search is indexed under the tokens of the
+    search keywords and of its description. A new keyword list is answered
+    locally when an image covers it well enough: its score is the share of
+    the query tokens it is indexed under, each token weighted by its inverse
+    document frequency, so that "solar" counts for more than "photo". The
+    least recently used images are evicted once the index holds more than
+    ``max_images`` images.
+    """
+
+    # Nombre d'écritures entre deux évictions
+    EVICT_EVERY = 50
+
+    STOP_WORDS = frozenset({
+        "a", "an", "and", "the", "of", "in", "on", "at", "to", "for", "with", "by", "from", "or",
+        "image", "images", "photo", "photos", "picture", "pictures"
+    })
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS images ("
+        "url TEXT PRIMARY KEY, "
+        "position INTEGER NOT NULL, "
+        "last_used REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS images_last_used ON images (last_used)",
+        "CREATE TABLE IF NOT EXISTS image_tokens ("
+        "token TEXT NOT NULL, "
+        "url TEXT NOT NULL, "
+        "PRIMARY KEY (token, url))",
+        "CREATE INDEX IF NOT EXISTS image_tokens_url ON image_tokens (url)",
+    )
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        threshold: Optional[float] = None,
+        max_images: Optional[int] = None
+    ):
+        # Score minimal pour répondre sans appeler Pexels (0 désactive l'index)
+        self.threshold = threshold if threshold is not None else float(os.getenv("IMAGE_INDEX_THRESHOLD", "0.8"))
+        self.max_images = max_images if max_images is not None else int(os.getenv("IMAGE_INDEX_MAX_IMAGES", "5000"))
+        self._writes = 0
+        super().__init__(db_path or os.getenv("IMAGE_INDEX_PATH", "data/image_index.sqlite3"))
+
+        logger.info("ImageIndex initialized at %s (threshold: %s)", self.db_path, self.threshold)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def find(self, keywords: List[str], limit: int) -> List[Tuple[str, float]]:
+        """
+        Rank the indexed images for a keyword list.
+
+        Args:
+            keywords: List of keywords
+            limit: Maximum number of images
+
+        Returns:
+            (URL, score) of the images scoring at least the threshold, best
+            first; ties keep the order of the search results
+        """
+        tokens = self.tokenize(keywords)
+        if not tokens:
+            return []
+        placeholders = ", ".join("?" * len(tokens))
+        with self._connect() as connection:
+            image_count = connection.execute("SELECT count(*) FROM images").fetchone()[0]
+            document_frequency = dict(connection.execute(
+                f"SELECT token, count(*) FROM image_tokens WHERE token IN ({placeholders}) GROUP BY token",
+                list(tokens)
+            ).fetchall())
+            rows = connection.execute(
+                f"SELECT t.url, t.token, i.position FROM image_tokens t JOIN images i ON i.url = t.url "
+                f"WHERE t.token IN ({placeholders})",
+                list(tokens)
+            ).fetchall()
+
+        # Les mots jamais vus ont le poids maximal : une image ne peut pas les couvrir
+        weights = {token: math.log(1 + image_count / document_frequency.get(token, 1)) for token in tokens}
+        total = sum(weights.values())
+        scores = {}
+        positions = {}
+        for url, token, position in rows:
+            scores[url] = scores.get(url, 0.0) + weights[token] / total
+            positions[url] = position
+        ranked = sorted(
+            ((url, score) for url, score in scores.items() if score >= self.threshold - 1e-9),
+            key=lambda match: (-match[1], positions[match[0]])
+        )[:limit]
+
+        if ranked:
+            try:
+                with self._connect() as connection:
+                    connection.executemany(
+                        "UPDATE images SET last_used = ? WHERE url = ?",
+                        [(time.time(), url) for url, _ in ranked]
+                    )
+            except sqlite3.Error as e:
+                logger.debug("Could not refresh image index entries: %s", e)
+        return ranked
+
+    def add(self, keywords: List[str], images: List[Tuple[str, Optional[str]]]) -> None:
+        """
+        Index the images found for a keyword list.
+
+        Args:
+            keywords: The keywords searched for
+            images: (URL, description) of each image, in the order of the search results
+        """
+        query_tokens = self.tokenize(keywords)
+        now = time.time()
+        try:
+            with self._connect() as connection:
+                for position, (url, description) in enumerate(images):
+                    tokens = query_tokens | self.tokenize([description or ""])
+                    connection.execute(
+                        "INSERT INTO images (url, position, last_used) VALUES (?, ?, ?) "
+                        "ON CONFLICT (url) DO UPDATE SET position = min(position, excluded.position), last_used = excluded.last_used",
+                        (url, position, now)
+                    )
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO image_tokens (token, url) VALUES (?, ?)",
+                        [(token, url) for token in tokens]
+                    )
+                self._writes += 1
+                if self._writes % self.EVICT_EVERY == 0:
+                    connection.execute(
+                        "DELETE FROM images WHERE url IN (SELECT url FROM images ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_images,)
+                    )
+                    connection.execute("DELETE FROM image_tokens WHERE url NOT IN (SELECT url FROM images)")
+        except sqlite3.Error as e:
+            logger.warning("Could not add images to the image index: %s", e)
+
+    @classmethod
+    def tokenize(cls, texts: Iterable[str]) -> Set[str]:
+        """
+        Get the index tokens of keywords or descriptions.
+
+        Words are lowercased, stop words are dropped and a plural "s" is
+        removed, so that "Solar Panels" and "solar panel" give the same tokens.
+        """
+        tokens = set()
+        for word in re.findall(r"\w+", " ".join(texts).lower()):
+            if word in cls.STOP_WORDS or word.isdigit():
+                continue
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            tokens.add(word)
+        return tokens
@@ -0,0 +1,120 @@
+import logging
+import os
+from io import BytesIO
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Largeur de l'image placée sur les slides (voir pptx_renderer)
+IMAGE_PLACEMENT_WIDTH_INCHES = 7
+
+# Formats que python-pptx sait insérer tels quels
+PPTX_SUPPORTED_FORMATS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "BMP": "bmp"}
+
+
+def target_image_width_px() -> int:
+    """Width in pixels at which slide images are stored, from IMAGE_TARGET_DPI."""
+    return int(IMAGE_PLACEMENT_WIDTH_INCHES * int(os.getenv("IMAGE_TARGET_DPI", "150")))
+
+
+def select_image_variant(photo: Dict[str, Any], target_width: int) -> str:
+    """
+    Pick the smallest Pexels ``src`` variant at least ``target_width`` pixels wide.
+
+    Pexels serves "medium" 350px high, "large" fitted in 940x650 and
+    "large2x" at twice that size; "original" is the full photo.
+
+    Args:
+        photo: A photo object from the Pexels search API
+        target_width: The width needed, in pixels
+
+    Returns:
+        The URL of the chosen variant
+    """
+    src = photo["src"]
+    width = photo.get("width") or 0
+    height = photo.get("height") or 0
+    if not width or not height:
+        return src["large2x"]
+
+    ratio = width / height
+    large_width = min(940, 650 * ratio, width)
+    variants = [
+        ("medium", min(350 * ratio, width)),
+        ("large", large_width),
+        ("large2x", min(2 * large_width, width)),
+        ("original", width),
+    ]
+    available = [(name, variant_width) for name, variant_width in variants if src.get(name)]
+    for name, variant_width in available:
+        if variant_width >= target_width:
+            return src[name]
+    return src[available[-1][0]] if available else src["large2x"]
+
+
+def normalize_image(
+    image_data: Union[bytes, BinaryIO],
+    image_ext: str,
+    target_width: Optional[int] = None
+) -> Optional[Tuple[bytes, str]]:
+    """
+    Prepare an image for insertion in a slide.
+
+    Images wider than ``target_width`` are downscaled and recompressed, and
+    formats python-pptx cannot insert (WebP...) are transcoded to JPEG, or to
+    PNG when they have transparency. Small images in a supported format are
+    returned unchanged. Large JPEGs are decoded directly at a reduced scale,
+    so their full-size bitmap is never held in memory.
+
+    This is CPU-bound, blocking work: it is meant to run in an executor.
+
+    Args:
+        image_data: Binary image data, or a file positioned at its start
+        image_ext: Image file extension reported by the server
+        target_width: Maximum width in pixels (IMAGE_TARGET_DPI by default)
+
+    Returns:
+        Tuple of (image_data, image_extension), or None if the data is not a readable image
+    """
+    # Pillow n'est importé qu'à la première image traitée, pour un démarrage rapide
+    from PIL import Image, ImageOps
+
+    target_width = target_width or target_image_width_px()
+    source = BytesIO(image_data) if isinstance(image_data, bytes) else image_data
+    try:
+        image = Image.open(source)
+        image_format = image.format
+        width = image.width
+    except Exception as e:
+        logger.warning("Unreadable image data (%s): %s", image_ext, e)
+        return None
+
+    if image_format in PPTX_SUPPORTED_FORMATS and width <= target_width:
+        if not isinstance(image_data, bytes):
+            image_data.seek(0)
+            image_data = image_data.read()
+        return image_data, PPTX_SUPPORTED_FORMATS[image_format]
+
+    try:
+        if image_format == "JPEG" and width > target_width:
+            # Décodage JPEG à l'échelle 1/2, 1/4 ou 1/8 la plus proche au-dessus de la cible
+            image.draft("RGB", (target_width, max(1, round(image.height * target_width / width))))
+        image = ImageOps.exif_transpose(image)
+        if image.width > target_width:
+            height = max(1, round(image.height * target_width / image.width))
+            image = image.resize((target_width, height), Image.LANCZOS)
+
+        output = BytesIO()
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if has_alpha:
+            image.save(output, format="PNG", optimize=True)
+            normalized_ext = "png"
+        else:
+            image.convert("RGB").save(output, format="JPEG", quality=int(os.getenv("IMAGE_JPEG_QUALITY", "85")), optimize=True, progressive=True)
+            normalized_ext = "jpg"
+    except Exception as e:
+        logger.warning("Could not normalize image (%s): %s", image_format, e)
+        return None
+
+    logger.debug("Normalized image: %s %spx -> %s %spx, %s bytes", image_format, width, normalized_ext, image.width, output.tell())
+    return output.getvalue(), normalized_ext
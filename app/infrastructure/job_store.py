@@ -0,0 +1,39 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from ..domain.entities import Job
+from ..domain.repository import JobStore
+
+
+class InMemoryJobStore(JobStore):
+    """
+    JobStore keeping jobs in the memory of the current process.
+
+    Only the most recent ``max_jobs`` jobs are kept; the oldest finished jobs
+    are forgotten first. Jobs are only visible to the worker that accepted
+    them, so multi-worker deployments should route job polling accordingly or
+    use a shared backend.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None):
+        self.max_jobs = max_jobs or int(os.getenv("JOB_STORE_MAX_JOBS", "1000"))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    async def add(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._evict()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def update(self, job: Job) -> None:
+        self._jobs[job.id] = job
+
+    def _evict(self) -> None:
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.is_finished]:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[job_id]
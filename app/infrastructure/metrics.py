@@ -0,0 +1,259 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Bornes (en secondes) des histogrammes de latence
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric(ABC):
+    """Base class of the metrics: a name, a help text and a set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """The sample lines of the metric, in the text exposition format."""
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', repr(bound)))} {count}")
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', '+Inf'))} {counts[-1]}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {self._sums[key]}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics of the current process, rendered in the Prometheus text format.
+
+    Each uvicorn worker has its own registry; Prometheus aggregates them when
+    every worker is scraped.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        # Les taux de succès des caches sont calculés au moment de l'export
+        for cache in {key[0] for key in CACHE_REQUESTS._values}:
+            hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+            total = hits + CACHE_REQUESTS.value(cache=cache, result="miss")
+            CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=cache)
+
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "pptgen_http_request_duration_seconds", "Duration of the HTTP requests.", ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "pptgen_http_requests_in_flight", "HTTP requests being processed."
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "pptgen_stage_duration_seconds", "Duration of each generation stage.", ("stage",)
+))
+STAGES_IN_FLIGHT = REGISTRY.register(Gauge(
+    "pptgen_stages_in_flight", "Generation stages currently running.", ("stage",)
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "pptgen_stage_errors_total", "Generation stages that raised an error.", ("stage",)
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "pptgen_upstream_errors_total", "Failed calls to upstream services.", ("upstream", "reason")
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "pptgen_cache_requests_total", "Cache lookups by result.", ("cache", "result")
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "pptgen_cache_hit_ratio", "Share of cache lookups that were hits since startup.", ("cache",)
+))
+RATE_LIMIT_REMAINING = REGISTRY.register(Gauge(
+    "pptgen_upstream_rate_limit_remaining", "Remaining request quota reported by an upstream (-1: unknown).", ("upstream",)
+))
+HEDGED_REQUESTS = REGISTRY.register(Counter(
+    "pptgen_hedged_requests_total", "Duplicate requests sent to a slow upstream, by which request won.", ("upstream", "winner")
+))
+STARTUP_DURATION = REGISTRY.register(Gauge(
+    "pptgen_startup_duration_seconds", "Duration of the startup phases (import, startup, warmup steps).", ("phase",)
+))
+STORAGE_BYTES = REGISTRY.register(Gauge(
+    "pptgen_presentation_storage_bytes", "Size of the stored presentations.", ("mode",)
+))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_upstream_error(upstream: str, error: Union[Exception, int, str]) -> None:
+    """
+    Count a failed call to an upstream service.
+
+    Args:
+        upstream: Name of the service (deepseek, pexels, images)
+        error: The exception raised by the call, the HTTP status code of the
+            response, or a reason name
+    """
+    if isinstance(error, (int, str)):
+        reason = str(error)
+    elif isinstance(error, httpx.HTTPStatusError):
+        reason = str(error.response.status_code)
+    elif isinstance(error, httpx.TimeoutException):
+        reason = "timeout"
+    elif isinstance(error, httpx.RequestError):
+        reason = "transport"
+    else:
+        reason = type(error).__name__
+    UPSTREAM_ERRORS.inc(upstream=upstream, reason=reason)
+
+
+def observe_stage(stage: str, duration: float) -> None:
+    """Record the duration of a stage measured elsewhere (e.g. in a render process)."""
+    STAGE_DURATION.observe(duration, stage=stage)
+    logger.debug("Stage %s took %.3fs", stage, duration)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Measure a generation stage.
+
+    The duration goes to the stage histogram and the debug log, the stage is
+    counted as in flight while it runs, and errors are counted.
+
+    Args:
+        stage: Name of the stage (llm_call, json_parse, image_search, ...)
+    """
+    STAGES_IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGES_IN_FLIGHT.dec(stage=stage)
+        observe_stage(stage, time.perf_counter() - started)
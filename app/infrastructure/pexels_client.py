@@ -1,32 +1,87 @@
+import asyncio
+import logging
 import os
+import random
+import time
 import httpx
 import json
 from typing import Optional, List, Dict, Any
 from dotenv import load_dotenv
-import traceback
+
+from ..domain.deadline import remaining_time
+from .executor import run_blocking
+from .http_client import create_http_client
+from .image_index import ImageIndex
+from .image_processing import select_image_variant, target_image_width_px
+from .metrics import RATE_LIMIT_REMAINING, record_cache_lookup, record_upstream_error, span
+from .rate_limiter import AdaptiveTokenBucket
+from .search_cache import SearchCache
+
+logger = logging.getLogger(__name__)
 
 # Recharger les variables d'environnement
-load_dotenv(override=True)
+load_dotenv()
 
 class PexelsClient:
     """Client for the Pexels API to search for relevant images based on keywords."""
     
-    def __init__(self):
+    LOCAL_FALLBACK_PATH = "static/images/fallback.jpg"
+    
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        search_cache: Optional[SearchCache] = None,
+        rate_limiter: Optional[AdaptiveTokenBucket] = None,
+        image_index: Optional[ImageIndex] = None
+    ):
         # Récupérer la clé API depuis les variables d'environnement
         self.api_key = os.getenv("PEXELS_API_KEY")
-        self.api_url = "https://api.pexels.com/v1/search"
+        self.api_url = os.getenv("PEXELS_API_URL", "https://api.pexels.com/v1/search")
         
         # Afficher des informations sur la clé API (sans la révéler entièrement)
         if not self.api_key:
-            print("⚠️ Pexels API key not found in environment variables. Using fallback images.")
+            logger.warning("Pexels API key not found in environment variables. Using fallback images.")
             self.api_key = None
         else:
             key_preview = self.api_key[:4] + "..." + self.api_key[-4:] if len(self.api_key) > 8 else "***"
-            print(f"🚀 PexelsClient initialized with API key: {key_preview}")
+            logger.info("PexelsClient initialized with API key: %s", key_preview)
             # Vérifier que la clé n'est pas une chaîne littérale comme "your_api_key_here"
             if "your_api_key" in self.api_key.lower():
-                print("⚠️ WARNING: Your Pexels API key appears to be a placeholder. Please replace it with a real API key.")
+                logger.warning("Your Pexels API key appears to be a placeholder. Please replace it with a real API key.")
                 self.api_key = None
+        
+        # Client HTTP partagé (pool de connexions keep-alive) ; créé ici si non fourni
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client(timeout=15.0)
+        self.search_cache = search_cache or SearchCache()
+        # Images des recherches précédentes, retrouvées par mots-clés proches sans appeler Pexels
+        self.image_index = image_index or ImageIndex()
+        self.target_width = target_image_width_px()
+        # Nombre de photos demandées par recherche : les suivantes servent de remplaçantes
+        self.candidates = max(1, int(os.getenv("PEXELS_CANDIDATES", "5")))
+        
+        # Rythme des requêtes, adapté aux en-têtes X-Ratelimit-* renvoyés par Pexels
+        self.rate_limiter = rate_limiter or AdaptiveTokenBucket(
+            rate=float(os.getenv("PEXELS_RATE_PER_SECOND", "5")),
+            burst=int(os.getenv("PEXELS_RATE_BURST", "10")),
+            reserve=int(os.getenv("PEXELS_RATE_RESERVE", "20")),
+            min_rate=float(os.getenv("PEXELS_RATE_MIN_PER_SECOND", "0.5"))
+        )
+        self.max_retries = int(os.getenv("PEXELS_MAX_RETRIES", "3"))
+        self.latency_budget = float(os.getenv("PEXELS_LATENCY_BUDGET_SECONDS", "10"))
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        
+        # Vérifier une seule fois la présence de l'image de fallback locale
+        self.local_fallback_available = os.path.exists(self.LOCAL_FALLBACK_PATH)
+        if not self.local_fallback_available:
+            # S'assurer que le répertoire existe
+            os.makedirs(os.path.dirname(self.LOCAL_FALLBACK_PATH), exist_ok=True)
+            logger.debug("Created directory for local fallback images: %s", os.path.dirname(self.LOCAL_FALLBACK_PATH))
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client if it is owned by this instance."""
+        if self._owns_http_client:
+            await self.http_client.aclose()
     
     async def search_image(self, keywords: List[str], fallback_url: str = None) -> str:
         """
@@ -40,95 +95,227 @@ class PexelsClient:
             URL of a relevant image, or the fallback URL if none found
         """
         # Utiliser une image locale comme fallback par défaut
-        local_fallback = "static/images/fallback.jpg"
-        if not os.path.exists(local_fallback):
-            # S'assurer que le répertoire existe
-            os.makedirs("static/images", exist_ok=True)
-            print(f"ℹ️ Created directory for local fallback images: static/images")
-            
+        if not self.local_fallback_available:
             # Utiliser une URL de secours si l'image locale n'existe pas
             if fallback_url:
-                print(f"ℹ️ Using provided fallback URL: {fallback_url}")
+                logger.debug("Using provided fallback URL: %s", fallback_url)
             else:
                 fallback_url = "https://via.placeholder.com/1600x900/e0e0e0/808080?text=No+Image+Available"
-                print(f"ℹ️ Using default placeholder fallback URL")
+                logger.debug("Using default placeholder fallback URL")
         else:
             # Utiliser le chemin relatif pour le HTML
             fallback_url = "/static/images/fallback.jpg"
-            print(f"ℹ️ Using local fallback image: {local_fallback}")
+            logger.debug("Using local fallback image: %s", self.LOCAL_FALLBACK_PATH)
+        
+        image_urls = await self.search_images(keywords)
+        return image_urls[0] if image_urls else fallback_url
+    
+    async def search_images(self, keywords: List[str]) -> List[str]:
+        """
+        Search for candidate images on Pexels based on keywords.
+        
+        A single search returns up to ``candidates`` photos, most relevant
+        first, so that a caller can move on to the next one when a download
+        fails or a photo is already used elsewhere.
         
-        # Si pas de clé API ou pas de mots-clés, retourner l'URL de secours
+        The search cache is looked up first, then the image index, which can
+        answer with the photos found for other, similar keywords; Pexels is
+        only called if neither has an answer.
+        
+        Args:
+            keywords: List of keywords to search for
+            
+        Returns:
+            URLs of relevant images, best first; empty if none was found or
+            the API key is missing
+        """
+        # Si pas de clé API ou pas de mots-clés, aucune image
         if not self.api_key or not keywords:
             if not self.api_key:
-                print(f"⚠️ No valid Pexels API key available")
+                logger.warning("No valid Pexels API key available")
             if not keywords:
-                print(f"⚠️ No keywords provided for image search")
-            return fallback_url
+                logger.warning("No keywords provided for image search")
+            return []
         
         # Nettoyer et préparer les mots-clés
         search_query = " ".join([k.strip() for k in keywords if k.strip()])
-        print(f"🔍 Searching Pexels for images with keywords: '{search_query}'")
+        logger.debug("Searching Pexels for images with keywords: '%s'", search_query)
         
+        # Consulter d'abord le cache de recherche partagé
         try:
-            # Créer un client HTTP
-            print(f"🌐 Making request to Pexels API...")
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Préparer les en-têtes avec la clé API
-                headers = {
-                    "Authorization": self.api_key,
-                    "User-Agent": "PowerPoint Generator App/1.0"
-                }
-                print(f"🔄 Request headers prepared (Authorization: {self.api_key[:4]}...)")
-                
-                # Préparer les paramètres de recherche
-                params = {
-                    "query": search_query,
-                    "per_page": 1,
-                    "size": "large"
-                }
-                print(f"🔄 Request parameters: {params}")
-                
-                # Effectuer la requête
-                try:
+            cached_urls = await run_blocking(self.search_cache.get, keywords)
+        except Exception as e:
+            logger.warning("Search cache lookup failed: %s", e)
+            cached_urls = None
+        record_cache_lookup("pexels_search", cached_urls is not None)
+        if cached_urls is not None:
+            if cached_urls:
+                logger.debug("Search cache hit for keywords: '%s'", search_query)
+            else:
+                logger.debug("Cached 'no photos' result for keywords: '%s'", search_query)
+            return cached_urls
+        
+        indexed_urls = await self._find_indexed(keywords, search_query)
+        if indexed_urls:
+            return indexed_urls
+        
+        # Les recherches identiques en cours sont fusionnées en une seule requête
+        query_key = SearchCache.normalize_query(keywords)
+        search = self._in_flight.get(query_key)
+        if search is None:
+            search = asyncio.ensure_future(self._search(keywords, search_query))
+            self._in_flight[query_key] = search
+            search.add_done_callback(lambda _: self._in_flight.pop(query_key, None))
+        else:
+            logger.debug("Joining in-flight search for keywords: '%s'", search_query)
+        
+        try:
+            image_urls = await asyncio.shield(search)
+        except Exception as e:
+            logger.exception("Error searching Pexels: %s", e)
+            image_urls = None
+        return image_urls or []
+    
+    async def _find_indexed(self, keywords: List[str], search_query: str) -> List[str]:
+        """
+        Look up the images found by previous searches for similar keywords.
+        
+        Returns:
+            URLs of the images scoring above the index threshold, best first
+        """
+        if not self.image_index.enabled:
+            return []
+        try:
+            matches = await run_blocking(self.image_index.find, keywords, self.candidates)
+        except Exception as e:
+            logger.warning("Image index lookup failed: %s", e)
+            matches = []
+        record_cache_lookup("image_index", bool(matches))
+        if matches:
+            logger.debug("Image index hit for keywords: '%s' (best score: %.2f)", search_query, matches[0][1])
+        return [url for url, _ in matches]
+    
+    async def _search(self, keywords: List[str], search_query: str) -> Optional[List[str]]:
+        """
+        Query the Pexels API, pacing the requests and retrying transient failures.
+        
+        Requests wait for the rate limiter, and 429/5xx responses and transport
+        errors are retried with jittered exponential backoff, as long as the
+        whole search fits in the latency budget.
+        
+        Args:
+            keywords: List of keywords to search for
+            search_query: The keywords joined as a query
+        
+        Returns:
+            URLs of relevant images, or None if the search failed
+        """
+        deadline = time.monotonic() + remaining_time(self.latency_budget)
+        # Utiliser le client HTTP partagé
+        client = self.http_client
+        # Préparer les en-têtes avec la clé API
+        headers = {
+            "Authorization": self.api_key,
+            "User-Agent": "PowerPoint Generator App/1.0"
+        }
+        
+        # Préparer les paramètres de recherche
+        params = {
+            "query": search_query,
+            "per_page": self.candidates,
+            "size": "large"
+        }
+        logger.debug("Request parameters: %s", params)
+        
+        attempt = 0
+        while True:
+            if not await self.rate_limiter.acquire(timeout=deadline - time.monotonic()):
+                record_upstream_error("pexels", "rate_limited")
+                logger.warning("No Pexels request slot within the latency budget for keywords: '%s'", search_query)
+                return None
+            
+            retry_after = None
+            try:
+                logger.debug("Making request to Pexels API (attempt %s)...", attempt + 1)
+                with span("image_search"):
                     response = await client.get(
                         self.api_url,
                         params=params,
-                        headers=headers
+                        headers=headers,
+                        timeout=max(0.001, deadline - time.monotonic())
                     )
-                    print(f"🔄 Received response with status code: {response.status_code}")
-                    
-                    # Afficher les en-têtes de la réponse pour débogage
-                    print(f"ℹ️ Response headers: {dict(response.headers)}")
-                    
-                    # Vérifier si la requête a réussi
-                    if response.status_code == 200:
-                        # Extraire les données JSON
-                        try:
-                            data = response.json()
-                            print(f"✅ Successfully parsed JSON response")
-                            
-                            # Vérifier si nous avons des résultats
-                            if data.get("photos") and len(data["photos"]) > 0:
-                                # Obtenir l'URL de l'image
-                                image_url = data["photos"][0]["src"]["large2x"]
-                                print(f"✅ Found image on Pexels: {image_url}")
-                                return image_url
-                            else:
-                                print(f"⚠️ No images found in Pexels response for keywords: '{search_query}'")
-                                return fallback_url
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️ Failed to parse JSON from Pexels response: {str(e)}")
-                            print(f"⚠️ Response content preview: {response.text[:200]}...")
-                            return fallback_url
-                    else:
-                        print(f"⚠️ Pexels API request failed with status code: {response.status_code}")
-                        print(f"⚠️ Response content preview: {response.text[:200]}...")
-                        return fallback_url
-                except httpx.RequestError as e:
-                    print(f"⚠️ HTTP request to Pexels failed: {str(e)}")
-                    return fallback_url
+                remaining = self.rate_limiter.update(response.headers)
+                if remaining is not None:
+                    RATE_LIMIT_REMAINING.set(remaining, upstream="pexels")
+                logger.debug("Received response with status code: %s (rate limit remaining: %s)", response.status_code, remaining)
+                
+                # Vérifier si la requête a réussi
+                if response.status_code == 200:
+                    return await self._parse_response(response, keywords, search_query)
+                
+                record_upstream_error("pexels", response.status_code)
+                logger.warning("Pexels API request failed with status code: %s", response.status_code)
+                logger.warning("Response content preview: %s...", response.text[:200])
+                if response.status_code == 429:
+                    retry_after = self._retry_after(response.headers)
+                    self.rate_limiter.pause(retry_after)
+                elif response.status_code < 500:
+                    return None
+            except httpx.RequestError as e:
+                record_upstream_error("pexels", e)
+                logger.warning("HTTP request to Pexels failed: %s", e)
+            
+            attempt += 1
+            if attempt > self.max_retries:
+                return None
+            # Backoff exponentiel avec jitter complet, sauf si le serveur indique quand réessayer
+            delay = retry_after if retry_after is not None else random.uniform(0, min(8.0, 0.25 * 2 ** attempt))
+            if time.monotonic() + delay > deadline:
+                logger.warning("Pexels latency budget exhausted for keywords: '%s'", search_query)
+                return None
+            await asyncio.sleep(delay)
+    
+    async def _parse_response(self, response: httpx.Response, keywords: List[str], search_query: str) -> Optional[List[str]]:
+        """
+        Pick the images of a successful search response and cache the result.
         
-        except Exception as e:
-            print(f"⚠️ Error searching Pexels: {str(e)}")
-            print(f"⚠️ Traceback: {traceback.format_exc()}")
-            return fallback_url 
\ No newline at end of file
+        Returns:
+            URLs of the images (empty if the response has no photo), or None
+            if the response cannot be parsed
+        """
+        # Extraire les données JSON
+        try:
+            data = response.json()
+            logger.debug("Successfully parsed JSON response")
+        except json.JSONDecodeError as e:
+            logger.warning("Failed to parse JSON from Pexels response: %s", e)
+            logger.warning("Response content preview: %s...", response.text[:200])
+            return None
+        
+        # Vérifier si nous avons des résultats
+        if data.get("photos") and len(data["photos"]) > 0:
+            # La plus petite variante assez large pour l'emplacement sur le slide, pour chaque photo
+            images = {}
+            for photo in data["photos"][:self.candidates]:
+                images.setdefault(select_image_variant(photo, self.target_width), photo.get("alt"))
+            image_urls = list(images)
+            logger.debug("Found %s images on Pexels: %s", len(image_urls), image_urls[0])
+            await run_blocking(self.search_cache.put, keywords, image_urls)
+            if self.image_index.enabled:
+                await run_blocking(self.image_index.add, keywords, list(images.items()))
+            return image_urls
+        
+        logger.warning("No images found in Pexels response for keywords: '%s'", search_query)
+        await run_blocking(self.search_cache.put, keywords, [])
+        return []
+    
+    def _retry_after(self, headers: httpx.Headers) -> float:
+        """Seconds to wait after a 429, from Retry-After or X-Ratelimit-Reset."""
+        try:
+            return max(0.0, float(headers["Retry-After"]))
+        except (KeyError, ValueError):
+            pass
+        try:
+            return max(0.0, float(headers["X-Ratelimit-Reset"]) - time.time())
+        except (KeyError, ValueError):
+            return 1.0
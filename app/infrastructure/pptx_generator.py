@@ -1,33 +1,71 @@
+import asyncio
+import logging
 import os
 import tempfile
-from typing import Optional, Tuple, Dict
+import time
+from typing import AsyncIterator, BinaryIO, Optional, Set, Tuple, Dict, List
 import uuid
 import httpx
 from io import BytesIO
-from pptx import Presentation as PPTXPresentation
-from pptx.util import Inches, Pt
 
-from ..domain.entities import Presentation, Slide
+from ..domain.deadline import remaining_time
+from ..domain.entities import FALLBACK_IMAGE, Presentation, Slide
 from ..domain.repository import PresentationRepository
+from .executor import RenderExecutor, run_blocking
+from .http_client import create_http_client
+from .image_cache import ImageCache
+from .image_processing import normalize_image
+from .metrics import observe_stage, record_cache_lookup, record_upstream_error, span
 from .pexels_client import PexelsClient
+from .presentation_storage import PresentationStorage
+from .template_registry import TemplateRegistry
+
+logger = logging.getLogger(__name__)
 
 
 class PPTXGenerator(PresentationRepository):
     # Image de fallback si Pexels échoue
-    FALLBACK_IMAGE = "/static/images/fallback.jpg"
+    FALLBACK_IMAGE = FALLBACK_IMAGE
     FALLBACK_IMAGE_PATH = "static/images/fallback.jpg"
     
-    def __init__(self, output_dir: str = "static/presentations"):
+    def __init__(
+        self,
+        output_dir: str = "static/presentations",
+        image_concurrency: Optional[int] = None,
+        pexels_client: Optional[PexelsClient] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        image_cache: Optional[ImageCache] = None,
+        render_executor: Optional[RenderExecutor] = None,
+        template_registry: Optional[TemplateRegistry] = None,
+        storage: Optional[PresentationStorage] = None
+    ):
         self.output_dir = output_dir
-        self.pexels_client = PexelsClient()
+        # Nombre maximum de slides dont l'image est recherchée/téléchargée en parallèle
+        self.image_concurrency = max(1, image_concurrency or int(os.getenv("IMAGE_CONCURRENCY", "6")))
+        self.pexels_client = pexels_client or PexelsClient()
+        
+        # Client HTTP partagé pour le téléchargement des images ; créé ici si non fourni
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client(timeout=30.0)
+        self.image_cache = image_cache or ImageCache()
+        # Taille maximale d'une image téléchargée, et taille au-delà de laquelle elle passe sur disque
+        self.image_max_bytes = int(float(os.getenv("IMAGE_MAX_MB", "20")) * 1024 * 1024)
+        self.image_spool_bytes = int(float(os.getenv("IMAGE_SPOOL_KB", "1024")) * 1024)
+        self.render_executor = render_executor or RenderExecutor()
+        self.template_registry = template_registry or TemplateRegistry()
+        # Stockage des fichiers générés (disque avec rétention et quota, ou mémoire)
+        self.storage = storage or PresentationStorage(output_dir)
         
-        # Ensure output directory exists
-        os.makedirs(self.output_dir, exist_ok=True)
-        print(f"🚀 PPTXGenerator initialized with output directory: {self.output_dir}")
+        logger.info("PPTXGenerator initialized with output directory: %s", self.output_dir)
         
         # Vérifier que l'image de fallback existe
         if not os.path.exists(self.FALLBACK_IMAGE_PATH):
-            print(f"⚠️ Fallback image not found at {self.FALLBACK_IMAGE_PATH}. Will use placeholder URLs.")
+            logger.warning("Fallback image not found at %s. Will use placeholder URLs.", self.FALLBACK_IMAGE_PATH)
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client if it is owned by this instance."""
+        if self._owns_http_client:
+            await self.http_client.aclose()
     
     async def save(self, presentation: Presentation, filename: str) -> str:
         """
@@ -40,183 +78,301 @@ class PPTXGenerator(PresentationRepository):
         Returns:
             The path to the saved file
         """
-        print(f"🛠️ Starting to create PowerPoint file: {filename}")
-        print(f"📊 Presentation contains {len(presentation.slides)} slides")
-        
-        # Create a new PowerPoint presentation
-        pptx = PPTXPresentation()
-        
-        # Remove the default slide
-        if len(pptx.slides) > 0:
-            print("🔄 Removing default slide from template")
-            r_id = pptx.slides._sldIdLst[0].rId
-            pptx.part.drop_rel(r_id)
-            pptx.slides._sldIdLst.remove(pptx.slides._sldIdLst[0])
-        
-        # Add slides
-        print("🔄 Creating HTTP client for image downloads")
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for i, slide in enumerate(presentation.slides):
-                print(f"📑 Processing slide {i+1}/{len(presentation.slides)}: '{slide.title}'")
-                await self._add_slide(pptx, slide, client)
-        
-        # Save the presentation
-        file_path = os.path.join(self.output_dir, filename)
-        print(f"💾 Saving PowerPoint file to: {file_path}")
-        pptx.save(file_path)
-        
-        print(f"✅ PowerPoint file saved successfully")
-        # Return the relative path to be used in URLs
-        return os.path.join("presentations", filename)
+        logger.debug("Starting to create PowerPoint file: %s", filename)
+        logger.debug("Presentation contains %s slides", len(presentation.slides))
+        
+        # Resolve every slide's image concurrently, then build the slides in order
+        images = await self._resolve_images(presentation.slides, self.http_client)
+        return await self._write_presentation(presentation.slides, images, filename)
     
-    async def _add_slide(self, pptx: PPTXPresentation, slide: Slide, client: httpx.AsyncClient) -> None:
+    async def load(self, filename: str) -> Optional[Presentation]:
         """
-        Add a slide to the PowerPoint presentation.
+        Get the structured content of a saved presentation, from its manifest.
         
         Args:
-            pptx: The PowerPoint presentation object
-            slide: The slide to add
-            client: HTTPx client for downloading images
+            filename: The filename the presentation was saved as
+            
+        Returns:
+            The presentation with the images resolved when it was saved, or
+            None if it is not available
+        """
+        manifest = await self.storage.load_manifest(filename)
+        if not manifest:
+            return None
+        return Presentation.from_dict(manifest)
+    
+    async def save_stream(self, slides: AsyncIterator[Slide], filename: str) -> Optional[str]:
         """
-        # Add a slide with a title and content layout
-        print(f"🔄 Adding new slide with title: '{slide.title}'")
-        layout = pptx.slide_layouts[1]  # Title and Content layout
-        pptx_slide = pptx.slides.add_slide(layout)
-        
-        # Set the title
-        title = pptx_slide.shapes.title
-        title.text = slide.title
-        print(f"✍️ Added slide title: '{slide.title}'")
-        
-        # Set the content
-        content = pptx_slide.placeholders[1]
-        content.text = slide.description
-        desc_preview = slide.description[:50] + "..." if len(slide.description) > 50 else slide.description
-        print(f"📝 Added slide content: '{desc_preview}'")
-        
-        # Format text (optional)
-        for paragraph in content.text_frame.paragraphs:
-            paragraph.font.size = Pt(18)
-        print("🎨 Applied text formatting")
-        
-        # Vérifier si le mode sans images est activé (pas de keywords)
-        if not slide.keywords:
-            print(f"ℹ️ Skip image processing - images disabled for slide: {slide.title}")
-            return
+        Save a presentation whose slides are still being generated.
         
-        # Get relevant image for the slide based on keywords
-        print(f"🖼️ Processing image for slide: {slide.title}")
+        The image of each slide is searched and downloaded as soon as the slide
+        arrives, while the following slides are still being generated.
         
-        # Search for a relevant image using keywords
-        image_url = await self._get_image_for_slide(slide)
-        print(f"🔗 Using image URL: {image_url}")
+        Args:
+            slides: Async iterator over the slides, in order
+            filename: The filename to save as
+            
+        Returns:
+            The path to the saved file, or None if the iterator yielded no slide
+        """
+        logger.debug("Starting to create PowerPoint file from streamed slides: %s", filename)
+        semaphore = asyncio.Semaphore(self.image_concurrency)
+        used_images: Dict[str, bool] = {}
+        received: List[Slide] = []
+        tasks: List[asyncio.Future] = []
         
         try:
-            # Check if it's a local file path (starting with /static)
-            if image_url.startswith("/static"):
-                local_path = image_url[1:]  # Remove leading slash
-                if os.path.exists(local_path):
-                    print(f"✅ Using local image file: {local_path}")
-                    image_data = open(local_path, 'rb').read()
-                    image_ext = os.path.splitext(local_path)[1][1:]  # Get extension without dot
-                    self._add_image_to_slide(pptx_slide, image_data, image_ext, slide.title)
-                else:
-                    print(f"⚠️ Local image file not found: {local_path}")
-            else:
-                # Download the image from URL
-                print(f"📥 Downloading image from: {image_url}")
-                image_data, image_ext = await self._download_image(image_url, client)
-                
-                if image_data:
-                    print(f"✅ Image downloaded successfully ({len(image_data)} bytes, format: {image_ext})")
-                    self._add_image_to_slide(pptx_slide, image_data, image_ext, slide.title)
-                else:
-                    print(f"⚠️ Failed to download image for slide: {slide.title}")
-                    # Try fallback local image
-                    if os.path.exists(self.FALLBACK_IMAGE_PATH):
-                        print(f"🔄 Using local fallback image: {self.FALLBACK_IMAGE_PATH}")
-                        image_data = open(self.FALLBACK_IMAGE_PATH, 'rb').read()
-                        image_ext = os.path.splitext(self.FALLBACK_IMAGE_PATH)[1][1:]
-                        self._add_image_to_slide(pptx_slide, image_data, image_ext, slide.title)
+            async for slide in slides:
+                received.append(slide)
+                tasks.append(asyncio.ensure_future(self._resolve_with_limit(semaphore, slide, self.http_client, used_images)))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        if not received:
+            logger.warning("No slides received, nothing to save")
+            return None
+        
+        logger.debug("Presentation contains %s slides", len(received))
+        images = await asyncio.gather(*tasks)
+        return await self._write_presentation(received, images, filename)
+    
+    async def _write_presentation(self, slides: List[Slide], images: List[Optional[Tuple[bytes, str]]], filename: str) -> str:
+        """
+        Build the PowerPoint file from the slides and their resolved images, and store it.
+        
+        The rendering runs in the render executor so that the event loop stays
+        responsive while the file is built and written. The slides, with the
+        image each one ended up with, are stored as the manifest of the file.
+        
+        Args:
+            slides: The slides, in order
+            images: The resolved image of each slide, or None
+            filename: The filename to save as
+            
+        Returns:
+            The path to the saved file
+        """
+        # Le moteur de rendu (python-pptx, lxml) n'est importé qu'au premier rendu, pour un démarrage rapide
+        from .pptx_renderer import render_presentation
+        
+        if not self.template_registry.loaded:
+            await run_blocking(self.template_registry.load)
+        file_path = self.storage.render_path(filename)
+        data, timings = await self.render_executor.run(render_presentation, self.template_registry.template, slides, images, file_path)
+        for stage, duration in timings.items():
+            observe_stage(stage, duration)
+        
+        # Return the relative path to be used in URLs
+        file_path = await self.storage.store(filename, data)
+        try:
+            await self.storage.store_manifest(filename, Presentation(slides=slides).to_dict())
         except Exception as e:
-            print(f"⚠️ Error adding image to slide: {str(e)}")
-            import traceback
-            print(f"⚠️ Traceback: {traceback.format_exc()}")
-            # Continue without the image if there's an error
+            logger.warning("Could not store the manifest of %s, its slides cannot be edited: %s", filename, e)
+        return file_path
+    
+    async def _resolve_images(self, slides: List[Slide], client: httpx.AsyncClient) -> List[Optional[Tuple[bytes, str]]]:
+        """
+        Search and download the images of all slides concurrently.
+        
+        At most ``image_concurrency`` slides are resolved at the same time. The
+        results are returned in the same order as the slides.
+        
+        Args:
+            slides: The slides to resolve images for
+            client: HTTPx client for downloading images
+            
+        Returns:
+            A list of (image_data, image_extension) tuples, or None for slides without image
+        """
+        semaphore = asyncio.Semaphore(self.image_concurrency)
+        # Images déjà résolues (présentation modifiée) : les autres slides en choisissent une autre
+        used_images: Dict[str, bool] = {slide.image: True for slide in slides if slide.image}
+        logger.debug("Resolving images for %s slides (concurrency: %s)", len(slides), self.image_concurrency)
+        return await asyncio.gather(*(self._resolve_with_limit(semaphore, slide, client, used_images) for slide in slides))
+    
+    async def _resolve_with_limit(
+        self,
+        semaphore: asyncio.Semaphore,
+        slide: Slide,
+        client: httpx.AsyncClient,
+        used_images: Dict[str, bool]
+    ) -> Optional[Tuple[bytes, str]]:
+        async with semaphore:
+            return await self._resolve_slide_image(slide, client, used_images)
     
-    def _add_image_to_slide(self, pptx_slide, image_data, image_ext, slide_title):
+    async def _resolve_slide_image(self, slide: Slide, client: httpx.AsyncClient, used_images: Dict[str, bool]) -> Optional[Tuple[bytes, str]]:
         """
-        Add an image to a slide with proper centering.
+        Find and fetch the image of a single slide.
+        
+        The candidates found for the slide's keywords are tried in order: if a
+        download fails or the format is not supported, the next one is used
+        without searching again. An image URL already set on the slide is tried
+        first, then its other candidates. Images already used by another slide
+        of the presentation are only tried once every other candidate has
+        failed, and images that failed for another slide are not tried again.
+        
+        Redirects are only followed for the images found by a search: the URLs
+        provided with the slide were checked by the caller (e.g. against the
+        allowed image hosts), and a redirect could lead anywhere else.
+        
+        The slide's image is set to the URL of the image used, or to
+        FALLBACK_IMAGE, so that saving the slide again reuses it.
         
         Args:
-            pptx_slide: The PowerPoint slide object
-            image_data: Binary image data
-            image_ext: Image file extension
-            slide_title: Title of the slide (for logging)
+            slide: The slide to get an image for
+            client: HTTPx client for downloading images
+            used_images: Images taken by the slides of the same presentation, by
+                URL, mapped to False once their download has failed
+            
+        Returns:
+            Tuple of (image_data, image_extension) or None if the slide has no image
         """
+        # Vérifier si le mode sans images est activé (pas de keywords ni d'image fournie)
+        if not slide.keywords and not slide.image and not slide.image_candidates:
+            logger.debug("Skip image processing - images disabled for slide: %s", slide.title)
+            return None
+        
+        # Get relevant image for the slide based on keywords
+        logger.debug("Processing image for slide: %s", slide.title)
+        
         try:
-            # Create a temporary file to save the image
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{image_ext}') as temp_file:
-                temp_file.write(image_data)
-                temp_file_path = temp_file.name
-                print(f"💾 Image saved to temporary file: {temp_file_path}")
+            if slide.image == self.FALLBACK_IMAGE:
+                return await self._get_local_image(self.FALLBACK_IMAGE_PATH)
             
-            try:
-                # Get slide dimensions (standard PowerPoint is 10" x 7.5")
-                slide_width = Inches(10)
-                slide_height = Inches(7.5)
+            # Search for relevant images using keywords
+            own_image = self._own_image(slide)
+            provided = {own_image, *(slide.image_candidates or [])}
+            slide.image_candidates = await self._get_image_candidates(slide)
+            tried: Set[str] = set()
+            while True:
+                image_url = self._next_candidate(slide.image_candidates, tried, used_images, own_image)
+                if image_url is None:
+                    break
+                # Réservé avant tout await, pour que les autres slides choisissent une autre image
+                tried.add(image_url)
+                used_images.setdefault(image_url, True)
+                logger.debug("Using image URL: %s", image_url)
                 
-                # Set image dimensions preserving aspect ratio
-                image_width = Inches(7)  # Larger width for better visibility
+                # Download the image from URL (or reuse the cached copy)
+                image_data, image_ext = await self._fetch_image(image_url, client, follow_redirects=image_url not in provided)
                 
-                # Calculate center position
-                left = (slide_width - image_width) / 2
-                
-                # Position below the content - fixed position for better alignment
-                # This places the image in the lower part of the slide, leaving room for text
-                top = Inches(3.5)
+                if image_data:
+                    logger.debug("Image downloaded successfully (%s bytes, format: %s)", len(image_data), image_ext)
+                    slide.image = image_url
+                    return image_data, image_ext
                 
-                # Add the image to the slide
-                print(f"🛠️ Adding image to slide with centered positioning")
-                pptx_slide.shapes.add_picture(
-                    temp_file_path, 
-                    left, 
-                    top, 
-                    width=image_width
-                )
-                print(f"✅ Successfully added image to slide: {slide_title}")
-            finally:
-                # Clean up the temporary file
-                print(f"🧹 Cleaning up temporary file")
-                os.unlink(temp_file_path)
+                used_images[image_url] = False
+                logger.warning("Failed to download image %s for slide: %s", image_url, slide.title)
+                if remaining_time() == 0:
+                    break
+            
+            # Try fallback local image
+            logger.debug("Using local fallback image: %s", self.FALLBACK_IMAGE_PATH)
+            slide.image = self.FALLBACK_IMAGE
+            return await self._get_local_image(self.FALLBACK_IMAGE_PATH)
         except Exception as e:
-            print(f"⚠️ Error in _add_image_to_slide: {str(e)}")
-            import traceback
-            print(f"⚠️ Traceback: {traceback.format_exc()}")
+            logger.exception("Error resolving image for slide: %s", e)
+            # Continue without the image if there's an error
+        return None
     
-    async def _get_image_for_slide(self, slide: Slide) -> str:
+    async def _get_local_image(self, local_path: str) -> Optional[Tuple[bytes, str]]:
         """
-        Get an image URL for a slide based on its keywords.
+        Get a local image, preferably from the assets preloaded at startup.
         
         Args:
-            slide: The slide to get an image for
+            local_path: Path of the image file
+            
+        Returns:
+            Tuple of (image_data, image_extension) or None if the file does not exist
+        """
+        if not self.template_registry.loaded:
+            await run_blocking(self.template_registry.load)
+        asset = self.template_registry.get_asset(local_path)
+        if asset:
+            logger.debug("Using preloaded local image: %s", local_path)
+            return asset
+        if not await run_blocking(os.path.exists, local_path):
+            logger.warning("Local image file not found: %s", local_path)
+            return None
+        logger.debug("Using local image file: %s", local_path)
+        return await run_blocking(self._read_local_image, local_path)
+    
+    def _read_local_image(self, local_path: str) -> Tuple[bytes, str]:
+        """
+        Read a local image file.
+        
+        Args:
+            local_path: Path of the image file
             
         Returns:
-            URL of an image for the slide
+            Tuple of (image_data, image_extension)
         """
-        # If slide already has an image URL that's not from Picsum, use it
+        with open(local_path, 'rb') as image_file:
+            image_data = image_file.read()
+        image_ext = os.path.splitext(local_path)[1][1:]  # Get extension without dot
+        return image_data, image_ext
+    
+    def _next_candidate(
+        self,
+        candidates: List[str],
+        tried: Set[str],
+        used_images: Dict[str, bool],
+        own_image: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Pick the next image to try for a slide.
+        
+        Args:
+            candidates: Image URLs for the slide, best first
+            tried: URLs already tried for this slide
+            used_images: Images taken by the slides of the same presentation
+            own_image: The image URL already set on the slide, which is not
+                considered as used elsewhere
+            
+        Returns:
+            The slide's own image, else the best candidate not used elsewhere,
+            else the best one already used elsewhere, or None once every
+            candidate has been tried or has failed
+        """
+        remaining = [url for url in candidates if url not in tried and used_images.get(url) is not False]
+        if own_image in remaining:
+            return own_image
+        return next((url for url in remaining if url not in used_images), remaining[0] if remaining else None)
+    
+    def _own_image(self, slide: Slide) -> Optional[str]:
+        """The image URL already set on a slide, if it is one to download."""
         if slide.image and "picsum.photos" not in slide.image and slide.image.startswith("http"):
-            print(f"ℹ️ Slide already has a valid image URL: {slide.image}")
             return slide.image
+        return None
+    
+    async def _get_image_candidates(self, slide: Slide) -> List[str]:
+        """
+        Get candidate image URLs for a slide based on its keywords.
+        
+        Args:
+            slide: The slide to get an image for
+            
+        Returns:
+            URLs of images for the slide, best first (empty to use the fallback image)
+        """
+        # If slide already has an image URL that's not from Picsum, use it (its other candidates stay as failover)
+        own_image = self._own_image(slide)
+        if own_image:
+            logger.debug("Slide already has a valid image URL: %s", own_image)
+            return list(dict.fromkeys([own_image, *(slide.image_candidates or [])]))
+        
+        # Images proposées avec le slide (rendu sans LLM) : essayées sans recherche
+        if slide.image_candidates:
+            logger.debug("Using the %s image URLs provided with the slide", len(slide.image_candidates))
+            return slide.image_candidates
             
         # If we have keywords, search using Pexels
         if slide.keywords:
-            print(f"🔍 Using keywords for image search: {', '.join(slide.keywords)}")
-            # Search for image using keywords
-            return await self.pexels_client.search_image(
-                keywords=slide.keywords,
-                fallback_url=self.FALLBACK_IMAGE
-            )
+            logger.debug("Using keywords for image search: %s", ', '.join(slide.keywords))
+            # Search for images using keywords
+            return await self.pexels_client.search_images(slide.keywords)
         
         # If no keywords but we have title/description, use those
         if not slide.keywords and (slide.title or slide.description):
@@ -236,47 +392,125 @@ class PPTXGenerator(PresentationRepository):
             keywords = [word for word in combined_words if word.lower() not in stop_words][:5]
             
             if keywords:
-                print(f"🔍 Generated keywords from content: {', '.join(keywords)}")
-                return await self.pexels_client.search_image(
-                    keywords=keywords,
-                    fallback_url=self.FALLBACK_IMAGE
-                )
+                logger.debug("Generated keywords from content: %s", ', '.join(keywords))
+                return await self.pexels_client.search_images(keywords)
         
         # If all else fails, return fallback image
-        print(f"ℹ️ No keywords available, using fallback image")
-        return self.FALLBACK_IMAGE
+        logger.debug("No keywords available, using fallback image")
+        return []
     
-    async def _download_image(self, image_url: str, client: httpx.AsyncClient) -> Tuple[Optional[bytes], str]:
+    async def _fetch_image(
+        self,
+        image_url: str,
+        client: httpx.AsyncClient,
+        follow_redirects: bool = True
+    ) -> Tuple[Optional[bytes], str]:
         """
-        Download an image from a URL.
+        Get an image from the image cache, downloading and normalizing it on a cache miss.
         
         Args:
-            image_url: URL of the image to download
+            image_url: URL of the image
             client: HTTPx client
+            follow_redirects: Whether the download may follow redirects
             
         Returns:
             Tuple of (image_data, image_extension) or (None, '') if download failed
         """
-        try:
-            print(f"📥 Attempting to download image from: {image_url}")
-            response = await client.get(image_url, follow_redirects=True, timeout=20.0)
-            print(f"🔄 Got response with status code: {response.status_code}")
+        cached = await run_blocking(self.image_cache.get, image_url)
+        record_cache_lookup("images", cached is not None)
+        if cached:
+            logger.debug("Image cache hit for: %s", image_url)
+            return cached
+        
+        logger.debug("Downloading image from: %s", image_url)
+        with tempfile.SpooledTemporaryFile(max_size=self.image_spool_bytes) as buffer:
+            with span("image_download"):
+                image_ext = await self._download_image(image_url, client, buffer, follow_redirects)
+            if not image_ext:
+                return None, ''
+            
+            # Redimensionner/transcoder avant la mise en cache pour ne le faire qu'une fois
+            buffer.seek(0)
+            # Un pool de processus ne reçoit que des arguments sérialisables : le fichier y est passé en mémoire
+            source = buffer if self.render_executor.kind == "thread" else buffer.read()
+            with span("image_normalize"):
+                normalized = await self.render_executor.run(normalize_image, source, image_ext)
+        if not normalized:
+            return None, ''
+        image_data, image_ext = normalized
+        await run_blocking(self.image_cache.put, image_url, image_data, image_ext)
+        return image_data, image_ext
+    
+    async def _download_image(
+        self,
+        image_url: str,
+        client: httpx.AsyncClient,
+        buffer: BinaryIO,
+        follow_redirects: bool = True
+    ) -> str:
+        """
+        Download an image from a URL into a buffer.
+        
+        The body is streamed in chunks, so that at most ``image_spool_bytes``
+        of it are held in memory (the buffer spills to disk beyond). The
+        download is abandoned as soon as the response is known not to be a
+        usable image: an error status, a content type that is not an image,
+        or a Content-Length (or received size) above ``image_max_bytes``.
+        
+        Args:
+            image_url: URL of the image to download
+            client: HTTPx client
+            buffer: Where the image data is written
+            follow_redirects: Whether to follow redirects; if not, a redirect
+                response is a failed download
             
-            response.raise_for_status()
+        Returns:
+            The image extension, or '' if the download failed
+        """
+        try:
+            logger.debug("Attempting to download image from: %s", image_url)
+            timeout = remaining_time(20.0)
+            if timeout == 0:
+                record_upstream_error("images", "deadline")
+                logger.warning("Skipping image download, the generation deadline has passed: %s", image_url)
+                return ''
+            deadline = time.monotonic() + timeout
+            async with client.stream("GET", image_url, follow_redirects=follow_redirects, timeout=timeout) as response:
+                logger.debug("Got response with status code: %s", response.status_code)
+                response.raise_for_status()
+                
+                # Get the content type to determine the image extension
+                content_type = response.headers.get('content-type', '')
+                if content_type and not content_type.lower().startswith("image/"):
+                    record_upstream_error("images", "content_type")
+                    logger.warning("Not an image (%s), skipping download: %s", content_type, image_url)
+                    return ''
+                content_length = response.headers.get('content-length', '')
+                if content_length.isdigit() and int(content_length) > self.image_max_bytes:
+                    record_upstream_error("images", "too_large")
+                    logger.warning("Image too large (%s bytes), skipping download: %s", content_length, image_url)
+                    return ''
+                
+                size = 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.image_max_bytes:
+                        record_upstream_error("images", "too_large")
+                        logger.warning("Image larger than %s bytes, download abandoned: %s", self.image_max_bytes, image_url)
+                        return ''
+                    if time.monotonic() > deadline:
+                        record_upstream_error("images", "deadline")
+                        logger.warning("Image download too slow, abandoned: %s", image_url)
+                        return ''
+                    buffer.write(chunk)
             
-            # Get the content type to determine the image extension
-            content_type = response.headers.get('content-type', '')
             ext = self._get_extension_from_content_type(content_type)
-            
-            # Log extra information about the response
-            print(f"ℹ️ Response headers: {dict(response.headers)}")
-            print(f"✅ Successfully downloaded image ({len(response.content)} bytes, type: {content_type}, extension: {ext})")
-            return response.content, ext
+            logger.debug("Successfully downloaded image (%s bytes, type: %s, extension: %s)", size, content_type, ext)
+            return ext
         except Exception as e:
-            print(f"⚠️ Error downloading image from {image_url}: {str(e)}")
-            import traceback
-            print(f"⚠️ Traceback: {traceback.format_exc()}")
-            return None, ''
+            record_upstream_error("images", e)
+            logger.warning("Error downloading image from %s: %s", image_url, e)
+            return ''
     
     def _get_extension_from_content_type(self, content_type: str) -> str:
         """
@@ -288,7 +522,7 @@ class PPTXGenerator(PresentationRepository):
         Returns:
             File extension (without the dot)
         """
-        print(f"🔍 Determining file extension from content type: '{content_type}'")
+        logger.debug("Determining file extension from content type: '%s'", content_type)
         if 'jpeg' in content_type or 'jpg' in content_type:
             ext = 'jpg'
         elif 'png' in content_type:
@@ -303,5 +537,5 @@ class PPTXGenerator(PresentationRepository):
             # Default to jpg if we can't determine the type
             ext = 'jpg'
         
-        print(f"✅ Determined file extension: '{ext}'")
+        logger.debug("Determined file extension: '%s'", ext)
         return ext 
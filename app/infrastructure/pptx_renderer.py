@@ -0,0 +1,145 @@
+import logging
+import time
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from pptx import Presentation as PPTXPresentation
+from pptx.util import Inches, Pt
+
+from ..domain.entities import Slide
+from .image_processing import IMAGE_PLACEMENT_WIDTH_INCHES
+from .template_registry import PreparedTemplate
+
+logger = logging.getLogger(__name__)
+
+
+def preload() -> None:
+    """
+    Load the rendering dependencies in the current process.
+    
+    Importing this module imports python-pptx and lxml; Pillow, used to
+    normalize images, is imported here. Used by the warmup to prepare the
+    render workers.
+    """
+    from PIL import Image, ImageOps  # noqa: F401
+
+
+def render_presentation(
+    template: PreparedTemplate,
+    slides: List[Slide],
+    images: List[Optional[Tuple[bytes, str]]],
+    file_path: Optional[str] = None
+) -> Tuple[Optional[bytes], Dict[str, float]]:
+    """
+    Build a PowerPoint file from slides whose images are already resolved.
+    
+    This is CPU-bound, blocking work: it is meant to run in an executor, and
+    only takes plain, picklable data so that it can run in another process,
+    which is why it returns its timings instead of recording them.
+    
+    Args:
+        template: The prepared template to build the document from
+        slides: The slides, in order
+        images: The resolved (image_data, image_extension) of each slide, or None
+        file_path: Where to save the file, or None to return its content
+        
+    Returns:
+        Tuple of (content of the file if file_path is None, duration in seconds
+        of the "render" and "save" stages)
+    """
+    started = time.perf_counter()
+    # Create a new PowerPoint presentation from the prepared template (it has no slides)
+    pptx = template.new_document()
+    
+    for i, (slide, image) in enumerate(zip(slides, images)):
+        logger.debug("Processing slide %s/%s: '%s'", i + 1, len(slides), slide.title)
+        _add_slide(pptx, template, slide, image)
+    
+    rendered = time.perf_counter()
+    
+    # Save the presentation
+    data = None
+    if file_path:
+        logger.debug("Saving PowerPoint file to: %s", file_path)
+        pptx.save(file_path)
+    else:
+        output = BytesIO()
+        pptx.save(output)
+        data = output.getvalue()
+    logger.info("PowerPoint file saved successfully")
+    return data, {"render": rendered - started, "save": time.perf_counter() - rendered}
+
+
+def _add_slide(pptx: PPTXPresentation, template: PreparedTemplate, slide: Slide, image: Optional[Tuple[bytes, str]]) -> None:
+    """
+    Add a slide to the PowerPoint presentation.
+    
+    Args:
+        pptx: The PowerPoint presentation object
+        template: The template the presentation was created from
+        slide: The slide to add
+        image: Resolved (image_data, image_extension) for the slide, or None
+    """
+    # Add a slide with a title and content layout
+    logger.debug("Adding new slide with title: '%s'", slide.title)
+    layout = pptx.slide_layouts[template.layout_index]  # Title and Content layout
+    pptx_slide = pptx.slides.add_slide(layout)
+    
+    # Set the title
+    title = pptx_slide.shapes.title
+    title.text = slide.title
+    logger.debug("Added slide title: '%s'", slide.title)
+    
+    # Set the content
+    content = pptx_slide.placeholders[template.body_placeholder_idx]
+    content.text = slide.description
+    desc_preview = slide.description[:50] + "..." if len(slide.description) > 50 else slide.description
+    logger.debug("Added slide content: '%s'", desc_preview)
+    
+    # Format text (optional)
+    for paragraph in content.text_frame.paragraphs:
+        paragraph.font.size = Pt(18)
+    logger.debug("Applied text formatting")
+    
+    if image:
+        image_data, image_ext = image
+        _add_image_to_slide(pptx_slide, template, image_data, image_ext, slide.title)
+
+
+def _add_image_to_slide(pptx_slide, template, image_data, image_ext, slide_title):
+    """
+    Add an image to a slide with proper centering.
+    
+    Args:
+        pptx_slide: The PowerPoint slide object
+        template: The template the presentation was created from
+        image_data: Binary image data
+        image_ext: Image file extension (python-pptx detects the format from the data)
+        slide_title: Title of the slide (for logging)
+    """
+    try:
+        # Get slide dimensions from the template (standard PowerPoint is 10" x 7.5")
+        slide_width = template.slide_width
+        slide_height = template.slide_height
+        
+        # Set image dimensions preserving aspect ratio
+        image_width = Inches(IMAGE_PLACEMENT_WIDTH_INCHES)  # Larger width for better visibility
+        
+        # Calculate center position
+        left = (slide_width - image_width) / 2
+        
+        # Position below the content - fixed position for better alignment
+        # This places the image in the lower part of the slide, leaving room for text
+        top = int(slide_height * 3.5 / 7.5)  # 3.5" on a standard 7.5" high slide
+        
+        # Add the image to the slide straight from memory
+        logger.debug("Adding image to slide with centered positioning")
+        pptx_slide.shapes.add_picture(
+            BytesIO(image_data), 
+            left, 
+            top, 
+            width=image_width
+        )
+        logger.debug("Successfully added image to slide: %s", slide_title)
+    except Exception as e:
+        logger.exception("Error in _add_image_to_slide: %s", e)
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+from .executor import run_blocking
+from .metrics import STORAGE_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+class PresentationStorage:
+    """
+    Where generated presentations are kept, and for how long.
+
+    In "disk" mode (PRESENTATION_STORAGE), presentations are files in
+    ``output_dir``, served by /static and /download. Files older than the
+    retention TTL are deleted, and when the directory grows over the quota
+    the oldest files are deleted first. This is done by a background task
+    that runs the directory scan in the thread pool.
+
+    In "memory" mode, nothing is written to disk: each presentation is kept
+    in memory until it is downloaded once through /download, or until it
+    expires or is evicted to stay under the quota. This suits small,
+    ephemeral instances.
+
+    Each presentation can have a manifest: its structured content as JSON,
+    kept so that a slide can be edited without generating the whole deck
+    again. On disk it is a .json file in ``manifest_dir``, outside the
+    directory served by /static; it counts towards the quota with its
+    .pptx, is deleted with it, and is deleted by the sweep once its .pptx
+    is gone. In memory it outlives the download, until it expires.
+    """
+
+    # Mode mémoire : nombre maximum de manifestes conservés
+    MAX_MEMORY_MANIFESTS = 1000
+
+    def __init__(
+        self,
+        output_dir: str = "static/presentations",
+        mode: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        quota_bytes: Optional[int] = None,
+        sweep_interval: Optional[float] = None,
+        manifest_dir: Optional[str] = None
+    ):
+        self.output_dir = output_dir
+        self.manifest_dir = manifest_dir or os.getenv("PRESENTATION_MANIFEST_DIR", "data/manifests")
+        self.mode = (mode or os.getenv("PRESENTATION_STORAGE", "disk")).lower()
+        if self.mode not in ("disk", "memory"):
+            raise ValueError(f"Invalid PRESENTATION_STORAGE '{self.mode}': expected 'disk' or 'memory'")
+        # 0 désactive la limite correspondante
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("PRESENTATION_TTL_HOURS", "24")) * 3600
+        self.quota_bytes = quota_bytes if quota_bytes is not None else int(float(os.getenv("PRESENTATION_QUOTA_MB", "1024")) * 1024 * 1024)
+        self.sweep_interval = sweep_interval or float(os.getenv("PRESENTATION_SWEEP_INTERVAL_SECONDS", "300"))
+
+        # Mode mémoire : nom de fichier -> (contenu, date de création), du plus ancien au plus récent
+        self._decks: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._manifests: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._usage = 0
+        self._sweep_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        if self.mode == "disk":
+            os.makedirs(self.output_dir, exist_ok=True)
+            os.makedirs(self.manifest_dir, exist_ok=True)
+        logger.info(
+            "PresentationStorage initialized (%s, ttl: %ss, quota: %s bytes)", self.mode, self.ttl_seconds, self.quota_bytes
+        )
+
+    @property
+    def in_memory(self) -> bool:
+        return self.mode == "memory"
+
+    async def start(self) -> None:
+        """Start the background sweeper."""
+        self._task = asyncio.create_task(self._sweep_periodically())
+
+    async def stop(self) -> None:
+        """Stop the background sweeper."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def render_path(self, filename: str) -> Optional[str]:
+        """
+        Where the renderer should write a presentation.
+
+        Returns:
+            The file path, or None if the presentation must be returned as bytes (memory mode)
+        """
+        return None if self.in_memory else os.path.join(self.output_dir, filename)
+
+    async def store(self, filename: str, data: Optional[bytes] = None) -> str:
+        """
+        Register a rendered presentation.
+
+        Args:
+            filename: Name of the presentation file
+            data: Content of the presentation in memory mode (in disk mode the file is already written)
+
+        Returns:
+            The path of the presentation relative to the static folder
+        """
+        if self.in_memory:
+            self._drop_expired()
+            self._decks[filename] = (data, time.time())
+            self._usage += len(data)
+            while self.quota_bytes and self._usage > self.quota_bytes and len(self._decks) > 1:
+                evicted, (evicted_data, _) = self._decks.popitem(last=False)
+                self._usage -= len(evicted_data)
+                logger.warning("Evicted presentation %s before it was downloaded (memory quota)", evicted)
+            STORAGE_BYTES.set(self._usage, mode=self.mode)
+        else:
+            self._usage += await run_blocking(os.path.getsize, os.path.join(self.output_dir, filename))
+            STORAGE_BYTES.set(self._usage, mode=self.mode)
+            if self.quota_bytes and self._usage > self.quota_bytes and not self._sweep_lock.locked():
+                async with self._sweep_lock:
+                    await run_blocking(self.sweep)
+        return os.path.join("presentations", filename)
+
+    async def store_manifest(self, filename: str, manifest: dict) -> None:
+        """
+        Keep the structured content of a stored presentation.
+
+        Args:
+            filename: Name of the presentation file
+            manifest: The content, serializable as JSON
+        """
+        data = json.dumps(manifest, ensure_ascii=False)
+        if self.in_memory:
+            self._manifests[filename] = (data, time.time())
+            while len(self._manifests) > self.MAX_MEMORY_MANIFESTS:
+                self._manifests.popitem(last=False)
+        else:
+            encoded = data.encode("utf-8")
+            await run_blocking(self._write_file, self._manifest_path(filename), encoded)
+            self._usage += len(encoded)
+            STORAGE_BYTES.set(self._usage, mode=self.mode)
+
+    async def load_manifest(self, filename: str) -> Optional[dict]:
+        """
+        Get the structured content of a stored presentation.
+
+        Args:
+            filename: Name of the presentation file
+
+        Returns:
+            The content, or None if the presentation has no manifest (or it expired)
+        """
+        filename = os.path.basename(filename)
+        if self.in_memory:
+            self._drop_expired()
+            stored = self._manifests.get(filename)
+            return json.loads(stored[0]) if stored else None
+        try:
+            return json.loads(await run_blocking(self._read_file, self._manifest_path(filename)))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Invalid manifest for presentation %s: %s", filename, e)
+            return None
+
+    def url_for(self, file_path: str) -> str:
+        """
+        Get the URL a client downloads a stored presentation from.
+
+        Args:
+            file_path: Path returned by store
+        """
+        if self.in_memory:
+            return f"/download/{os.path.basename(file_path)}"
+        return f"/static/{file_path}"
+
+    async def exists(self, file_path: str) -> bool:
+        """Whether a stored presentation is still available."""
+        filename = os.path.basename(file_path)
+        if self.in_memory:
+            self._drop_expired()
+            return filename in self._decks
+        return await run_blocking(os.path.isfile, os.path.join(self.output_dir, filename))
+
+    async def read(self, file_path: str) -> Optional[bytes]:
+        """
+        Get the content of a stored presentation. In memory mode this is its one download.
+
+        Args:
+            file_path: Path returned by store
+
+        Returns:
+            The content of the presentation, or None if it is not available
+        """
+        stored = await self.open_download(os.path.basename(file_path))
+        if isinstance(stored, str):
+            return await run_blocking(self._read_file, stored)
+        return stored
+
+    async def open_download(self, filename: str) -> Optional[Union[str, bytes]]:
+        """
+        Get a presentation for download.
+
+        Args:
+            filename: Name of the presentation file
+
+        Returns:
+            The file path in disk mode, the content in memory mode (where it is
+            then removed), or None if it is not available
+        """
+        filename = os.path.basename(filename)
+        if self.in_memory:
+            self._drop_expired()
+            stored = self._decks.pop(filename, None)
+            if not stored:
+                return None
+            self._usage -= len(stored[0])
+            STORAGE_BYTES.set(self._usage, mode=self.mode)
+            return stored[0]
+        file_path = os.path.join(self.output_dir, filename)
+        return file_path if await run_blocking(os.path.isfile, file_path) else None
+
+    def sweep(self) -> None:
+        """
+        Delete expired files, then the oldest ones until the directory is under 90% of the quota.
+
+        Each presentation counts with its manifest, and manifests whose
+        presentation is gone are deleted. This scans the output and manifest
+        directories: it is meant to run in an executor.
+        """
+        now = time.time()
+        manifest_sizes = {}
+        for entry in os.scandir(self.manifest_dir):
+            if entry.name.endswith(".json") and entry.is_file():
+                manifest_sizes[os.path.splitext(entry.name)[0]] = entry.stat().st_size
+        files = []
+        removed = 0
+        for entry in os.scandir(self.output_dir):
+            if not entry.name.endswith(".pptx") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            manifest_size = manifest_sizes.pop(os.path.splitext(entry.name)[0], 0)
+            if self.ttl_seconds and now - stat.st_mtime > self.ttl_seconds:
+                if self._remove_presentation(entry.path):
+                    removed += 1
+            else:
+                files.append((stat.st_mtime, stat.st_size + manifest_size, entry.path))
+
+        # Manifestes orphelins (présentation supprimée ou jamais enregistrée)
+        for stem in manifest_sizes:
+            if self._remove(os.path.join(self.manifest_dir, stem + ".json")):
+                removed += 1
+
+        total = sum(size for _, size, _ in files)
+        if self.quota_bytes and total > self.quota_bytes:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.quota_bytes * 0.9:
+                    break
+                if self._remove_presentation(path):
+                    removed += 1
+                    total -= size
+
+        self._usage = total
+        STORAGE_BYTES.set(total, mode=self.mode)
+        if removed:
+            logger.info("Presentation storage sweep done (%s bytes on disk, %s files removed)", total, removed)
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            try:
+                if self.in_memory:
+                    self._drop_expired()
+                else:
+                    async with self._sweep_lock:
+                        await run_blocking(self.sweep)
+            except Exception as e:
+                logger.warning("Presentation storage sweep failed: %s", e)
+            await asyncio.sleep(self.sweep_interval)
+
+    def _drop_expired(self) -> None:
+        if not self.ttl_seconds:
+            return
+        deadline = time.time() - self.ttl_seconds
+        while self._manifests and next(iter(self._manifests.values()))[1] <= deadline:
+            self._manifests.popitem(last=False)
+        while self._decks:
+            filename, (data, created_at) = next(iter(self._decks.items()))
+            if created_at > deadline:
+                break
+            del self._decks[filename]
+            self._usage -= len(data)
+        STORAGE_BYTES.set(self._usage, mode=self.mode)
+
+    def _manifest_path(self, filename: str) -> str:
+        return os.path.join(self.manifest_dir, os.path.splitext(filename)[0] + ".json")
+
+    def _remove_presentation(self, path: str) -> bool:
+        """Delete a presentation file and its manifest."""
+        self._remove(self._manifest_path(os.path.basename(path)))
+        return self._remove(path)
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _read_file(self, path: str) -> bytes:
+        with open(path, "rb") as deck_file:
+            return deck_file.read()
+
+    def _write_file(self, path: str, data: bytes) -> None:
+        with open(path, "wb") as deck_file:
+            deck_file.write(data)
@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import time
+from typing import List, Optional, Set, Tuple
+
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Nombre premier de Mersenne 2^61 - 1, modulo des permutations du MinHash
+_PRIME = (1 << 61) - 1
+
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    """Parameters (a, b) of the hash permutations a * h + b mod _PRIME, the same in every process."""
+    rng = random.Random(20240611)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(count)]
+
+
+class PromptIndex(SQLiteStore):
+    """
+    Persistent similarity index of the prompts of cached presentations.
+
+    Prompts are reduced to their content words: lowercased, without
+    punctuation, filler words ("a", "about", "create", "presentation"...) or
+    plural "s", so that the same request worded slightly differently is
+    recognized. They are compared by the Jaccard similarity of their sets of
+    content words: at the default threshold of 0.9, a long prompt may gain a
+    word, but two prompts that differ by their topic ("the history of
+    France" and "the history of Spain") do not match. Prompts with
+    different numbers (e.g. slide counts) never match.
+
+    Candidates are found with MinHash signatures split into LSH bands: two
+    prompts share a bucket if one band of their signatures is identical,
+    which is likely above a similarity of about 0.5 and unlikely below. The
+    candidates are then compared exactly.
+
+    Each prompt belongs to a scope (the image mode, model, system message...):
+    only prompts of the same scope are compared. Once the index holds more
+    than ``max_entries`` prompts, the oldest ones are removed.
+    """
+
+    BANDS = 16
+    ROWS = 4
+    # Nombre d'écritures entre deux évictions
+    EVICT_EVERY = 50
+
+    # Mots qui ne changent pas le sujet demandé (anglais et français)
+    FILLER_WORDS = frozenset({
+        "a", "an", "and", "the", "of", "in", "on", "at", "to", "for", "with", "by", "about", "or",
+        "please", "me", "my", "i", "we", "us", "our", "you", "can", "could", "would", "some",
+        "create", "make", "generate", "write", "build", "prepare", "give",
+        "presentation", "presentations", "deck", "decks", "slide", "slides", "powerpoint", "ppt",
+        "un", "une", "le", "la", "les", "l", "de", "des", "du", "d", "sur", "pour", "en", "et", "ou", "avec",
+        "moi", "nous", "vous", "je", "stp", "svp", "crée", "créer", "créez", "fais", "faire", "génère", "générer",
+        "présentation", "présentations", "diapositive", "diapositives"
+    })
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS prompts ("
+        "id INTEGER PRIMARY KEY, "
+        "cache_key TEXT NOT NULL UNIQUE, "
+        "text TEXT NOT NULL, "
+        "created_at REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS prompt_buckets ("
+        "bucket INTEGER NOT NULL, "
+        "prompt_id INTEGER NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS prompt_buckets_bucket ON prompt_buckets (bucket)",
+        "CREATE INDEX IF NOT EXISTS prompt_buckets_prompt ON prompt_buckets (prompt_id)",
+    )
+
+    # Fixes, pour que les signatures restent comparables d'un démarrage à l'autre
+    PERMUTATIONS = _permutations(BANDS * ROWS)
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        # Similarité minimale pour réutiliser une présentation (0 désactive l'index)
+        self.threshold = threshold if threshold is not None else float(os.getenv("PROMPT_SIMILARITY_THRESHOLD", "0.9"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("PROMPT_INDEX_MAX_ENTRIES", "10000"))
+        self._writes = 0
+        super().__init__(db_path or os.getenv("PROMPT_INDEX_PATH", "data/prompt_index.sqlite3"))
+
+        logger.info("PromptIndex initialized at %s (threshold: %s)", self.db_path, self.threshold)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def find(self, prompt: str, scope: str) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar indexed prompt.
+
+        Args:
+            prompt: The prompt as written by the user
+            scope: The scope of the prompt
+
+        Returns:
+            The cache key of the most similar prompt and its similarity, or
+            None if no prompt of the scope is similar enough
+        """
+        text = self.normalize(prompt)
+        if not text:
+            return None
+        shingles = self._shingles(text)
+        buckets = self._buckets(shingles, scope)
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT DISTINCT p.cache_key, p.text FROM prompt_buckets b JOIN prompts p ON p.id = b.prompt_id "
+                f"WHERE b.bucket IN ({', '.join('?' * len(buckets))})",
+                buckets
+            ).fetchall()
+
+        numbers = re.findall(r"\d+", text)
+        best: Optional[Tuple[str, float]] = None
+        for cache_key, other_text in rows:
+            if re.findall(r"\d+", other_text) != numbers:
+                continue
+            other_shingles = self._shingles(other_text)
+            similarity = len(shingles & other_shingles) / len(shingles | other_shingles)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (cache_key, similarity)
+        return best
+
+    def add(self, prompt: str, scope: str, cache_key: str) -> None:
+        """
+        Index the prompt of a cached presentation.
+
+        Args:
+            prompt: The prompt as written by the user
+            scope: The scope of the prompt
+            cache_key: The key of the presentation in the deck cache
+        """
+        text = self.normalize(prompt)
+        if not text:
+            return
+        buckets = self._buckets(self._shingles(text), scope)
+        try:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM prompt_buckets WHERE prompt_id IN (SELECT id FROM prompts WHERE cache_key = ?)", (cache_key,))
+                cursor = connection.execute(
+                    "INSERT OR REPLACE INTO prompts (cache_key, text, created_at) VALUES (?, ?, ?)",
+                    (cache_key, text, time.time())
+                )
+                connection.executemany(
+                    "INSERT INTO prompt_buckets (bucket, prompt_id) VALUES (?, ?)",
+                    [(bucket, cursor.lastrowid) for bucket in buckets]
+                )
+                self._writes += 1
+                if self._writes % self.EVICT_EVERY == 0:
+                    connection.execute(
+                        "DELETE FROM prompts WHERE id IN (SELECT id FROM prompts ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,)
+                    )
+                    connection.execute("DELETE FROM prompt_buckets WHERE prompt_id NOT IN (SELECT id FROM prompts)")
+        except sqlite3.Error as e:
+            logger.warning("Could not add prompt to the similarity index: %s", e)
+
+    @classmethod
+    def normalize(cls, prompt: str) -> str:
+        """Reduce a prompt to its content words, in order, separated by single spaces."""
+        words = []
+        for word in re.findall(r"\w+", prompt.lower()):
+            if word in cls.FILLER_WORDS:
+                continue
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            words.append(word)
+        return " ".join(words)
+
+    def _shingles(self, text: str) -> Set[str]:
+        """The content words of a normalized prompt, compared as a set."""
+        return set(text.split())
+
+    def _buckets(self, shingles: Set[str], scope: str) -> List[int]:
+        """MinHash signature of the shingles, hashed band by band into the LSH buckets of the scope."""
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") for shingle in shingles]
+        signature = [min((a * h + b) % _PRIME for h in hashes) for a, b in self.PERMUTATIONS]
+        buckets = []
+        for band in range(self.BANDS):
+            rows = signature[band * self.ROWS:(band + 1) * self.ROWS]
+            digest = hashlib.blake2b(f"{scope}:{band}:{rows}".encode("utf-8"), digest_size=8).digest()
+            # Entier signé sur 64 bits, comme les INTEGER de SQLite
+            buckets.append(int.from_bytes(digest, "big", signed=True))
+        return buckets
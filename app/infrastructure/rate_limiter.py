@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveTokenBucket:
+    """
+    Client-side token bucket fed by the rate limit headers of the upstream.
+
+    Requests are let through at up to ``rate`` per second, with bursts of up
+    to ``burst``, while the remaining quota reported by the upstream is
+    comfortable. When it drops to ``reserve`` requests, the remaining quota
+    is spread evenly until the reset time, but never slower than
+    ``min_rate`` per second: the reset may be a month away, and the reserve
+    is better spent on the next slides than kept until then. When the quota
+    is exhausted (or after a 429), requests wait for the reset. Waiters are
+    served in arrival order.
+
+    The bucket belongs to one event loop, like the HTTP clients.
+    """
+
+    def __init__(self, rate: float, burst: int, reserve: int = 0, min_rate: float = 0.5):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.reserve = reserve
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, timeout: float) -> bool:
+        """
+        Wait for a request slot.
+
+        Args:
+            timeout: Maximum time to wait, in seconds
+
+        Returns:
+            True if a slot was taken, False if none would be available in time
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            await asyncio.wait_for(self._lock.acquire(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return False
+        try:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(0.0, self._paused_until - now)
+                if not wait:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+                if now + wait > deadline:
+                    return False
+                await asyncio.sleep(wait)
+        finally:
+            self._lock.release()
+
+    def update(self, headers: Mapping[str, str]) -> Optional[int]:
+        """
+        Adapt the pacing to the X-Ratelimit-Remaining and X-Ratelimit-Reset response headers.
+
+        Args:
+            headers: Headers of an upstream response
+
+        Returns:
+            The remaining quota, or None if the headers are missing
+        """
+        try:
+            remaining = int(headers["X-Ratelimit-Remaining"])
+            reset_at = float(headers["X-Ratelimit-Reset"])
+        except (KeyError, ValueError):
+            return None
+
+        window = max(1.0, reset_at - time.time())
+        now = time.monotonic()
+        self._refill(now)
+        if remaining <= 0:
+            self.pause(window)
+        elif remaining <= self.reserve:
+            # Quota presque épuisé : étaler les requêtes restantes jusqu'à la réinitialisation
+            self.rate = min(self.max_rate, max(self.min_rate, remaining / window))
+            self._tokens = min(self._tokens, 1.0)
+        else:
+            self.rate = self.max_rate
+        self._tokens = min(self._tokens, float(remaining))
+        return remaining
+
+    def pause(self, seconds: float) -> None:
+        """
+        Let no request through for a while (e.g. after a 429).
+
+        Args:
+            seconds: How long to wait, in seconds
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        logger.warning("Rate limited: pausing requests for %.1fs", seconds)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+class SearchCache(SQLiteStore):
+    """
+    Persistent cache of Pexels search results, shared by every worker process.
+
+    Results are stored in SQLite (WAL mode, so concurrent readers never block
+    on a writer) and keyed by a normalized keyword query. Positive results
+    expire after ``ttl_seconds``; "no photos" results are cached too, for the
+    shorter ``negative_ttl_seconds``.
+    """
+
+    # Nombre d'écritures entre deux purges des entrées expirées
+    PURGE_EVERY = 100
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS search_results ("
+        "query TEXT PRIMARY KEY, "
+        "image_urls TEXT NOT NULL, "
+        "expires_at REAL NOT NULL)",
+    )
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        negative_ttl_seconds: Optional[float] = None
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("SEARCH_CACHE_TTL_HOURS", "168")) * 3600
+        self.negative_ttl_seconds = negative_ttl_seconds if negative_ttl_seconds is not None else float(os.getenv("SEARCH_CACHE_NEGATIVE_TTL_MINUTES", "15")) * 60
+        self._writes = 0
+        super().__init__(db_path or os.getenv("SEARCH_CACHE_PATH", "data/pexels_search_cache.sqlite3"))
+
+        logger.info("SearchCache initialized at %s", self.db_path)
+
+    @staticmethod
+    def normalize_query(keywords: List[str]) -> str:
+        """
+        Build the cache key of a keyword list.
+
+        Keywords are lowercased, trimmed, deduplicated and sorted so that the
+        key does not depend on their case or order.
+
+        Args:
+            keywords: List of keywords
+
+        Returns:
+            The normalized query
+        """
+        normalized = {" ".join(k.lower().split()) for k in keywords}
+        return "|".join(sorted(k for k in normalized if k))
+
+    def get(self, keywords: List[str]) -> Optional[List[str]]:
+        """
+        Look up the cached result of a search.
+
+        Args:
+            keywords: List of keywords
+
+        Returns:
+            The cached image URLs (an empty list for a cached "no photos"
+            result), or None on a cache miss
+        """
+        row = self._connect().execute(
+            "SELECT image_urls FROM search_results WHERE query = ? AND expires_at > ?",
+            (self.normalize_query(keywords), time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, keywords: List[str], image_urls: List[str]) -> None:
+        """
+        Store the result of a search.
+
+        Args:
+            keywords: List of keywords
+            image_urls: Image URLs found, or an empty list if there were none
+        """
+        ttl = self.ttl_seconds if image_urls else self.negative_ttl_seconds
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO search_results (query, image_urls, expires_at) VALUES (?, ?, ?)",
+                    (self.normalize_query(keywords), json.dumps(image_urls), time.time() + ttl)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    connection.execute("DELETE FROM search_results WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning("Could not write search result to cache: %s", e)
@@ -0,0 +1,160 @@
+import json
+import logging
+import re
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Début du tableau de slides : un crochet suivi d'une accolade, après d'éventuels texte ou balises markdown
+_ARRAY_START = re.compile(r"\[\s*\{")
+_CODE_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+
+
+class IncrementalSlideParser:
+    """
+    Incremental parser for a JSON array of slide objects.
+
+    Text is fed in arbitrary chunks (as it arrives from a streamed completion)
+    and every top-level object of the array is returned as soon as its closing
+    brace has been received. Anything before the first bracket followed by an
+    opening brace, such as prose, a markdown code fence or the key of a
+    wrapping object, is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._in_array = False
+        self._depth = 0
+        self._object_start = -1
+        self._in_string = False
+        self._escaped = False
+        self.finished = False
+        # Objets fermés mais invalides, ignorés
+        self.malformed = 0
+
+    def feed(self, text: str) -> List[dict]:
+        """
+        Add text to the parser.
+
+        Args:
+            text: The next chunk of the completion
+
+        Returns:
+            The slide objects completed by this chunk, in order
+        """
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+        position = self._position
+
+        while position < len(buffer) and not self.finished:
+            char = buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif not self._in_array:
+                # Ignorer la prose et les crochets qui n'ouvrent pas un tableau d'objets
+                match = _ARRAY_START.search(buffer, position)
+                if match is None:
+                    break
+                self._in_array = True
+                position = match.end() - 1
+                continue
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = position
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        completed.append(json.loads(buffer[self._object_start:position + 1]))
+                    except json.JSONDecodeError as e:
+                        logger.warning("Skipping malformed slide object: %s", e)
+                        self.malformed += 1
+                    self._object_start = -1
+            elif char == "]" and self._depth == 0:
+                self.finished = True
+            position += 1
+
+        # Ne garder en mémoire que l'objet en cours de réception
+        if not self._in_array:
+            # Un crochet final peut encore être suivi d'une accolade dans le prochain morceau
+            bracket = buffer.rfind("[", position)
+            self._buffer = buffer[bracket:] if bracket >= 0 and not buffer[bracket + 1:].strip() else ""
+            self._position = 0
+        elif self._object_start >= 0:
+            self._buffer = buffer[self._object_start:]
+            self._object_start = 0
+            self._position = position - (len(buffer) - len(self._buffer))
+        else:
+            self._buffer = ""
+            self._position = 0
+        return completed
+
+
+def is_slide_object(data: Any) -> bool:
+    """Whether a parsed value has the fields of a slide."""
+    return isinstance(data, dict) and isinstance(data.get("title"), str) and isinstance(data.get("description"), str)
+
+
+def extract_json_array(text: str) -> Tuple[List[Any], bool]:
+    """
+    Extract the items of the JSON array of objects in a completion, as far as possible.
+
+    The completion should be a JSON array, but it may be wrapped in a
+    markdown code fence, surrounded by prose, or cut off before its end
+    (max_tokens). Every complete object is kept.
+
+    Args:
+        text: The content of the completion
+
+    Returns:
+        Tuple of (items, whether the array was complete and every object in
+        it could be parsed)
+    """
+    try:
+        data = json.loads(_CODE_FENCE.sub("", text))
+    except json.JSONDecodeError:
+        data = None
+    if isinstance(data, dict) and len(data) == 1:
+        # Tableau enveloppé dans un objet, par exemple {"slides": [...]}
+        data = next(iter(data.values()))
+    if isinstance(data, list):
+        return data, True
+
+    match = _ARRAY_START.search(text)
+    if match is None:
+        return [], False
+    parser = IncrementalSlideParser()
+    objects = parser.feed(text[match.start():])
+    logger.warning("Completion is not a plain JSON array, salvaged %s objects (complete: %s)", len(objects), parser.finished)
+    return objects, parser.finished and not parser.malformed
+
+
+def extract_slides(text: str) -> Tuple[List[dict], bool]:
+    """
+    Extract the slide objects from a completion, as far as possible.
+
+    See extract_json_array; objects without a title and a description are
+    dropped.
+
+    Args:
+        text: The content of the completion
+
+    Returns:
+        Tuple of (slide objects, whether the array was complete and every
+        object in it was a slide)
+    """
+    objects, complete = extract_json_array(text)
+    slides = [data for data in objects if is_slide_object(data)]
+    if len(slides) < len(objects):
+        logger.warning("Dropped %s objects that are not slides", len(objects) - len(slides))
+    return slides, complete and len(slides) == len(objects)
@@ -0,0 +1,45 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Base class for the small SQLite databases shared by every worker process.
+
+    Each thread gets its own connection (the stores are called from the thread
+    pool), and the database runs in WAL mode so readers never wait for a writer.
+    """
+
+    # Instructions SQL exécutées à l'ouverture de la base (création du schéma)
+    SCHEMA = ()
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        with self._connect() as connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+
+    def warmup(self) -> None:
+        """
+        Open the connection of the current thread and read every table, so
+        that the first lookups find the database in the page cache.
+        """
+        connection = self._connect()
+        tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for table in tables:
+            connection.execute(f'SELECT count(*) FROM "{table}"').fetchone()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
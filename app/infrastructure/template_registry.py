@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import zipfile
+from dataclasses import dataclass
+from io import BytesIO
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from .image_processing import normalize_image
+
+if TYPE_CHECKING:
+    from pptx.presentation import Presentation as PPTXPresentation
+
+logger = logging.getLogger(__name__)
+
+# Type de contenu de la partie principale d'un modèle .potx, que python-pptx refuse d'ouvrir
+TEMPLATE_CONTENT_TYPE = b"application/vnd.openxmlformats-officedocument.presentationml.template.main+xml"
+PRESENTATION_CONTENT_TYPE = b"application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml"
+
+# Mise en page utilisée pour les slides
+CONTENT_LAYOUT_NAME = "Title and Content"
+
+
+@dataclass(frozen=True)
+class PreparedTemplate:
+    """
+    A template parsed once and ready to produce new documents.
+
+    It only holds plain data so that it can be passed to a render process.
+    """
+
+    # Le modèle sans aucun slide, enregistré en mémoire
+    prototype: bytes
+    layout_index: int
+    body_placeholder_idx: int
+    slide_width: int
+    slide_height: int
+
+    def new_document(self) -> "PPTXPresentation":
+        """Create a new, empty document from the prototype."""
+        # python-pptx (et lxml) ne sont importés qu'au premier rendu, pour un démarrage rapide
+        from pptx import Presentation as PPTXPresentation
+        return PPTXPresentation(BytesIO(self.prototype))
+
+
+class TemplateRegistry:
+    """
+    Templates and small assets, loaded once.
+
+    The PowerPoint template (python-pptx's default, or a custom .pptx/.potx
+    file from PPTX_TEMPLATE_PATH) is parsed once and kept as a prepared
+    prototype with its layout metadata. Local images such as the fallback
+    image are kept in memory, already normalized.
+
+    Nothing is loaded when the registry is created, so that the server starts
+    fast: ``load`` runs on the first use, or during the warmup.
+    """
+
+    def __init__(self, template_path: Optional[str] = None, assets_dir: str = "static/images"):
+        self.template_path = template_path or os.getenv("PPTX_TEMPLATE_PATH") or None
+        self.assets_dir = assets_dir
+        self._template: Optional[PreparedTemplate] = None
+        self._assets: Dict[str, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._template is not None
+
+    @property
+    def template(self) -> PreparedTemplate:
+        """The prepared template, loaded on first access (blocking: prefer calling load in an executor first)."""
+        if self._template is None:
+            self.load()
+        return self._template
+
+    def load(self) -> None:
+        """
+        Parse the template and load the assets, if not done yet.
+
+        This reads files and parses XML: it is meant to run in an executor.
+        """
+        with self._lock:
+            if self._template is not None:
+                return
+            self._load_assets()
+            self._template = self._prepare_template(self.template_path)
+        logger.info("TemplateRegistry loaded (template: %s, %s assets)", self.template_path or 'default', len(self._assets))
+
+    def get_asset(self, local_path: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Get a preloaded local image (None until the registry is loaded).
+
+        Args:
+            local_path: Path of the image, e.g. "static/images/fallback.jpg"
+
+        Returns:
+            Tuple of (image_data, image_extension), or None if it was not preloaded
+        """
+        return self._assets.get(os.path.normpath(local_path))
+
+    def _prepare_template(self, template_path: Optional[str]) -> PreparedTemplate:
+        from pptx import Presentation as PPTXPresentation
+
+        if template_path:
+            with open(template_path, "rb") as template_file:
+                template_data = template_file.read()
+            if template_path.lower().endswith(".potx"):
+                template_data = self._potx_to_pptx(template_data)
+            pptx = PPTXPresentation(BytesIO(template_data))
+        else:
+            pptx = PPTXPresentation()
+
+        # Supprimer les slides du modèle pour ne garder que les masques et mises en page
+        slide_ids = pptx.slides._sldIdLst
+        for slide_id in list(slide_ids):
+            pptx.part.drop_rel(slide_id.rId)
+            slide_ids.remove(slide_id)
+
+        layout_index, body_placeholder_idx = self._find_content_layout(pptx)
+        prototype = BytesIO()
+        pptx.save(prototype)
+        return PreparedTemplate(
+            prototype=prototype.getvalue(),
+            layout_index=layout_index,
+            body_placeholder_idx=body_placeholder_idx,
+            slide_width=pptx.slide_width,
+            slide_height=pptx.slide_height,
+        )
+
+    def _find_content_layout(self, pptx: "PPTXPresentation") -> Tuple[int, int]:
+        """Find the "Title and Content" layout (or the first one with a body) and its body placeholder."""
+        from pptx.enum.shapes import PP_PLACEHOLDER
+
+        # Types de placeholders acceptés pour le contenu
+        body_placeholder_types = (PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT)
+        layouts = list(pptx.slide_layouts)
+        candidates = [i for i, layout in enumerate(layouts) if layout.name == CONTENT_LAYOUT_NAME]
+        candidates += [i for i in range(len(layouts)) if i not in candidates]
+        for index in candidates:
+            for placeholder in layouts[index].placeholders:
+                if placeholder.placeholder_format.type in body_placeholder_types:
+                    return index, placeholder.placeholder_format.idx
+        raise ValueError("The PowerPoint template has no layout with a title and a content placeholder")
+
+    def _potx_to_pptx(self, template_data: bytes) -> bytes:
+        """Declare the main part of a .potx template as a presentation so python-pptx opens it."""
+        source = zipfile.ZipFile(BytesIO(template_data))
+        output = BytesIO()
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as target:
+            for item in source.infolist():
+                data = source.read(item.filename)
+                if item.filename == "[Content_Types].xml":
+                    data = data.replace(TEMPLATE_CONTENT_TYPE, PRESENTATION_CONTENT_TYPE)
+                target.writestr(item, data)
+        return output.getvalue()
+
+    def _load_assets(self) -> None:
+        if not os.path.isdir(self.assets_dir):
+            return
+        for name in os.listdir(self.assets_dir):
+            path = os.path.join(self.assets_dir, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            with open(path, "rb") as asset_file:
+                asset = normalize_image(asset_file.read(), os.path.splitext(name)[1][1:])
+            if asset:
+                self._assets[os.path.normpath(path)] = asset
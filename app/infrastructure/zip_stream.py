@@ -0,0 +1,64 @@
+import time
+import zipfile
+from typing import List
+
+
+class _WriteBuffer:
+    """Write-only, unseekable file object whose content is taken out as it is written."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStream:
+    """
+    A zip archive produced incrementally, to be sent while it is being built.
+
+    Each ``add`` returns the bytes of the new entry and ``close`` returns the
+    central directory, so only one entry is held in memory at a time. Entries
+    are stored without compression by default: .pptx files are already zip
+    archives and would not shrink.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_STORED):
+        self._buffer = _WriteBuffer()
+        # Le buffer n'a pas de tell() : zipfile écrit alors en mode non positionnable
+        self._zip = zipfile.ZipFile(self._buffer, "w", compression=compression)
+
+    def add(self, name: str, data: bytes) -> bytes:
+        """
+        Add an entry to the archive.
+
+        Args:
+            name: Name of the entry in the archive
+            data: Content of the entry
+
+        Returns:
+            The bytes of the archive produced for this entry
+        """
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = self._zip.compression
+        self._zip.writestr(info, data)
+        return self._buffer.take()
+
+    def close(self) -> bytes:
+        """
+        Finish the archive.
+
+        Returns:
+            The last bytes of the archive (the central directory)
+        """
+        self._zip.close()
+        return self._buffer.take()
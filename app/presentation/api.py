@@ -1,34 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+import json
 import os
+import re
+from typing import AsyncIterator, List
+from urllib.parse import urlparse
 
-from ..application.dto import PromptRequest, PresentationResponse, ErrorResponse
-from ..application.use_cases import GeneratePresentationUseCase
-from ..domain.repository import AIContentGenerator, PresentationRepository
-from ..infrastructure.deepseek_client import DeepseekClient
-from ..infrastructure.pptx_generator import PPTXGenerator
+from ..application.dto import BatchRequest, PromptRequest, PresentationDTO, PresentationResponse, SlideEditRequest, ErrorResponse, JobResponse, JobStatusResponse, WarmupResponse
+from ..application.job_queue import JobQueue, JobQueueFullError
+from ..application.presentation_service import PresentationNotFoundError, PresentationService
+from ..di.container import Container, get_container, get_job_queue, get_presentation_service, get_presentation_storage
+from ..domain.entities import Presentation, Slide
+from ..infrastructure.executor import run_blocking
+from ..infrastructure.metrics import REGISTRY
+from ..infrastructure.presentation_storage import PresentationStorage
+from ..infrastructure.zip_stream import ZipStream
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
 
-def get_content_generator() -> AIContentGenerator:
-    return DeepseekClient()
-
-
-def get_presentation_repository() -> PresentationRepository:
-    return PPTXGenerator()
-
-
-def get_generate_presentation_use_case(
-    content_generator: AIContentGenerator = Depends(get_content_generator),
-    presentation_repository: PresentationRepository = Depends(get_presentation_repository)
-) -> GeneratePresentationUseCase:
-    return GeneratePresentationUseCase(content_generator, presentation_repository)
-
-
 @router.get("/")
 async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -37,53 +30,278 @@ async def index(request: Request):
 @router.post("/generate", response_model=PresentationResponse, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
 async def generate_presentation(
     prompt_request: PromptRequest,
-    use_case: GeneratePresentationUseCase = Depends(get_generate_presentation_use_case)
+    service: PresentationService = Depends(get_presentation_service),
+    storage: PresentationStorage = Depends(get_presentation_storage)
 ):
     try:
-        file_path = await use_case.execute(prompt_request.prompt)
+        result = await service.generate(prompt_request.prompt, prompt_request.include_images, prompt_request.reuse_similar)
         
-        if not file_path:
+        if not result:
             raise HTTPException(
                 status_code=500,
                 detail={"error": "Failed to generate presentation", "details": "Could not generate content from prompt"}
             )
         
-        # Count slides (we could use the domain model but this is more direct)
         # The file path is relative to the static folder
-        full_path = os.path.join("static", file_path)
-        if not os.path.exists(full_path):
+        file_path = result.file_path
+        if not await storage.exists(file_path):
             raise HTTPException(
                 status_code=500,
                 detail={"error": "Failed to save presentation", "details": "Generated file not found"}
             )
         
-        # We'll use a simple approximation for slide count
-        # In a real application, we would get this from the actual object
-        slide_count = len(prompt_request.prompt.split("."))
-        
-        # Ensure slide count is at least 1
-        slide_count = max(1, min(slide_count, 20))
-        
         return PresentationResponse(
-            file_url=f"/static/{file_path}",
-            slide_count=slide_count
+            file_url=storage.url_for(file_path),
+            slide_count=result.slide_count
         )
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "An error occurred", "details": str(e)}
+        )
+
+
+@router.post("/render", response_model=PresentationResponse, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
+async def render_presentation(
+    presentation_dto: PresentationDTO,
+    service: PresentationService = Depends(get_presentation_service),
+    storage: PresentationStorage = Depends(get_presentation_storage)
+):
+    max_slides = int(os.getenv("RENDER_MAX_SLIDES", "100"))
+    if len(presentation_dto.slides) > max_slides:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Presentation too large", "details": f"A presentation can contain at most {max_slides} slides"}
+        )
+    
+    # Le serveur télécharge les images fournies : seuls les hôtes autorisés sont acceptés
+    allowed_hosts = {host.strip().lower() for host in os.getenv("RENDER_IMAGE_HOSTS", "images.pexels.com").split(",") if host.strip()}
+    for slide in presentation_dto.slides:
+        for url in ([slide.image] if slide.image else []) + (slide.image_urls or []):
+            parsed = urlparse(url)
+            if parsed.scheme not in ("http", "https") or ("*" not in allowed_hosts and (parsed.hostname or "").lower() not in allowed_hosts):
+                raise HTTPException(
+                    status_code=400,
+                    detail={"error": "Image URL not allowed", "details": f"{url} is not an http(s) URL of an allowed image host"}
+                )
+    
+    presentation = Presentation(slides=[
+        Slide(
+            title=slide.title,
+            description=slide.description,
+            image=slide.image,
+            keywords=slide.keywords,
+            image_candidates=slide.image_urls
+        )
+        for slide in presentation_dto.slides
+    ])
+    try:
+        result = await service.render(presentation)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "An error occurred", "details": str(e)}
+        )
+    
+    if not result:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Failed to render presentation", "details": "The presentation could not be saved"}
+        )
+    
+    return PresentationResponse(
+        file_url=storage.url_for(result.file_path),
+        slide_count=result.slide_count,
+        message="Presentation rendered successfully"
+    )
+
+
+@router.post(
+    "/presentations/{filename}/slides/{slide_number}",
+    response_model=PresentationResponse,
+    responses={404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}}
+)
+async def edit_slide(
+    filename: str,
+    slide_number: int,
+    edit_request: SlideEditRequest,
+    service: PresentationService = Depends(get_presentation_service),
+    storage: PresentationStorage = Depends(get_presentation_storage)
+):
+    # Une nouvelle présentation est enregistrée : l'originale reste disponible
+    try:
+        result = await service.edit_slide(
+            os.path.basename(filename),
+            slide_number - 1,
+            instruction=edit_request.instruction,
+            title=edit_request.title,
+            description=edit_request.description,
+            keywords=edit_request.keywords
+        )
+    except PresentationNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "Slide not found", "details": str(e)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail={"error": "An error occurred", "details": str(e)}
         )
+    
+    if not result:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Failed to edit slide", "details": "Could not generate the slide"}
+        )
+    
+    return PresentationResponse(
+        file_url=storage.url_for(result.file_path),
+        slide_count=result.slide_count,
+        message="Slide updated successfully"
+    )
+
+
+@router.post("/generate/batch", responses={400: {"model": ErrorResponse}})
+async def generate_batch(
+    batch_request: BatchRequest,
+    service: PresentationService = Depends(get_presentation_service),
+    storage: PresentationStorage = Depends(get_presentation_storage)
+):
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+    if len(batch_request.items) > max_items:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Batch too large", "details": f"A batch can contain at most {max_items} presentations"}
+        )
+    
+    concurrency = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    return StreamingResponse(
+        _batch_archive(service, storage, batch_request.items, concurrency),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="presentations.zip"'}
+    )
+
+
+async def _batch_archive(
+    service: PresentationService,
+    storage: PresentationStorage,
+    items: List[PromptRequest],
+    concurrency: int
+) -> AsyncIterator[bytes]:
+    """
+    Stream a zip archive of the generated presentations, adding each one as soon as it is done.
+    
+    The archive ends with a manifest.json entry describing every item, including the errors.
+    """
+    archive = ZipStream()
+    manifest = [None] * len(items)
+    requests = [(item.prompt, item.include_images, item.reuse_similar) for item in items]
+    
+    async for index, result, error in service.generate_many(requests, concurrency):
+        entry = {"index": index, "prompt": items[index].prompt, "include_images": items[index].include_images}
+        if result:
+            slug = re.sub(r"[^a-z0-9]+", "-", items[index].prompt.lower())[:40].strip("-") or "presentation"
+            name = f"{index + 1:03d}-{slug}.pptx"
+            data = await storage.read(result.file_path)
+            if data is not None:
+                yield await run_blocking(archive.add, name, data)
+                entry.update(status="succeeded", file=name, slide_count=result.slide_count, timings=result.timings)
+            else:
+                entry.update(status="failed", error="Generated file not found")
+        else:
+            entry.update(status="failed", error=error)
+        manifest[index] = entry
+    
+    yield archive.add("manifest.json", json.dumps({"items": manifest}, indent=2, ensure_ascii=False).encode("utf-8"))
+    yield archive.close()
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202, responses={503: {"model": ErrorResponse}})
+async def create_job(
+    prompt_request: PromptRequest,
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    try:
+        job = await job_queue.submit(prompt_request.prompt, prompt_request.include_images, prompt_request.reuse_similar)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "Server busy", "details": str(e)}
+        )
+    
+    return JobResponse(
+        job_id=job.id,
+        status=job.status.value,
+        status_url=f"/jobs/{job.id}"
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse, responses={404: {"model": ErrorResponse}})
+async def get_job(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+    storage: PresentationStorage = Depends(get_presentation_storage)
+):
+    job = await job_queue.job_store.get(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "Job not found", "details": "The requested job does not exist"}
+        )
+    
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.status.value,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        timings=job.timings,
+        slide_count=job.slide_count,
+        file_url=storage.url_for(job.file_path) if job.file_path else None,
+        error=job.error
+    )
 
 
 @router.get("/download/{filename}")
-async def download_presentation(filename: str):
-    file_path = os.path.join("static/presentations", filename)
+async def download_presentation(
+    filename: str,
+    storage: PresentationStorage = Depends(get_presentation_storage)
+):
+    stored = await storage.open_download(filename)
     
-    if not os.path.exists(file_path):
+    if stored is None:
         raise HTTPException(
             status_code=404,
             detail={"error": "File not found", "details": "The requested presentation does not exist"}
         )
     
-    return FileResponse(file_path, filename=filename) 
+    if isinstance(stored, bytes):
+        # Présentation gardée en mémoire : ce téléchargement est le seul
+        return Response(
+            stored,
+            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    return FileResponse(stored, filename=filename)
+
+
+@router.post("/warmup", response_model=WarmupResponse)
+async def warmup(container: Container = Depends(get_container)):
+    # Attend la fin du préchauffage (lancé au démarrage ou par un appel précédent)
+    timings = await container.warmup()
+    return WarmupResponse(status=container.warmup_status, timings=timings)
+
+
+@router.get("/warmup", response_model=WarmupResponse)
+async def warmup_status(container: Container = Depends(get_container)):
+    return WarmupResponse(status=container.warmup_status, timings=container.timings)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,162 @@
+"""
+Local stand-ins for the Deepseek chat completions API, the Pexels search API
+and the Pexels image host, used by the benchmark harness.
+
+Usage:
+    python benchmarks/fake_upstreams.py --port 8100 --slides 8 --llm-latency 2.0
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+from io import BytesIO
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from PIL import Image
+
+# Variantes d'image renvoyées par l'API de recherche Pexels
+PEXELS_VARIANTS = ("original", "large2x", "large", "medium", "small", "portrait", "landscape", "tiny")
+
+
+def build_slides(prompt: str, slide_count: int) -> list:
+    """Build the slide objects the fake model "writes" for a prompt."""
+    topic = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+    return [
+        {
+            "title": f"Slide {i + 1} on {topic}",
+            "description": " ".join(f"Point {j + 1} of slide {i + 1} about {topic}." for j in range(4)),
+            "keywords": [f"topic{topic}", f"slide{i + 1}"],
+        }
+        for i in range(slide_count)
+    ]
+
+
+def build_outline(slides: list, section_size: int = 5) -> list:
+    """Build the outline the fake model "writes" in outline mode: the slide titles, in sections."""
+    return [
+        {"title": f"Section {i // section_size + 1}", "slides": [slide["title"] for slide in slides[i:i + section_size]]}
+        for i in range(0, len(slides), section_size)
+    ]
+
+
+def build_image(width: int) -> bytes:
+    """Build a noisy JPEG (noise compresses badly, like a real photo) of the given width."""
+    height = max(1, width * 2 // 3)
+    channels = [Image.effect_noise((width, height), 48) for _ in range(3)]
+    output = BytesIO()
+    Image.merge("RGB", channels).save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+def create_app(config: argparse.Namespace) -> FastAPI:
+    app = FastAPI()
+    image_data = build_image(config.image_width)
+
+    def should_fail() -> bool:
+        return random.random() < config.error_rate
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if should_fail():
+            await asyncio.sleep(config.llm_latency / 10)
+            return JSONResponse({"error": {"message": "Injected upstream error"}}, status_code=500)
+
+        system_message = body["messages"][0]["content"]
+        prompt = body["messages"][-1]["content"]
+        slides = build_slides(prompt, config.slides)
+        full_length = len(json.dumps(slides, ensure_ascii=False))
+        if "array of sections" in system_message:
+            content = json.dumps(build_outline(slides), ensure_ascii=False)
+        elif "Write only the slides of the section" in prompt:
+            titles = re.findall(r"^\d+\. (.+)$", prompt, flags=re.MULTILINE)
+            content = json.dumps([dict(slides[0], title=title) for title in titles], ensure_ascii=False)
+        else:
+            content = json.dumps(slides, ensure_ascii=False)
+        # Le temps d'écriture est proportionnel à la longueur de la réponse (--llm-latency pour un deck entier)
+        latency = config.llm_latency * len(content) / full_length
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]
+            }
+
+        # Répartir la latence sur les fragments, comme un modèle qui écrit au fil de l'eau
+        chunk_size = max(1, len(content) // config.llm_chunks)
+        chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+
+        async def events():
+            for chunk in chunks:
+                await asyncio.sleep(latency / len(chunks))
+                event = {"choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+                yield f"data: {json.dumps(event)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/v1/search")
+    async def search(request: Request):
+        await asyncio.sleep(config.search_latency)
+        if should_fail():
+            return JSONResponse({"error": "Injected upstream error"}, status_code=500)
+
+        query = request.query_params.get("query", "")
+        per_page = int(request.query_params.get("per_page", "1"))
+        base_id = int(hashlib.sha1(query.encode("utf-8")).hexdigest()[:8], 16)
+        base_url = str(request.base_url).rstrip("/")
+        photos = []
+        for i in range(per_page):
+            photo_id = base_id + i
+            photos.append({
+                "id": photo_id,
+                "width": config.image_width,
+                "height": max(1, config.image_width * 2 // 3),
+                "src": {variant: f"{base_url}/images/{photo_id}/{variant}.jpg" for variant in PEXELS_VARIANTS},
+            })
+        return JSONResponse(
+            {"page": 1, "per_page": per_page, "total_results": per_page, "photos": photos},
+            headers={"X-Ratelimit-Limit": "20000", "X-Ratelimit-Remaining": "19999"}
+        )
+
+    @app.get("/images/{photo_id}/{variant}.jpg")
+    async def image(photo_id: int, variant: str):
+        await asyncio.sleep(config.image_latency)
+        if should_fail():
+            return Response(status_code=500)
+        return Response(image_data, media_type="image/jpeg")
+
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--slides", type=int, default=8, help="Slides per generated deck")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Seconds to write the completion of a whole deck")
+    parser.add_argument("--llm-chunks", type=int, default=50, help="Fragments of a streamed completion")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per image search")
+    parser.add_argument("--image-latency", type=float, default=0.2, help="Seconds per image download")
+    parser.add_argument("--image-width", type=int, default=1920, help="Width of the served images, in pixels")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the error injection")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    config = parse_args(argv)
+    random.seed(config.seed)
+    uvicorn.run(create_app(config), host=config.host, port=config.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+End-to-end benchmark of the generation request path.
+
+Starts the fake upstreams (benchmarks/fake_upstreams.py) and the real
+application (uvicorn main:app) in subprocesses, drives POST /generate at the
+requested concurrency, and reports throughput, latency percentiles, the peak
+RSS of the application process, the size of the generated files and the
+per-stage timings from /metrics, as JSON.
+
+Every run uses fresh, empty caches. Prompts are unique unless
+--repeat-prompts is given, so that the deck cache is only hit on purpose.
+
+Usage:
+    python benchmarks/run_benchmark.py --requests 40 --concurrency 8 --output bench.json
+    python benchmarks/run_benchmark.py --app-env RENDER_EXECUTOR=process --app-env IMAGE_CONCURRENCY=12
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_UPSTREAMS = os.path.join(ROOT_DIR, "benchmarks", "fake_upstreams.py")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} was ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} was not ready after {timeout}s")
+
+
+def stop(process: Optional[subprocess.Popen]) -> None:
+    if process and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile with linear interpolation between the closest ranks."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_bytes(pid: int) -> Optional[int]:
+    """Peak resident set size (VmHWM) of a process; Linux only."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def stage_timings(metrics_text: str) -> Dict[str, Dict[str, float]]:
+    """Extract the count and mean duration of each stage from the /metrics output."""
+    stages: Dict[str, Dict[str, float]] = {}
+    pattern = re.compile(r'^pptgen_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+    for line in metrics_text.splitlines():
+        match = pattern.match(line)
+        if match:
+            kind, stage, value = match.groups()
+            stages.setdefault(stage, {})[kind] = float(value)
+    return {
+        stage: {"count": int(values.get("count", 0)), "mean_seconds": values.get("sum", 0.0) / values["count"]}
+        for stage, values in stages.items() if values.get("count")
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def drive(base_url: str, args: argparse.Namespace, run_id: str) -> Tuple[List[dict], List[dict]]:
+    """Send the warmup requests, then the measured requests at the configured concurrency."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        async def generate(index: int) -> dict:
+            topic = 0 if args.repeat_prompts else index
+            payload = {"prompt": f"Benchmark presentation {run_id} number {topic}", "includeImages": not args.no_images}
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/generate", json=payload)
+                    status, body = response.status_code, response.json()
+                except (httpx.HTTPError, ValueError) as e:
+                    status, body = None, {"error": str(e)}
+                return {"latency": time.perf_counter() - started, "status": status, "body": body}
+
+        warmup = [await generate(-1 - index) for index in range(args.warmup)]
+        return warmup, await asyncio.gather(*(generate(index) for index in range(args.requests)))
+
+
+def output_path(result: dict) -> Optional[str]:
+    """Local path of the file generated by a successful request."""
+    if result["status"] != 200:
+        return None
+    file_path = os.path.join(ROOT_DIR, result["body"].get("file_url", "").lstrip("/"))
+    return file_path if os.path.isfile(file_path) else None
+
+
+def summarize(results: List[dict], duration: float) -> dict:
+    succeeded = [result for result in results if result["status"] == 200]
+    latencies = [result["latency"] for result in succeeded]
+    file_sizes = [os.path.getsize(path) for path in map(output_path, succeeded) if path]
+
+    errors: Dict[str, int] = {}
+    for result in results:
+        if result["status"] != 200:
+            errors[str(result["status"])] = errors.get(str(result["status"]), 0) + 1
+
+    return {
+        "requests": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "errors_by_status": errors,
+        "duration_seconds": duration,
+        "throughput_rps": len(succeeded) / duration if duration else None,
+        "latency_seconds": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+        "output_file_bytes": {
+            "mean": sum(file_sizes) / len(file_sizes) if file_sizes else None,
+            "max": max(file_sizes) if file_sizes else None,
+        },
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    work_dir = tempfile.mkdtemp(prefix="pptgen-bench-")
+    upstream_port, app_port = free_port(), free_port()
+    upstream_url = f"http://127.0.0.1:{upstream_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+    upstream = app = None
+
+    try:
+        upstream = subprocess.Popen([
+            sys.executable, FAKE_UPSTREAMS, "--port", str(upstream_port),
+            "--slides", str(args.slides),
+            "--llm-latency", str(args.llm_latency),
+            "--search-latency", str(args.search_latency),
+            "--image-latency", str(args.image_latency),
+            "--image-width", str(args.image_width),
+            "--error-rate", str(args.error_rate),
+            "--seed", str(args.seed),
+        ])
+        wait_until_ready(f"{upstream_url}/health", upstream, args.startup_timeout)
+
+        env = dict(os.environ)
+        env.update({
+            "DEEPSEEK_API_KEY": "benchmark",
+            "DEEPSEEK_API_URL": f"{upstream_url}/chat/completions",
+            "PEXELS_API_KEY": "benchmark-pexels-key",
+            "PEXELS_API_URL": f"{upstream_url}/v1/search",
+            "DECK_CACHE_PATH": os.path.join(work_dir, "deck_cache.sqlite3"),
+            "PROMPT_INDEX_PATH": os.path.join(work_dir, "prompt_index.sqlite3"),
+            "SEARCH_CACHE_PATH": os.path.join(work_dir, "search_cache.sqlite3"),
+            "IMAGE_CACHE_DIR": os.path.join(work_dir, "images"),
+            "PRESENTATION_MANIFEST_DIR": os.path.join(work_dir, "manifests"),
+            "IMAGE_INDEX_PATH": os.path.join(work_dir, "image_index.sqlite3"),
+            "LOG_LEVEL": "WARNING",
+        })
+        for assignment in args.app_env:
+            name, _, value = assignment.partition("=")
+            env[name] = value
+
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning"],
+            cwd=ROOT_DIR,
+            env=env,
+        )
+        wait_until_ready(f"{app_url}/metrics", app, args.startup_timeout)
+
+        started = time.perf_counter()
+        warmup, results = asyncio.run(drive(app_url, args, run_id))
+        duration = time.perf_counter() - started
+
+        report = {
+            "commit": git_commit(),
+            "config": {
+                name: value for name, value in vars(args).items() if name not in ("output", "keep_output")
+            },
+        }
+        report.update(summarize(results, duration))
+        report["peak_rss_bytes"] = peak_rss_bytes(app.pid)
+        report["stages"] = stage_timings(httpx.get(f"{app_url}/metrics").text)
+
+        if not args.keep_output:
+            for path in map(output_path, warmup + results):
+                if path:
+                    os.remove(path)
+        return report
+    finally:
+        stop(app)
+        stop(upstream)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Measured /generate requests")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at the same time")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured requests sent first")
+    parser.add_argument("--repeat-prompts", action="store_true", help="Send the same prompt every time")
+    parser.add_argument("--no-images", action="store_true", help="Generate decks without images")
+    parser.add_argument("--slides", type=int, default=8, help="Slides per generated deck")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Seconds to write the completion of a whole deck")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per image search")
+    parser.add_argument("--image-latency", type=float, default=0.2, help="Seconds per image download")
+    parser.add_argument("--image-width", type=int, default=1920, help="Width of the served images, in pixels")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream requests that fail")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the error injection")
+    parser.add_argument("--app-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Environment variable for the application (repeatable)")
+    parser.add_argument("--request-timeout", type=float, default=300.0)
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--keep-output", action="store_true", help="Keep the generated .pptx files")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
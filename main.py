@@ -1,23 +1,46 @@
+import time
+_import_started = time.perf_counter()
+
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.di.container import Container
+from app.infrastructure.logging_config import configure_logging
 from app.presentation.api import router
+from app.presentation.middleware import RequestMetricsMiddleware
 
 # Load environment variables
 load_dotenv()
+configure_logging()
 
 # Create output directories
 os.makedirs("static/presentations", exist_ok=True)
 
+# Durée d'import de l'application, mesurée jusqu'ici
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the application-scoped services and connection pools once
+    container = Container(import_seconds=IMPORT_SECONDS)
+    await container.startup()
+    app.state.container = container
+    try:
+        yield
+    finally:
+        await container.shutdown()
+
 # Create FastAPI application
 app = FastAPI(
     title="AI PowerPoint Generator",
     description="Generate PowerPoint presentations from text prompts using AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add middleware
@@ -28,6 +51,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
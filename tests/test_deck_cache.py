@@ -0,0 +1,35 @@
+from app.infrastructure.deck_cache import DeckCache
+
+
+def make_cache(tmp_path, ttl_seconds=3600, max_entries=1000):
+    return DeckCache(db_path=str(tmp_path / "decks.sqlite3"), ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+
+def test_presentations_are_shared_between_instances(tmp_path):
+    make_cache(tmp_path).put("key", {"title": "Deck", "slides": [{"title": "One"}]})
+
+    assert make_cache(tmp_path).get("key") == {"title": "Deck", "slides": [{"title": "One"}]}
+    assert make_cache(tmp_path).get("other") is None
+
+
+def test_expired_presentations_are_misses(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=0)
+    cache.put("key", {"title": "Deck"})
+
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_presentations_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(DeckCache, "EVICT_EVERY", 3)
+    cache = make_cache(tmp_path, max_entries=2)
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr("app.infrastructure.deck_cache.time.time", lambda: next(clock))
+
+    cache.put("first", {"title": "First"})
+    cache.put("second", {"title": "Second"})
+    assert cache.get("first") == {"title": "First"}
+    cache.put("third", {"title": "Third"})
+
+    assert cache.get("second") is None
+    assert cache.get("first") == {"title": "First"}
+    assert cache.get("third") == {"title": "Third"}
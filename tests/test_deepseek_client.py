@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.infrastructure.deepseek_client import DeepseekClient
+
+SLIDES = [{"title": f"Slide {index}", "description": "Content"} for index in range(3)]
+
+
+def sse(content, size=10):
+    chunks = [content[start:start + size] for start in range(0, len(content), size)]
+    events = "".join(f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}\n\n" for chunk in chunks)
+    return (events + "data: [DONE]\n\n").encode()
+
+
+def make_client(monkeypatch, content):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    monkeypatch.setenv("DEEPSEEK_API_URL", "http://deepseek.test/chat/completions")
+
+    def handler(request):
+        return httpx.Response(200, content=sse(content), headers={"content-type": "text/event-stream"})
+
+    return DeepseekClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+async def collect(client, titles):
+    async for slide in client.stream_slides("A deck", include_images=False):
+        titles.append(slide.title)
+
+
+def test_stream_yields_every_slide(monkeypatch):
+    client = make_client(monkeypatch, json.dumps(SLIDES))
+    titles = []
+    asyncio.run(collect(client, titles))
+    assert titles == ["Slide 0", "Slide 1", "Slide 2"]
+
+
+def test_truncated_stream_raises_after_the_received_slides(monkeypatch):
+    client = make_client(monkeypatch, json.dumps(SLIDES)[:-30])
+    titles = []
+    with pytest.raises(ValueError):
+        asyncio.run(collect(client, titles))
+    assert titles == ["Slide 0", "Slide 1"]
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.infrastructure.hedging import LatencyWindow, hedged
+
+
+def test_percentile_uses_the_nearest_rank():
+    window = LatencyWindow(size=100)
+    for index in range(1, 101):
+        window.record(index / 100)
+
+    assert window.percentile(50) == 0.5
+    assert window.percentile(95) == 0.95
+    assert window.percentile(100) == 1.0
+
+
+def test_percentile_needs_enough_samples_and_forgets_old_ones():
+    window = LatencyWindow(size=3)
+    assert window.percentile(95) is None
+    for seconds in (10.0, 0.1, 0.2, 0.3):
+        window.record(seconds)
+
+    assert len(window) == 3
+    assert window.percentile(100) == 0.3
+    assert window.percentile(100, min_samples=4) is None
+
+
+def make_call(delays):
+    """A call whose n-th invocation takes delays[n] seconds (or raises it, if it is an exception)."""
+    calls = []
+
+    async def call():
+        delay = delays[len(calls)]
+        calls.append(delay)
+        if isinstance(delay, Exception):
+            raise delay
+        await asyncio.sleep(delay)
+        return len(calls)
+
+    return call, calls
+
+
+def test_fast_call_sends_a_single_request():
+    call, calls = make_call([0.0, 0.0])
+
+    assert asyncio.run(hedged(call, 0.5, "test")) == 1
+    assert len(calls) == 1
+
+
+def test_slow_call_is_hedged_and_the_fastest_wins():
+    call, calls = make_call([5.0, 0.0])
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await hedged(call, 0.05, "test")
+        return result, loop.time() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result == 2
+    assert len(calls) == 2
+    assert elapsed < 1.0
+
+
+def test_hedge_covers_a_failing_first_call():
+    async def run():
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                await asyncio.sleep(0.1)
+                raise ValueError("primary failed")
+            await asyncio.sleep(0.2)
+            return "hedge"
+
+        return await hedged(call, 0.05, "test")
+
+    assert asyncio.run(run()) == "hedge"
+
+
+def test_error_of_the_first_call_is_raised_when_all_fail():
+    async def run():
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                await asyncio.sleep(0.1)
+                raise ValueError("primary failed")
+            raise ValueError("hedge failed")
+
+        return await hedged(call, 0.05, "test")
+
+    with pytest.raises(ValueError, match="primary"):
+        asyncio.run(run())
+
+
+def test_no_hedge_delay_sends_a_single_request():
+    call, calls = make_call([0.1, 0.0])
+
+    assert asyncio.run(hedged(call, None, "test")) == 1
+    assert len(calls) == 1
@@ -0,0 +1,85 @@
+import os
+import time
+
+from app.infrastructure.image_cache import ImageCache
+
+
+def make_cache(tmp_path, memory_budget_bytes=1024, disk_budget_bytes=1024 * 1024, ttl_seconds=3600):
+    return ImageCache(
+        cache_dir=str(tmp_path / "images"),
+        memory_budget_bytes=memory_budget_bytes,
+        disk_budget_bytes=disk_budget_bytes,
+        ttl_seconds=ttl_seconds
+    )
+
+
+def image(index, size=100):
+    return bytes([index]) * size
+
+
+def set_mtime(cache, url, mtime):
+    with open(cache._url_path(url), "rb") as url_file:
+        content_hash, image_ext = url_file.read().decode("ascii").split(".", 1)
+    os.utime(cache._url_path(url), (mtime, mtime))
+    os.utime(cache._blob_path(content_hash, image_ext), (mtime, mtime))
+
+
+def test_memory_tier_evicts_least_recently_used_within_budget(tmp_path):
+    cache = make_cache(tmp_path, memory_budget_bytes=250)
+    first = cache.put("https://img/1", image(1), "jpg")
+    second = cache.put("https://img/2", image(2), "jpg")
+    cache.get("https://img/1")
+    cache.put("https://img/3", image(3), "jpg")
+
+    assert cache._memory_bytes <= 250
+    assert first in cache._blobs
+    assert second not in cache._blobs
+
+
+def test_identical_images_are_stored_once(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("https://img/a", image(1), "jpg")
+    cache.put("https://img/b", image(1), "jpg")
+
+    assert cache._memory_bytes == 100
+    assert cache.get("https://img/b") == (image(1), "jpg")
+
+
+def test_disk_tier_serves_images_evicted_from_memory(tmp_path):
+    cache = make_cache(tmp_path, memory_budget_bytes=150)
+    cache.put("https://img/1", image(1), "png")
+    cache.put("https://img/2", image(2), "png")
+    assert len(cache._blobs) == 1
+
+    assert cache.get("https://img/1") == (image(1), "png")
+    # Un autre worker partage le même répertoire
+    assert make_cache(tmp_path).get("https://img/2") == (image(2), "png")
+
+
+def test_sweep_removes_expired_entries(tmp_path):
+    cache = make_cache(tmp_path, memory_budget_bytes=0, ttl_seconds=60)
+    cache.put("https://img/old", image(1), "jpg")
+    cache.put("https://img/new", image(2), "jpg")
+    set_mtime(cache, "https://img/old", time.time() - 120)
+
+    cache.sweep()
+
+    assert cache.get("https://img/old") is None
+    assert cache.get("https://img/new") == (image(2), "jpg")
+
+
+def test_sweep_evicts_oldest_images_above_the_disk_cap(tmp_path):
+    cache = make_cache(tmp_path, memory_budget_bytes=0, disk_budget_bytes=250)
+    now = time.time()
+    for index in range(3):
+        url = f"https://img/{index}"
+        cache.put(url, image(index), "jpg")
+        set_mtime(cache, url, now - 30 + index)
+    # Une lecture rafraîchit l'image la plus ancienne
+    assert cache.get("https://img/0") == (image(0), "jpg")
+
+    cache.sweep()
+
+    assert cache.get("https://img/1") is None
+    assert cache.get("https://img/0") == (image(0), "jpg")
+    assert cache.get("https://img/2") == (image(2), "jpg")
@@ -0,0 +1,51 @@
+from app.infrastructure.image_index import ImageIndex
+
+
+def make_index(tmp_path, threshold=0.8, max_images=5000):
+    return ImageIndex(db_path=str(tmp_path / "images.sqlite3"), threshold=threshold, max_images=max_images)
+
+
+def test_tokenize_drops_stop_words_numbers_and_plurals():
+    assert ImageIndex.tokenize(["Solar Panels", "photo of the glass", "2024"]) == {"solar", "panel", "glass"}
+
+
+def test_zero_threshold_disables_the_index(tmp_path):
+    assert make_index(tmp_path).enabled
+    assert not make_index(tmp_path, threshold=0).enabled
+
+
+def test_images_covering_the_query_are_found_in_search_order(tmp_path):
+    index = make_index(tmp_path)
+    index.add(["solar panels"], [("https://img/roof", "Solar panel on a roof"), ("https://img/field", "Solar farm in a field")])
+
+    assert [url for url, _ in index.find(["Solar panel"], limit=5)] == ["https://img/roof", "https://img/field"]
+    assert index.find(["roof", "solar"], limit=5) == [("https://img/roof", 1.0)]
+    assert [url for url, _ in index.find(["solar panel"], limit=1)] == ["https://img/roof"]
+
+
+def test_unseen_words_prevent_a_match(tmp_path):
+    index = make_index(tmp_path)
+    index.add(["solar panels"], [("https://img/roof", "Solar panel on a roof")])
+
+    assert index.find(["solar panel", "mars"], limit=5) == []
+
+
+def test_rare_words_weigh_more_than_common_ones(tmp_path):
+    index = make_index(tmp_path, threshold=0.6)
+    index.add(["landscape"], [("https://img/mountain", "mountain"), ("https://img/lake", "lake"), ("https://img/forest", "forest")])
+    index.add(["volcano"], [("https://img/volcano", None)])
+
+    assert [url for url, _ in index.find(["volcano landscape"], limit=5)] == ["https://img/volcano"]
+
+
+def test_least_recently_used_images_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(ImageIndex, "EVICT_EVERY", 3)
+    index = make_index(tmp_path, max_images=2)
+    index.add(["volcano"], [("https://img/volcano", None)])
+    index.add(["glacier"], [("https://img/glacier", None)])
+    assert index.find(["volcano"], limit=5)
+    index.add(["desert"], [("https://img/desert", None)])
+
+    assert index.find(["glacier"], limit=5) == []
+    assert index.find(["volcano"], limit=5) == [("https://img/volcano", 1.0)]
+    assert index.find(["desert"], limit=5) == [("https://img/desert", 1.0)]
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.application.job_queue import JobQueue, JobQueueFullError
+from app.application.presentation_service import GenerationResult
+from app.domain.entities import JobStatus
+from app.infrastructure.job_store import InMemoryJobStore
+
+
+class FakeService:
+    """Stands in for PresentationService; generations wait for ``release`` if it is given."""
+
+    def __init__(self, result=None, error=None, release=None):
+        self.result = result
+        self.error = error
+        self.release = release
+        self.prompts = []
+
+    async def generate(self, prompt, include_images=True, reuse_similar=True):
+        self.prompts.append(prompt)
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def wait_finished(job_store, job_id):
+    for _ in range(200):
+        job = await job_store.get(job_id)
+        if job.is_finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def run_jobs(service, prompts, workers=2):
+    async def run():
+        job_store = InMemoryJobStore()
+        queue = JobQueue(lambda: service, job_store, workers=workers, max_queued=10)
+        await queue.start()
+        try:
+            jobs = [await queue.submit(prompt) for prompt in prompts]
+            return [await wait_finished(job_store, job.id) for job in jobs]
+        finally:
+            await queue.stop()
+
+    return asyncio.run(run())
+
+
+def test_successful_generation_fills_the_job():
+    result = GenerationResult(file_path="static/presentations/deck.pptx", slide_count=8, timings={"llm": 1.5})
+
+    [job] = run_jobs(FakeService(result=result), ["A deck about France"])
+
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.file_path == "static/presentations/deck.pptx"
+    assert job.slide_count == 8
+    assert job.timings["llm"] == 1.5
+    assert "queued" in job.timings
+    assert job.started_at <= job.finished_at
+
+
+def test_empty_result_and_errors_fail_the_job():
+    [empty] = run_jobs(FakeService(result=None), ["A deck about France"])
+    [error] = run_jobs(FakeService(error=RuntimeError("LLM unavailable")), ["A deck about France"])
+
+    assert empty.status == JobStatus.FAILED
+    assert empty.error == "Could not generate content from prompt"
+    assert error.status == JobStatus.FAILED
+    assert error.error == "LLM unavailable"
+
+
+def test_every_submitted_job_runs():
+    service = FakeService(result=GenerationResult(file_path="deck.pptx", slide_count=1))
+
+    jobs = run_jobs(service, [f"Deck {index}" for index in range(5)])
+
+    assert all(job.status == JobStatus.SUCCEEDED for job in jobs)
+    assert sorted(service.prompts) == sorted(f"Deck {index}" for index in range(5))
+
+
+def test_submit_fails_when_the_queue_is_full():
+    async def run():
+        release = asyncio.Event()
+        job_store = InMemoryJobStore()
+        queue = JobQueue(lambda: FakeService(result=None, release=release), job_store, workers=1, max_queued=1)
+        await queue.start()
+        try:
+            running = await queue.submit("Running")
+            await asyncio.sleep(0.01)
+            queued = await queue.submit("Queued")
+            with pytest.raises(JobQueueFullError):
+                await queue.submit("Rejected")
+
+            assert (await job_store.get(running.id)).status == JobStatus.RUNNING
+            assert (await job_store.get(queued.id)).status == JobStatus.QUEUED
+            release.set()
+            await wait_finished(job_store, queued.id)
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import time
+
+from app.infrastructure.presentation_storage import PresentationStorage
+
+
+def store_deck(storage, filename, size=1000):
+    with open(os.path.join(storage.output_dir, filename), "wb") as deck_file:
+        deck_file.write(b"x" * size)
+
+    async def store():
+        await storage.store(filename)
+        await storage.store_manifest(filename, {"slides": [{"title": "t" * 100, "description": "d"}]})
+
+    asyncio.run(store())
+
+
+def make_storage(tmp_path, quota_bytes=0):
+    return PresentationStorage(
+        output_dir=str(tmp_path / "presentations"),
+        mode="disk",
+        ttl_seconds=3600,
+        quota_bytes=quota_bytes,
+        manifest_dir=str(tmp_path / "manifests")
+    )
+
+
+def test_manifests_are_kept_outside_the_output_dir(tmp_path):
+    storage = make_storage(tmp_path)
+    store_deck(storage, "deck.pptx")
+    assert os.listdir(storage.output_dir) == ["deck.pptx"]
+    assert os.listdir(storage.manifest_dir) == ["deck.json"]
+    assert asyncio.run(storage.load_manifest("deck.pptx"))["slides"][0]["description"] == "d"
+
+
+def test_manifests_count_towards_the_usage(tmp_path):
+    storage = make_storage(tmp_path)
+    store_deck(storage, "deck.pptx")
+    manifest_size = os.path.getsize(os.path.join(storage.manifest_dir, "deck.json"))
+    assert storage._usage == 1000 + manifest_size
+    storage.sweep()
+    assert storage._usage == 1000 + manifest_size
+
+
+def test_sweep_removes_orphan_manifests(tmp_path):
+    storage = make_storage(tmp_path)
+    store_deck(storage, "kept.pptx")
+    store_deck(storage, "gone.pptx")
+    os.remove(os.path.join(storage.output_dir, "gone.pptx"))
+    storage.sweep()
+    assert os.listdir(storage.manifest_dir) == ["kept.json"]
+
+
+def test_quota_sweep_removes_decks_with_their_manifests(tmp_path):
+    storage = make_storage(tmp_path)
+    for index in range(3):
+        store_deck(storage, f"deck{index}.pptx")
+        modified = time.time() - 100 + index
+        os.utime(os.path.join(storage.output_dir, f"deck{index}.pptx"), (modified, modified))
+    storage.quota_bytes = 2500
+    storage.sweep()
+    assert sorted(os.listdir(storage.output_dir)) == ["deck2.pptx"]
+    assert sorted(os.listdir(storage.manifest_dir)) == ["deck2.json"]
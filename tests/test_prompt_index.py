@@ -0,0 +1,54 @@
+from app.infrastructure.prompt_index import PromptIndex
+
+SCOPE = "scope"
+
+
+def make_index(tmp_path, threshold=0.9):
+    return PromptIndex(db_path=str(tmp_path / "prompt_index.sqlite3"), threshold=threshold)
+
+
+def test_normalize_keeps_content_words():
+    assert PromptIndex.normalize("Please create a presentation about the history of France!") == "history france"
+    assert PromptIndex.normalize("Make 10 slides on Solar Panels") == "10 solar panel"
+
+
+def test_reworded_prompt_is_reused(tmp_path):
+    index = make_index(tmp_path)
+    index.add("Create a presentation about the history of France", SCOPE, "france")
+    assert index.find("Please make a deck on the history of France.", SCOPE) == ("france", 1.0)
+
+
+def test_prompt_with_one_more_word_is_reused(tmp_path):
+    index = make_index(tmp_path)
+    index.add(
+        "A presentation on renewable energy sources, solar panels, wind turbines, hydropower, "
+        "geothermal plants, costs and policy for high school students",
+        SCOPE, "energy"
+    )
+    match = index.find(
+        "A presentation on renewable energy sources, solar panels, wind turbines, hydropower, "
+        "geothermal plants, costs, policy and outlook for high school students",
+        SCOPE
+    )
+    assert match is not None
+    assert match[0] == "energy"
+    assert 0.9 <= match[1] < 1
+
+
+def test_different_topic_is_not_reused(tmp_path):
+    index = make_index(tmp_path)
+    index.add("Create a presentation about the history of France", SCOPE, "france")
+    assert index.find("Create a presentation about the history of Spain", SCOPE) is None
+
+
+def test_different_slide_count_is_not_reused(tmp_path):
+    index = make_index(tmp_path, threshold=0.5)
+    index.add("Make a 10 slides presentation on machine learning basics", SCOPE, "ten")
+    assert index.find("Make a 5 slides presentation on machine learning basics", SCOPE) is None
+    assert index.find("Make a 10 slides deck about machine learning basics", SCOPE) == ("ten", 1.0)
+
+
+def test_scopes_are_separate(tmp_path):
+    index = make_index(tmp_path)
+    index.add("The history of France", SCOPE, "france")
+    assert index.find("The history of France", "other scope") is None
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from app.infrastructure.rate_limiter import AdaptiveTokenBucket
+
+
+def rate_limit_headers(remaining, reset_in):
+    return {"X-Ratelimit-Remaining": str(remaining), "X-Ratelimit-Reset": str(time.time() + reset_in)}
+
+
+def test_full_rate_while_quota_is_comfortable():
+    bucket = AdaptiveTokenBucket(rate=5, burst=10, reserve=20)
+    assert bucket.update(rate_limit_headers(1000, 3600)) == 1000
+    assert bucket.rate == 5
+
+
+def test_reserve_spread_over_short_window():
+    bucket = AdaptiveTokenBucket(rate=5, burst=10, reserve=20, min_rate=0.1)
+    bucket.update(rate_limit_headers(10, 10))
+    assert 0.9 <= bucket.rate <= 1.1
+
+
+def test_reserve_with_far_reset_keeps_a_useful_pace():
+    bucket = AdaptiveTokenBucket(rate=5, burst=10, reserve=20, min_rate=2)
+    # Quota mensuel : réinitialisation dans 30 jours
+    bucket.update(rate_limit_headers(10, 30 * 24 * 3600))
+    assert bucket.rate == 2
+
+    async def acquire_twice():
+        started = time.monotonic()
+        results = [await bucket.acquire(timeout=10), await bucket.acquire(timeout=10)]
+        return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(acquire_twice())
+    assert results == [True, True]
+    assert elapsed < 1
+
+
+def test_exhausted_quota_waits_for_the_reset():
+    bucket = AdaptiveTokenBucket(rate=5, burst=10, reserve=20)
+    bucket.update(rate_limit_headers(0, 3600))
+    assert asyncio.run(bucket.acquire(timeout=0.1)) is False
@@ -0,0 +1,38 @@
+from app.infrastructure.search_cache import SearchCache
+
+
+def make_cache(tmp_path, ttl_seconds=3600, negative_ttl_seconds=900):
+    return SearchCache(
+        db_path=str(tmp_path / "search.sqlite3"),
+        ttl_seconds=ttl_seconds,
+        negative_ttl_seconds=negative_ttl_seconds
+    )
+
+
+def test_query_does_not_depend_on_keyword_case_order_or_spacing():
+    assert SearchCache.normalize_query(["Eiffel  Tower", "paris", ""]) == "eiffel tower|paris"
+    assert SearchCache.normalize_query(["PARIS", "eiffel tower", "Paris"]) == "eiffel tower|paris"
+
+
+def test_results_are_shared_between_instances(tmp_path):
+    make_cache(tmp_path).put(["Paris", "Eiffel Tower"], ["https://img/1", "https://img/2"])
+
+    assert make_cache(tmp_path).get(["eiffel tower", "paris"]) == ["https://img/1", "https://img/2"]
+    assert make_cache(tmp_path).get(["london"]) is None
+
+
+def test_expired_results_are_misses(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=0)
+    cache.put(["paris"], ["https://img/1"])
+
+    assert cache.get(["paris"]) is None
+
+
+def test_empty_results_are_cached_with_the_negative_ttl(tmp_path):
+    cache = make_cache(tmp_path, negative_ttl_seconds=900)
+    cache.put(["nothing"], [])
+    assert cache.get(["nothing"]) == []
+
+    cache = make_cache(tmp_path, negative_ttl_seconds=0)
+    cache.put(["nothing"], [])
+    assert cache.get(["nothing"]) is None
@@ -0,0 +1,66 @@
+import json
+
+from app.infrastructure.slide_stream_parser import IncrementalSlideParser, extract_slides
+
+SLIDES = [
+    {"title": "Introduction", "description": "Why [solar] energy matters {today}"},
+    {"title": "Conclusion", "description": "Next steps"},
+]
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalSlideParser()
+    objects = []
+    for start in range(0, len(text), size):
+        objects.extend(parser.feed(text[start:start + size]))
+    return parser, objects
+
+
+def test_plain_array():
+    parser, objects = feed_in_chunks(json.dumps(SLIDES), 1)
+    assert objects == SLIDES
+    assert parser.finished
+
+
+def test_prose_before_array():
+    text = "Here is your deck [2 sections], as requested:\n" + json.dumps(SLIDES)
+    for size in (1, 3, len(text)):
+        parser, objects = feed_in_chunks(text, size)
+        assert objects == SLIDES
+        assert parser.finished
+
+
+def test_code_fence():
+    text = "```json\n" + json.dumps(SLIDES, indent=2) + "\n```"
+    parser, objects = feed_in_chunks(text, 5)
+    assert objects == SLIDES
+    assert parser.finished
+
+
+def test_wrapped_in_object():
+    text = json.dumps({"slides": SLIDES})
+    parser, objects = feed_in_chunks(text, 2)
+    assert objects == SLIDES
+    assert parser.finished
+
+
+def test_bracket_split_from_brace():
+    parser = IncrementalSlideParser()
+    assert parser.feed("Deck: [") == []
+    assert parser.feed("\n  ") == []
+    assert parser.feed(json.dumps(SLIDES)[1:]) == SLIDES
+    assert parser.finished
+
+
+def test_truncated_array():
+    text = json.dumps(SLIDES)[:-20]
+    parser, objects = feed_in_chunks(text, 4)
+    assert objects == SLIDES[:1]
+    assert not parser.finished
+
+
+def test_extract_slides():
+    assert extract_slides("```json\n" + json.dumps(SLIDES) + "\n```") == (SLIDES, True)
+    assert extract_slides(json.dumps({"slides": SLIDES})) == (SLIDES, True)
+    assert extract_slides("Sure [1]: " + json.dumps(SLIDES)[:-20]) == (SLIDES[:1], False)
+    assert extract_slides("No slides here") == ([], False)